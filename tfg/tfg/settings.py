@@ -109,6 +109,26 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Extraction results, shared by every server process through the cache_extraccion
+    # table. Create it once per database with `python manage.py createcachetable`;
+    # until it exists extraction falls back to a per-process cache and retries periodically.
+    'extraction': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'cache_extraccion',
+        'OPTIONS': {
+            'MAX_ENTRIES': 20000,
+        },
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
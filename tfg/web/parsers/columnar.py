@@ -0,0 +1,461 @@
+import base64
+import struct
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import type_classifier
+
+
+PARQUET_MAGIC = b'PAR1'
+ARROW_MAGIC = b'ARROW1'
+_ARROW_CONTINUATION = b'\xff\xff\xff\xff'
+
+# Footers of real files are a few KB to a few MB; anything bigger is not a footer
+_MAX_FOOTER_BYTES = 64 * 1024 * 1024
+
+
+class ColumnSchema:
+    """One top-level column: its name, property type and the statistics the file carries."""
+    __slots__ = ('name', 'data_type', 'stats')
+
+    def __init__(self, name: str, data_type: str, stats: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.data_type = data_type
+        self.stats = stats
+
+
+class Base64Buffer:
+    """Random access to the bytes behind base64 text, decoding only the quartets asked for."""
+
+    def __init__(self, text: str):
+        self._text = text.strip()
+        padding = len(self._text) - len(self._text.rstrip('='))
+        self.size = len(self._text) // 4 * 3 - padding
+
+    def __len__(self) -> int:
+        return self.size
+
+    def read_at(self, offset: int, length: int) -> bytes:
+        first_quartet = offset // 3
+        last_quartet = (offset + length + 2) // 3
+        decoded = base64.b64decode(self._text[first_quartet * 4:last_quartet * 4])
+        start = offset - first_quartet * 3
+        return decoded[start:start + length]
+
+
+class _RandomAccess:
+    """size + read_at over bytes, a seekable file or a Base64Buffer."""
+
+    def __init__(self, source: Any):
+        if isinstance(source, Base64Buffer):
+            self.size = source.size
+            self._read_at = source.read_at
+        elif isinstance(source, (bytes, bytearray, memoryview)):
+            view = memoryview(source)
+            self.size = len(view)
+            self._read_at = lambda offset, length: bytes(view[offset:offset + length])
+        elif hasattr(source, 'seek') and (not hasattr(source, 'seekable') or source.seekable()):
+            source.seek(0, 2)
+            self.size = source.tell()
+            self._read_at = lambda offset, length: _read_file_at(source, offset, length)
+        else:
+            # Plain streams have to be read to the end to reach the footer
+            data = source.read() if hasattr(source, 'read') else b''.join(source)
+            self.size = len(data)
+            self._read_at = lambda offset, length: data[offset:offset + length]
+
+    def read_at(self, offset: int, length: int) -> bytes:
+        if offset < 0 or length < 0 or offset + length > self.size:
+            raise ValueError('Read outside the file')
+        return self._read_at(offset, length)
+
+
+def _read_file_at(file_obj: Any, offset: int, length: int) -> bytes:
+    file_obj.seek(offset)
+    return file_obj.read(length)
+
+
+# --- Parquet ---------------------------------------------------------------
+
+# Thrift compact protocol field types
+_CT_TRUE = 1
+_CT_FALSE = 2
+_CT_BYTE = 3
+_CT_I16 = 4
+_CT_I32 = 5
+_CT_I64 = 6
+_CT_DOUBLE = 7
+_CT_BINARY = 8
+_CT_LIST = 9
+_CT_SET = 10
+_CT_MAP = 11
+_CT_STRUCT = 12
+
+# parquet.thrift physical types
+_BOOLEAN, _INT32, _INT64, _INT96, _FLOAT, _DOUBLE, _BYTE_ARRAY, _FIXED_LEN_BYTE_ARRAY = range(8)
+_PHYSICAL_FORMATS = {_INT32: '<i', _INT64: '<q', _FLOAT: '<f', _DOUBLE: '<d'}
+
+# ConvertedType values
+_CONVERTED_TEXT = {0, 4, 19}              # UTF8, ENUM, JSON
+_CONVERTED_DATE = {6, 7, 8, 9, 10}        # DATE, TIME_*, TIMESTAMP_*
+_CONVERTED_NUMERIC = set(range(11, 19)) | {5}  # (U)INT_*, DECIMAL
+_CONVERTED_TIMESTAMP_UNITS = {9: 1000, 10: 1000000}
+
+# LogicalType union members
+_LOGICAL_TEXT = {1, 4, 12, 14}            # STRING, ENUM, JSON, UUID
+_LOGICAL_DATE = {6, 7, 8}                 # DATE, TIME, TIMESTAMP
+_LOGICAL_NUMERIC = {5, 10, 15}            # DECIMAL, INTEGER, FLOAT16
+_LOGICAL_DATE_ID = 6
+_LOGICAL_TIMESTAMP_ID = 8
+_TIME_UNIT_DIVISORS = {1: 1000, 2: 1000000, 3: 1000000000}  # MILLIS, MICROS, NANOS
+
+
+class _CompactReader:
+
+    def __init__(self, data: bytes):
+        self._data = data
+        self._pos = 0
+
+    def _byte(self) -> int:
+        value = self._data[self._pos]
+        self._pos += 1
+        return value
+
+    def _varint(self) -> int:
+        result = 0
+        shift = 0
+        while True:
+            byte = self._byte()
+            result |= (byte & 0x7f) << shift
+            if not byte & 0x80:
+                return result
+            shift += 7
+
+    def _zigzag(self) -> int:
+        value = self._varint()
+        return (value >> 1) ^ -(value & 1)
+
+    def _binary(self) -> bytes:
+        length = self._varint()
+        value = self._data[self._pos:self._pos + length]
+        self._pos += length
+        return value
+
+    def read_struct(self) -> Dict[int, Any]:
+        """Read a struct as {field id: value}; nested structs are dicts too."""
+        fields = {}
+        field_id = 0
+        while True:
+            header = self._byte()
+            if header == 0:
+                return fields
+            delta = header >> 4
+            field_id = field_id + delta if delta else self._zigzag()
+            field_type = header & 0x0f
+            if field_type in (_CT_TRUE, _CT_FALSE):
+                fields[field_id] = field_type == _CT_TRUE
+            else:
+                fields[field_id] = self._value(field_type)
+
+    def _value(self, field_type: int) -> Any:
+        if field_type in (_CT_I16, _CT_I32, _CT_I64):
+            return self._zigzag()
+        if field_type == _CT_BINARY:
+            return self._binary()
+        if field_type == _CT_STRUCT:
+            return self.read_struct()
+        if field_type in (_CT_LIST, _CT_SET):
+            header = self._byte()
+            size = header >> 4
+            if size == 15:
+                size = self._varint()
+            element_type = header & 0x0f
+            if element_type in (_CT_TRUE, _CT_FALSE):
+                return [self._byte() == _CT_TRUE for _ in range(size)]
+            return [self._value(element_type) for _ in range(size)]
+        if field_type == _CT_MAP:
+            size = self._varint()
+            if not size:
+                return {}
+            types = self._byte()
+            return {self._value(types >> 4): self._value(types & 0x0f) for _ in range(size)}
+        if field_type == _CT_BYTE:
+            value = self._byte()
+            return value - 256 if value > 127 else value
+        if field_type == _CT_DOUBLE:
+            value = struct.unpack_from('<d', self._data, self._pos)[0]
+            self._pos += 8
+            return value
+        raise ValueError(f'Unknown Thrift compact type {field_type}')
+
+
+def read_parquet_schema(source: Any) -> Tuple[List[ColumnSchema], int]:
+    """Columns and row count from the Parquet footer; no row group data is read."""
+    data = _RandomAccess(source)
+    if data.size < 12 or data.read_at(data.size - 4, 4) != PARQUET_MAGIC:
+        raise ValueError('Not a Parquet file')
+    footer_length = struct.unpack('<I', data.read_at(data.size - 8, 4))[0]
+    if footer_length > min(_MAX_FOOTER_BYTES, data.size - 12):
+        raise ValueError('Invalid Parquet footer length')
+    metadata = _CompactReader(data.read_at(data.size - 8 - footer_length, footer_length)).read_struct()
+
+    schema = metadata.get(2, [])
+    num_rows = metadata.get(3, 0)
+    columns = []
+    leaf_to_column: Dict[str, int] = {}
+
+    # The schema is a depth-first flattening of the tree; element 0 is the root
+    index = 1
+    while index < len(schema):
+        element = schema[index]
+        name = element.get(4, b'').decode('utf-8', errors='replace')
+        child_count = element.get(5, 0)
+        if child_count:
+            # Nested group (list, map, struct): one text property for the whole group
+            columns.append(ColumnSchema(name, type_classifier.TYPE_TEXT))
+            index = _skip_schema_subtree(schema, index)
+            continue
+        leaf_to_column[name] = len(columns)
+        columns.append(ColumnSchema(name, _parquet_type(element)))
+        index += 1
+
+    _apply_row_group_statistics(metadata.get(4, []), schema, columns, leaf_to_column, num_rows)
+    return columns, num_rows
+
+
+def _skip_schema_subtree(schema: List[Dict[int, Any]], index: int) -> int:
+    remaining = 1
+    while remaining and index < len(schema):
+        remaining += schema[index].get(5, 0) - 1
+        index += 1
+    return index
+
+
+def _parquet_type(element: Dict[int, Any]) -> str:
+    logical = element.get(10)
+    if logical:
+        logical_id = next(iter(logical))
+        if logical_id in _LOGICAL_TEXT:
+            return type_classifier.TYPE_TEXT
+        if logical_id in _LOGICAL_DATE:
+            return type_classifier.TYPE_DATE
+        if logical_id in _LOGICAL_NUMERIC:
+            return type_classifier.TYPE_NUMERIC
+
+    converted = element.get(6)
+    if converted in _CONVERTED_TEXT:
+        return type_classifier.TYPE_TEXT
+    if converted in _CONVERTED_DATE:
+        return type_classifier.TYPE_DATE
+    if converted in _CONVERTED_NUMERIC:
+        return type_classifier.TYPE_NUMERIC
+
+    physical = element.get(1)
+    if physical == _BOOLEAN:
+        return type_classifier.TYPE_BOOLEAN
+    if physical in (_INT32, _INT64, _FLOAT, _DOUBLE):
+        return type_classifier.TYPE_NUMERIC
+    if physical == _INT96:
+        # Legacy Impala/Spark timestamps
+        return type_classifier.TYPE_DATE
+    return type_classifier.TYPE_TEXT
+
+
+def _apply_row_group_statistics(row_groups: List[Dict[int, Any]], schema: List[Dict[int, Any]],
+                                columns: List[ColumnSchema], leaf_to_column: Dict[str, int], num_rows: int):
+    elements = {element.get(4, b'').decode('utf-8', errors='replace'): element for element in schema[1:]}
+    merged: Dict[int, Dict[str, Any]] = {}
+
+    for row_group in row_groups:
+        for chunk in row_group.get(1, []):
+            meta = chunk.get(3)
+            if not meta or len(meta.get(3, [])) != 1:
+                continue
+            name = meta[3][0].decode('utf-8', errors='replace')
+            column_index = leaf_to_column.get(name)
+            statistics = meta.get(12)
+            if column_index is None or not statistics:
+                continue
+
+            stats = merged.setdefault(column_index, {'null_count': 0, 'min': None, 'max': None})
+            if stats['null_count'] is not None:
+                stats['null_count'] = stats['null_count'] + statistics[3] if 3 in statistics else None
+            element = elements[name]
+            # min_value/max_value (5/6) use the column's sort order; the legacy 1/2 only signed numbers
+            low = _decode_statistic(element, statistics.get(6, statistics.get(2)))
+            high = _decode_statistic(element, statistics.get(5, statistics.get(1)))
+            if low is not None and (stats['min'] is None or low < stats['min']):
+                stats['min'] = low
+            if high is not None and (stats['max'] is None or high > stats['max']):
+                stats['max'] = high
+
+    for column_index, stats in merged.items():
+        column = columns[column_index]
+        stats['row_count'] = num_rows
+        column.stats = {key: _statistic_to_json(value) for key, value in stats.items() if value is not None}
+        # Untyped byte arrays often hold dates or numbers as text; the bounds tell which
+        if column.data_type == type_classifier.TYPE_TEXT and isinstance(stats['min'], str) and isinstance(stats['max'], str):
+            data_type, confidence = type_classifier.vote_column_type([stats['min'], stats['max']])
+            if confidence == 1.0 and data_type in (type_classifier.TYPE_DATE, type_classifier.TYPE_NUMERIC):
+                column.data_type = data_type
+
+
+def _decode_statistic(element: Dict[int, Any], raw: Optional[bytes]) -> Any:
+    if raw is None:
+        return None
+    physical = element.get(1)
+    try:
+        if physical in _PHYSICAL_FORMATS:
+            value = struct.unpack(_PHYSICAL_FORMATS[physical], raw)[0]
+            return _logical_value(element, value)
+        if physical == _BOOLEAN:
+            return bool(raw[0]) if raw else None
+        if physical in (_BYTE_ARRAY, _FIXED_LEN_BYTE_ARRAY) and _is_decimal(element):
+            return _logical_value(element, int.from_bytes(raw, 'big', signed=True))
+        if physical == _BYTE_ARRAY and _parquet_type(element) == type_classifier.TYPE_TEXT:
+            return raw.decode('utf-8')
+    except (struct.error, UnicodeDecodeError, OverflowError, ValueError):
+        return None
+    return None
+
+
+def _logical_value(element: Dict[int, Any], value: Any) -> Any:
+    logical = element.get(10) or {}
+    converted = element.get(6)
+    if _LOGICAL_DATE_ID in logical or converted == 6:
+        return date(1970, 1, 1) + timedelta(days=value)
+    if _LOGICAL_TIMESTAMP_ID in logical:
+        unit = logical[_LOGICAL_TIMESTAMP_ID].get(2) or {}
+        divisor = _TIME_UNIT_DIVISORS.get(next(iter(unit), 1), 1000)
+        return datetime(1970, 1, 1, tzinfo=timezone.utc) + timedelta(seconds=value / divisor)
+    if converted in _CONVERTED_TIMESTAMP_UNITS:
+        return datetime(1970, 1, 1, tzinfo=timezone.utc) + timedelta(seconds=value / _CONVERTED_TIMESTAMP_UNITS[converted])
+    if _is_decimal(element):
+        scale = element.get(7) or (logical.get(5) or {}).get(1, 0)
+        return value / (10 ** scale) if scale else value
+    return value
+
+
+def _is_decimal(element: Dict[int, Any]) -> bool:
+    return element.get(6) == 5 or 5 in (element.get(10) or {})
+
+
+def _statistic_to_json(value: Any) -> Any:
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, float) and value == 0:
+        # Writers store -0.0 as the lower bound of columns holding zeros
+        return 0.0
+    return value
+
+
+# --- Arrow IPC -------------------------------------------------------------
+
+# Type union members of Schema.fbs
+_ARROW_NUMERIC = {2, 3, 7}                # Int, FloatingPoint, Decimal
+_ARROW_TEXT = {4, 5, 15, 19, 20, 23, 24}  # Binary, Utf8, FixedSizeBinary, LargeBinary, LargeUtf8, views
+_ARROW_DATE = {8, 9, 10}                  # Date, Time, Timestamp
+_ARROW_BOOL = 6
+_ARROW_MESSAGE_SCHEMA = 1
+
+
+class _FlatTable:
+    """Just enough of the FlatBuffers wire format to walk Arrow's Schema tables."""
+
+    def __init__(self, buf: bytes, pos: int):
+        self._buf = buf
+        self._pos = pos
+        vtable = pos - struct.unpack_from('<i', buf, pos)[0]
+        self._vtable = vtable
+        self._vtable_size = struct.unpack_from('<H', buf, vtable)[0]
+
+    @classmethod
+    def root(cls, buf: bytes, offset: int = 0) -> '_FlatTable':
+        return cls(buf, offset + struct.unpack_from('<I', buf, offset)[0])
+
+    def _field(self, index: int) -> int:
+        entry = 4 + 2 * index
+        if entry >= self._vtable_size:
+            return 0
+        return struct.unpack_from('<H', self._buf, self._vtable + entry)[0]
+
+    def scalar(self, index: int, fmt: str, default: Any = 0) -> Any:
+        offset = self._field(index)
+        return struct.unpack_from(fmt, self._buf, self._pos + offset)[0] if offset else default
+
+    def _indirect(self, index: int) -> Optional[int]:
+        offset = self._field(index)
+        if not offset:
+            return None
+        position = self._pos + offset
+        return position + struct.unpack_from('<I', self._buf, position)[0]
+
+    def string(self, index: int) -> str:
+        position = self._indirect(index)
+        if position is None:
+            return ''
+        length = struct.unpack_from('<I', self._buf, position)[0]
+        return self._buf[position + 4:position + 4 + length].decode('utf-8', errors='replace')
+
+    def table(self, index: int) -> Optional['_FlatTable']:
+        position = self._indirect(index)
+        return None if position is None else _FlatTable(self._buf, position)
+
+    def tables(self, index: int) -> List['_FlatTable']:
+        position = self._indirect(index)
+        if position is None:
+            return []
+        length = struct.unpack_from('<I', self._buf, position)[0]
+        result = []
+        for item in range(length):
+            element = position + 4 + 4 * item
+            result.append(_FlatTable(self._buf, element + struct.unpack_from('<I', self._buf, element)[0]))
+        return result
+
+
+def read_arrow_schema(source: Any) -> List[ColumnSchema]:
+    """Columns of an Arrow IPC file (footer schema) or stream (first message)."""
+    data = _RandomAccess(source)
+    head = data.read_at(0, min(8, data.size))
+    if head.startswith(ARROW_MAGIC):
+        if data.read_at(data.size - 6, 6) != ARROW_MAGIC:
+            raise ValueError('Truncated Arrow file')
+        footer_length = struct.unpack('<i', data.read_at(data.size - 10, 4))[0]
+        if not 0 < footer_length <= min(_MAX_FOOTER_BYTES, data.size - 10):
+            raise ValueError('Invalid Arrow footer length')
+        footer = _FlatTable.root(data.read_at(data.size - 10 - footer_length, footer_length))
+        schema = footer.table(1)
+    else:
+        schema = _read_stream_schema(data)
+    if schema is None:
+        raise ValueError('Arrow schema not found')
+    return [ColumnSchema(field.string(0), _arrow_type(field)) for field in schema.tables(1)]
+
+
+def _read_stream_schema(data: _RandomAccess) -> Optional[_FlatTable]:
+    offset = 0
+    prefix = data.read_at(0, 4)
+    if prefix == _ARROW_CONTINUATION:
+        offset = 4
+    length = struct.unpack('<i', data.read_at(offset, 4))[0]
+    if not 0 < length <= min(_MAX_FOOTER_BYTES, data.size - offset - 4):
+        raise ValueError('Not an Arrow IPC stream')
+    message = _FlatTable.root(data.read_at(offset + 4, length))
+    if message.scalar(1, '<B') != _ARROW_MESSAGE_SCHEMA:
+        return None
+    return message.table(2)
+
+
+def _arrow_type(field: _FlatTable) -> str:
+    if field.table(4) is not None:
+        # Dictionary-encoded columns are categorical values
+        return type_classifier.TYPE_TEXT
+    type_id = field.scalar(2, '<B')
+    if type_id in _ARROW_NUMERIC:
+        return type_classifier.TYPE_NUMERIC
+    if type_id in _ARROW_DATE:
+        return type_classifier.TYPE_DATE
+    if type_id == _ARROW_BOOL:
+        return type_classifier.TYPE_BOOLEAN
+    return type_classifier.TYPE_TEXT
+
@@ -0,0 +1,129 @@
+import bz2
+import gzip
+import io
+import lzma
+import posixpath
+import zipfile
+from itertools import chain
+from typing import Any, Iterator, Optional, Tuple
+
+from .streaming import STREAM_CHUNK_SIZE
+
+
+_MAGIC = (
+    (b'\x1f\x8b', 'gzip'),
+    (b'BZh', 'bz2'),
+    (b'\xfd7zXZ\x00', 'xz'),
+    (b'PK\x03\x04', 'zip'),
+    (b'PK\x05\x06', 'zip'),
+)
+_SUFFIXES = {
+    'gzip': ('.gz', '.gzip'),
+    'bz2': ('.bz2',),
+    'xz': ('.xz',),
+    'zip': ('.zip',),
+}
+# Zip-based documents (OOXML, ODF) are files in their own right, not bundles
+_DOCUMENT_PACKAGE_MEMBERS = ('[Content_Types].xml', 'mimetype')
+# Bounds on what one upload may inflate to when its members are read into memory,
+# so a decompression bomb cannot exhaust the worker: per member, in total, and as
+# a multiple of the compressed size (uploads under MIN_RATIO_BASE count as that size)
+MAX_MEMBER_BYTES = 256 * 1024 * 1024
+MAX_INFLATED_BYTES = 512 * 1024 * 1024
+MAX_COMPRESSION_RATIO = 200
+MIN_RATIO_BASE = 1024 * 1024
+
+
+class DecompressionLimitExceeded(ValueError):
+    pass
+
+
+_STREAM_OPENERS = {
+    'gzip': lambda file_obj: gzip.GzipFile(fileobj=file_obj, mode='rb'),
+    'bz2': bz2.BZ2File,
+    'xz': lzma.LZMAFile,
+}
+
+
+def detect_compression(head: Any) -> Optional[str]:
+    """Name of the compression the bytes start with ('gzip', 'bz2', 'xz', 'zip') or None."""
+    if not isinstance(head, (bytes, bytearray, memoryview)):
+        return None
+    head = bytes(head[:8])
+    for magic, compression in _MAGIC:
+        if head.startswith(magic):
+            return compression
+    return None
+
+
+def strip_compression_suffix(file_name: str, compression: str) -> str:
+    lower = file_name.lower()
+    for suffix in _SUFFIXES.get(compression, ()):
+        if lower.endswith(suffix):
+            return file_name[:-len(suffix)]
+    return file_name
+
+
+def iter_decompressed_files(data: Any, file_name: str = '') -> Iterator[Tuple[str, Any]]:
+    """Yield (name, source) for each file inside data.
+
+    gzip/bz2/xz give one binary stream named after the file without its
+    suffix, zip gives one per member and uncompressed data (or a zip-based
+    document such as an XLSX or ODS workbook) is yielded as is.
+    Streams inflate on read, so nothing is decompressed beyond what the
+    caller consumes. Member streams are closed when the iteration moves on.
+    """
+    compression = detect_compression(data)
+    if compression is None:
+        yield file_name, data
+        return
+
+    if compression == 'zip':
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            if any(name in archive.NameToInfo for name in _DOCUMENT_PACKAGE_MEMBERS):
+                yield file_name, data
+                return
+            for info in archive.infolist():
+                if info.is_dir() or _is_archive_noise(info.filename):
+                    continue
+                with archive.open(info) as member:
+                    yield info.filename, member
+        return
+
+    stream = _STREAM_OPENERS[compression](io.BytesIO(data))
+    with stream:
+        yield strip_compression_suffix(file_name, compression), stream
+
+
+def peek_source(source: Any, size: int, chunk_size: int = STREAM_CHUNK_SIZE) -> Tuple[Any, Any]:
+    """Return the first `size` bytes/chars of source for sniffing, plus a source that still starts at the beginning."""
+    if not hasattr(source, 'read'):
+        return source[:size], source
+    head = source.read(size)
+    rest = iter(lambda: source.read(chunk_size), head[:0])
+    return head, chain([head], rest) if head else rest
+
+
+def read_all(source: Any, limit: Optional[int] = None) -> bytes:
+    """Every byte of source; with a limit, DecompressionLimitExceeded as soon as it holds more."""
+    if not hasattr(source, 'read'):
+        data = bytes(source)
+    elif limit is None:
+        return source.read()
+    else:
+        # One byte past the limit tells a source of exactly `limit` bytes from a bigger one
+        data = source.read(limit + 1)
+    if limit is not None and len(data) > limit:
+        raise DecompressionLimitExceeded(f"more than {limit} bytes once decompressed")
+    return data
+
+
+def inflated_size_limit(compressed_size: int) -> int:
+    """Total bytes an upload of compressed_size may decompress to."""
+    return min(MAX_INFLATED_BYTES, max(compressed_size, MIN_RATIO_BASE) * MAX_COMPRESSION_RATIO)
+
+
+def _is_archive_noise(member_name: str) -> bool:
+    # macOS resource forks and hidden files that zip tools add to bundles
+    base_name = posixpath.basename(member_name)
+    return member_name.startswith('__MACOSX/') or base_name.startswith('.')
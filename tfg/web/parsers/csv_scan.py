@@ -0,0 +1,145 @@
+import csv
+import os
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+from .parallel import PARALLEL_MIN_BYTES, in_worker, map_in_processes, source_file_path, worker_count
+from .streaming import iter_file_range, iter_text_lines
+
+
+# Encodings where a newline byte may be half of a wider character, so byte offsets are not split points
+_WIDE_ENCODINGS = ('utf-16', 'utf-32')
+
+
+def csv_record_ranges(data: Any, parts: int, quotechar: str = '"') -> List[Tuple[int, int]]:
+    """Split a str/bytes buffer into at most `parts` [start, end) ranges that end on a record boundary.
+
+    A newline ends a record only when an even number of quote characters
+    precede it (an escaped "" keeps the parity), so quoted newlines never
+    become split points.
+    """
+    quote, newline = _markers(data, quotechar)
+    starts = _raw_starts(len(data), parts)
+    scans = [_scan_range(_slices(data, start, end), quote, newline)
+             for start, end in zip(starts, starts[1:] + [len(data)])]
+    return _record_ranges(starts, scans, len(data))
+
+
+def file_csv_record_ranges(path: str, parts: int, quotechar: str = '"') -> List[Tuple[int, int]]:
+    """Like csv_record_ranges, over the bytes of a file on disk; the ranges are scanned by the pool."""
+    size = os.path.getsize(path)
+    starts = _raw_starts(size, parts)
+    payloads = [(path, start, end) for start, end in zip(starts, starts[1:] + [size])]
+    scans = map_in_processes(_scan_file_range, payloads, quotechar)
+    return _record_ranges(starts, scans, size)
+
+
+def map_csv_chunks(source: Any, func: Callable, *args, encoding: str = 'utf-8', quotechar: str = '"',
+                   workers: Optional[int] = None, min_parallel_bytes: int = PARALLEL_MIN_BYTES) -> Optional[List[Any]]:
+    """Run func(lines, index, *args) on record-aligned chunks of a big CSV in the process pool.
+
+    Chunk 0 starts with the header row. Results come back in file order for
+    the caller to merge. None when the source cannot be split here (a stream,
+    a small input, a UTF-16/32 encoding, one worker, or already in a worker),
+    so the caller reads it in one pass instead.
+    """
+    workers = workers or worker_count()
+    if workers < 2 or in_worker() or encoding.lower().replace('_', '-').startswith(_WIDE_ENCODINGS):
+        return None
+    path = source_file_path(source)
+    if path is not None:
+        if os.path.getsize(path) < min_parallel_bytes:
+            return None
+        ranges = file_csv_record_ranges(path, workers, quotechar)
+        payloads = [(index, (path, start, end)) for index, (start, end) in enumerate(ranges)]
+    elif isinstance(source, (str, bytes, bytearray)) and len(source) >= min_parallel_bytes:
+        ranges = csv_record_ranges(source, workers, quotechar)
+        payloads = [(index, source[start:end]) for index, (start, end) in enumerate(ranges)]
+    else:
+        return None
+    return map_in_processes(_run_chunk, payloads, func, encoding, *args)
+
+
+def count_csv_records(source: Any, encoding: str = 'utf-8', delimiter: str = ',', **kwargs) -> int:
+    """Number of non-empty records, header included, counted in parallel on big inputs."""
+    counts = map_csv_chunks(source, _count_records, delimiter, encoding=encoding, **kwargs)
+    if counts is None:
+        return _count_records(iter_text_lines(source, encoding), 0, delimiter)
+    return sum(counts)
+
+
+def _count_records(lines: Iterable[str], index: int, delimiter: str) -> int:
+    return sum(1 for row in csv.reader(lines, delimiter=delimiter) if row)
+
+
+def _run_chunk(payload, func: Callable, encoding: str, *args) -> Any:
+    index, chunk = payload
+    if isinstance(chunk, tuple):
+        path, start, end = chunk
+        chunk = iter_file_range(path, start, end)
+    return func(iter_text_lines(chunk, encoding), index, *args)
+
+
+def _markers(data: Any, quotechar: str) -> Tuple[Any, Any]:
+    if isinstance(data, str):
+        return quotechar, '\n'
+    return quotechar.encode('ascii'), b'\n'
+
+
+def _raw_starts(size: int, parts: int) -> List[int]:
+    parts = max(1, min(parts, size or 1))
+    return sorted({size * index // parts for index in range(parts)})
+
+
+def _slices(data: Any, start: int, end: int, chunk_size: int = 1024 * 1024) -> Iterator[Any]:
+    view = memoryview(data) if not isinstance(data, str) else data
+    for offset in range(start, end, chunk_size):
+        chunk = view[offset:min(end, offset + chunk_size)]
+        yield chunk if isinstance(chunk, str) else bytes(chunk)
+
+
+def _scan_file_range(file_range, quotechar: str) -> Tuple[int, Optional[int], Optional[int]]:
+    path, start, end = file_range
+    return _scan_range(iter_file_range(path, start, end), quotechar.encode('ascii'), b'\n')
+
+
+def _scan_range(chunks: Iterable[Any], quote: Any, newline: Any) -> Tuple[int, Optional[int], Optional[int]]:
+    """Quotes in a range, plus the offsets just past its first newline after an even and an odd quote count.
+
+    Which of the two is a record boundary depends on the quotes before the
+    range, known only once every range has been scanned.
+    """
+    count = 0
+    offset = 0
+    after_even = after_odd = None
+    for chunk in chunks:
+        if after_even is None or after_odd is None:
+            quotes = count
+            position = 0
+            while after_even is None or after_odd is None:
+                end = chunk.find(newline, position)
+                if end == -1:
+                    break
+                quotes += chunk.count(quote, position, end)
+                position = end + 1
+                if quotes % 2 == 0:
+                    if after_even is None:
+                        after_even = offset + position
+                elif after_odd is None:
+                    after_odd = offset + position
+        count += chunk.count(quote)
+        offset += len(chunk)
+    return count, after_even, after_odd
+
+
+def _record_ranges(starts: List[int], scans: List[Tuple[int, Optional[int], Optional[int]]],
+                   size: int) -> List[Tuple[int, int]]:
+    boundaries = [0]
+    quotes_before = 0
+    for index, (start, (count, after_even, after_odd)) in enumerate(zip(starts, scans)):
+        if index:
+            # Outside quotes at a newline means an even count since the start of the data
+            after = after_even if quotes_before % 2 == 0 else after_odd
+            if after is not None and start + after > boundaries[-1]:
+                boundaries.append(start + after)
+        quotes_before += count
+    return [(start, end) for start, end in zip(boundaries, boundaries[1:] + [size]) if end > start]
@@ -0,0 +1,92 @@
+import codecs
+from typing import Any, Optional
+
+
+# Detection only ever looks at this much of the content
+ENCODING_SAMPLE_BYTES = 64 * 1024
+
+# Encoding assumed for text that is not valid UTF-8: a superset of latin-1's
+# printable range, and what spreadsheets and older systems export on Windows
+FALLBACK_ENCODING = 'cp1252'
+
+_BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+# Bytes 0x80-0x9F that cp1252 leaves undefined; in latin-1 they are C1 controls
+_CP1252_UNDEFINED = frozenset(b'\x81\x8d\x8f\x90\x9d')
+
+
+def detect_encoding(sample: Any) -> Optional[str]:
+    """Guess the text encoding of a byte sample, or None when it looks binary.
+
+    Checks, in order: a byte order mark, NUL patterns of BOM-less UTF-16,
+    UTF-8 validity (a sequence cut at the end of the sample is fine) and,
+    for the rest, whether the high bytes fit Windows-1252 or only latin-1.
+    """
+    sample = bytes(sample[:ENCODING_SAMPLE_BYTES])
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom):
+            return encoding
+
+    if b'\x00' in sample:
+        return _detect_utf16(sample)
+
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+
+    high_bytes = {byte for byte in sample if 0x80 <= byte <= 0x9f}
+    return 'latin-1' if high_bytes & _CP1252_UNDEFINED else FALLBACK_ENCODING
+
+
+def decode_bytes(data: Any, encoding: Optional[str] = None) -> str:
+    """Decode a whole buffer in one pass, detecting the encoding on a sample when not given."""
+    encoding = encoding or detect_encoding(data) or 'utf-8'
+    return TextDecoder(encoding).decode(bytes(data), final=True)
+
+
+class TextDecoder:
+    """Incremental decoder that switches to FALLBACK_ENCODING when UTF-8 proves wrong.
+
+    A sample can be valid UTF-8 while the file further on is not (plain
+    ASCII header, Windows-1252 accents later). Instead of garbling or
+    dropping those bytes, decoding goes on from the first invalid byte with
+    the fallback. Other encodings replace undecodable bytes.
+    """
+
+    def __init__(self, encoding: str = 'utf-8'):
+        self.encoding = codecs.lookup(encoding).name
+        strict = self.encoding in ('utf-8', 'utf-8-sig')
+        self._decoder = codecs.getincrementaldecoder(encoding)('strict' if strict else 'replace')
+        self._can_fall_back = strict
+
+    def decode(self, data: bytes, final: bool = False) -> str:
+        if not self._can_fall_back:
+            return self._decoder.decode(data, final)
+        try:
+            return self._decoder.decode(data, final)
+        except UnicodeDecodeError as e:
+            # e.object holds the bytes buffered from the previous call followed by data
+            valid = e.object[:e.start].decode(self.encoding) if e.start else ''
+            self.encoding = FALLBACK_ENCODING
+            self._decoder = codecs.getincrementaldecoder(FALLBACK_ENCODING)('replace')
+            self._can_fall_back = False
+            return valid + self._decoder.decode(e.object[e.start:], final)
+
+
+def _detect_utf16(sample: bytes) -> Optional[str]:
+    # Mostly-ASCII UTF-16 has a NUL in every other byte; binary formats have them anywhere
+    even_nuls = sample[0::2].count(0)
+    odd_nuls = sample[1::2].count(0)
+    half = len(sample) // 2 or 1
+    if odd_nuls / half > 0.3 and even_nuls / half < 0.05:
+        return 'utf-16-le'
+    if even_nuls / half > 0.3 and odd_nuls / half < 0.05:
+        return 'utf-16-be'
+    return None
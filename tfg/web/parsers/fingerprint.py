@@ -0,0 +1,76 @@
+import random
+import re
+import struct
+import unicodedata
+from hashlib import blake2b
+from typing import Iterable, List, Optional, Set, Tuple
+
+
+# Signature length, split into LSH bands: two schemas share a band (and become
+# candidates) with probability s**ROWS per band for Jaccard similarity s, so
+# 16 bands of 4 rows find ~99% of pairs at s=0.7 and ~2.5% at s=0.2
+NUM_PERMUTATIONS = 64
+BANDS = 16
+ROWS = NUM_PERMUTATIONS // BANDS
+
+_PRIME = (1 << 61) - 1
+# Fixed seed: signatures are stored, so every process must draw the same permutations
+_rng = random.Random(20240611)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERMUTATIONS)]
+del _rng
+_SIGNATURE_FORMAT = f'>{NUM_PERMUTATIONS}Q'
+_NON_ALNUM_RE = re.compile(r'[^a-z0-9]+')
+
+
+def normalize_column_name(name: str) -> str:
+    """'Fecha de Alta', ' fecha_de_alta' and 'FECHA-DE-ALTA' all become 'fecha_de_alta'."""
+    text = unicodedata.normalize('NFKD', name or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char)).lower()
+    return _NON_ALNUM_RE.sub('_', text).strip('_')
+
+
+def schema_tokens(properties: Iterable[Tuple[str, str]]) -> Set[str]:
+    """One 'name:type' token per column, from (name, type) pairs."""
+    tokens = set()
+    for name, data_type in properties:
+        normalized = normalize_column_name(name)
+        if normalized:
+            tokens.add(f'{normalized}:{data_type or ""}')
+    return tokens
+
+
+class MinHash:
+    """MinHash signature of a token set; the share of equal slots estimates the Jaccard similarity."""
+
+    __slots__ = ('signature',)
+
+    def __init__(self, signature: List[int]):
+        self.signature = signature
+
+    @classmethod
+    def from_tokens(cls, tokens: Iterable[str]) -> Optional['MinHash']:
+        hashes = [int.from_bytes(blake2b(token.encode('utf-8'), digest_size=8).digest(), 'big')
+                  for token in tokens]
+        if not hashes:
+            return None
+        return cls([min((a * value + b) % _PRIME for value in hashes) for a, b in _PERMUTATIONS])
+
+    def similarity(self, other: 'MinHash') -> float:
+        equal = sum(1 for mine, theirs in zip(self.signature, other.signature) if mine == theirs)
+        return equal / NUM_PERMUTATIONS
+
+    def band_keys(self) -> List[Tuple[int, int]]:
+        """(band, key) pairs; each key is a signed 64-bit hash of the band's rows, ready for a BIGINT column."""
+        keys = []
+        for band in range(BANDS):
+            rows = self.signature[band * ROWS:(band + 1) * ROWS]
+            digest = blake2b(struct.pack(f'>{ROWS}Q', *rows), digest_size=8).digest()
+            keys.append((band, int.from_bytes(digest, 'big', signed=True)))
+        return keys
+
+    def to_bytes(self) -> bytes:
+        return struct.pack(_SIGNATURE_FORMAT, *self.signature)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'MinHash':
+        return cls(list(struct.unpack(_SIGNATURE_FORMAT, bytes(data))))
@@ -0,0 +1,154 @@
+import csv
+import os
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+# Bundled places: countries, Spanish autonomous communities, provinces and main municipalities,
+# each with an approximate WGS84 bounding box. Any file with the same columns can replace it.
+GAZETTEER_PATH = os.path.join(os.path.dirname(__file__), 'data', 'gazetteer.csv')
+
+# Levels from the coarsest to the finest
+LEVELS = ('pais', 'ccaa', 'provincia', 'municipio')
+# Side of the spatial index cells, in degrees
+CELL_DEGREES = 1.0
+# Bounding boxes in the gazetteer are approximate, so a region "contains" a box
+# that overflows it by this share of its size (and never less than MIN_MARGIN degrees)
+CONTAINMENT_MARGIN = 0.05
+MIN_MARGIN = 0.01
+
+_NON_ALNUM_RE = re.compile(r'[^a-z0-9]+')
+
+
+class Place:
+    __slots__ = ('id', 'level', 'name', 'parent', 'bbox', 'area', 'depth')
+
+    def __init__(self, place_id: str, level: str, name: str, parent: Optional[str], bbox: List[float]):
+        self.id = place_id
+        self.level = level
+        self.name = name
+        self.parent = parent
+        # [west, south, east, north]
+        self.bbox = bbox
+        self.area = (bbox[2] - bbox[0]) * (bbox[3] - bbox[1])
+        self.depth = LEVELS.index(level)
+
+    def contains(self, bbox: List[float]) -> bool:
+        west, south, east, north = self.bbox
+        margin_x = max((east - west) * CONTAINMENT_MARGIN, MIN_MARGIN)
+        margin_y = max((north - south) * CONTAINMENT_MARGIN, MIN_MARGIN)
+        return (bbox[0] >= west - margin_x and bbox[2] <= east + margin_x
+                and bbox[1] >= south - margin_y and bbox[3] <= north + margin_y)
+
+    def overlap(self, bbox: List[float]) -> float:
+        width = min(self.bbox[2], bbox[2]) - max(self.bbox[0], bbox[0])
+        height = min(self.bbox[3], bbox[3]) - max(self.bbox[1], bbox[1])
+        return width * height if width > 0 and height > 0 else 0.0
+
+
+def normalize_place_name(name: str) -> str:
+    """'Málaga', ' MALAGA ' and 'malaga.' all become 'malaga'."""
+    text = unicodedata.normalize('NFKD', name)
+    text = ''.join(char for char in text if not unicodedata.combining(char)).lower()
+    return _NON_ALNUM_RE.sub(' ', text).strip()
+
+
+class Gazetteer:
+    """Places with a grid index over their bounding boxes and an index of their names.
+
+    Finding the regions around a box looks at one grid cell (the one under
+    the box centre), so lookups cost microseconds whatever the gazetteer size.
+    """
+
+    def __init__(self, places: Iterable[Place], aliases: Optional[Dict[str, List[str]]] = None):
+        self.places: Dict[str, Place] = {place.id: place for place in places}
+        self._cells: Dict[Tuple[int, int], List[Place]] = {}
+        self._names: Dict[str, List[Place]] = {}
+        for place in self.places.values():
+            west, south, east, north = place.bbox
+            for x in range(_cell(west), _cell(east) + 1):
+                for y in range(_cell(south), _cell(north) + 1):
+                    self._cells.setdefault((x, y), []).append(place)
+            for name in [place.name] + (aliases or {}).get(place.id, []):
+                self._names.setdefault(normalize_place_name(name), []).append(place)
+
+    @classmethod
+    def from_csv(cls, path: str = GAZETTEER_PATH) -> 'Gazetteer':
+        places = []
+        aliases = {}
+        with open(path, newline='', encoding='utf-8') as csv_file:
+            for row in csv.DictReader(csv_file):
+                bbox = [float(row[key]) for key in ('oeste', 'sur', 'este', 'norte')]
+                places.append(Place(row['id'], row['nivel'], row['nombre'], row['padre'] or None, bbox))
+                if row.get('alias'):
+                    aliases[row['id']] = [alias for alias in row['alias'].split('|') if alias]
+        return cls(places, aliases)
+
+    def ancestors(self, place: Place) -> List[Place]:
+        """The place itself followed by its parents, up to the country."""
+        chain = []
+        while place is not None:
+            chain.append(place)
+            place = self.places.get(place.parent) if place.parent else None
+        return chain
+
+    def smallest_containing(self, bbox: List[float]) -> Optional[Place]:
+        """The finest place whose box holds the whole bbox; on equal boxes, the finer level wins."""
+        center = ((bbox[0] + bbox[2]) / 2, (bbox[1] + bbox[3]) / 2)
+        candidates = [place for place in self._cells.get((_cell(center[0]), _cell(center[1])), [])
+                      if place.contains(bbox)]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda place: (place.area, -place.depth))
+
+    def overlapping(self, bbox: List[float], level: str = 'pais', limit: int = 3) -> List[Place]:
+        """Places of a level that share area with the bbox, the largest overlap first."""
+        overlaps = [(place.overlap(bbox), place) for place in self.places.values() if place.level == level]
+        overlaps = [(overlap, place) for overlap, place in overlaps if overlap > 0]
+        overlaps.sort(key=lambda item: -item[0])
+        return [place for _, place in overlaps[:limit]]
+
+    def match_name(self, text: str) -> Optional[Place]:
+        """The place a name refers to; when several share it, the finest one ('Madrid' is the city)."""
+        matches = self._names.get(normalize_place_name(text))
+        if not matches:
+            return None
+        return max(matches, key=lambda place: place.depth)
+
+    def common_region(self, counts: Dict[str, int], min_share: float = 0.9) -> Optional[Place]:
+        """The finest place that is, or contains, at least min_share of the counted places."""
+        total = sum(counts.values())
+        if not total:
+            return None
+        cover: Dict[str, int] = {}
+        for place_id, count in counts.items():
+            for place in self.ancestors(self.places[place_id]):
+                cover[place.id] = cover.get(place.id, 0) + count
+        eligible = [self.places[place_id] for place_id, count in cover.items() if count >= total * min_share]
+        if not eligible:
+            return None
+        return max(eligible, key=lambda place: (place.depth, cover[place.id]))
+
+    def label(self, place: Place) -> str:
+        """'Sevilla (Andalucía, España)': the place followed by the regions it belongs to."""
+        names = []
+        for ancestor in self.ancestors(place):
+            if ancestor.name not in names:
+                names.append(ancestor.name)
+        return names[0] if len(names) == 1 else f"{names[0]} ({', '.join(names[1:])})"
+
+
+_gazetteer: Optional[Gazetteer] = None
+
+
+def get_gazetteer() -> Gazetteer:
+    """The bundled gazetteer, loaded on first use."""
+    global _gazetteer
+    if _gazetteer is None:
+        _gazetteer = Gazetteer.from_csv()
+    return _gazetteer
+
+
+def _cell(degrees: float) -> int:
+    return int(degrees // CELL_DEGREES)
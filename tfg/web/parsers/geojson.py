@@ -0,0 +1,166 @@
+from typing import Any, Dict, Iterator, List, Optional
+
+from .json_schema import JSONSchemaSummary
+from .json_stream import ChunkedJSONReader
+from .streaming import iter_text_chunks
+
+
+GEOMETRY_TYPES = (
+    'Point', 'MultiPoint', 'LineString', 'MultiLineString',
+    'Polygon', 'MultiPolygon', 'GeometryCollection',
+)
+# Histogram key for features without a geometry
+NO_GEOMETRY = 'null'
+# Legacy 'crs' names whose positions are WGS84 longitude/latitude, as RFC 7946 requires
+WGS84_CRS_NAMES = ('urn:ogc:def:crs:OGC:1.3:CRS84', 'urn:ogc:def:crs:OGC::CRS84', 'CRS84')
+
+
+class GeoJSONSummary:
+    """Feature count, geometry-type histogram, bounding box and properties schema of a GeoJSON document.
+
+    Summaries of different files combine with merge().
+    """
+
+    def __init__(self):
+        self.feature_count = 0
+        self.geometry_types: Dict[str, int] = {}
+        # [west, south, east, north] over every WGS84 position read
+        self.bbox: Optional[List[float]] = None
+        # Schema of the feature 'properties' objects, one record per feature
+        self.properties = JSONSchemaSummary()
+
+    def add_feature(self, feature: Any):
+        if not isinstance(feature, dict):
+            return
+        self.feature_count += 1
+        self.add_geometry(feature.get('geometry'))
+        properties = feature.get('properties')
+        self.properties.add_value(properties if isinstance(properties, dict) else {})
+
+    def add_geometry(self, geometry: Any):
+        if not isinstance(geometry, dict):
+            self._count_type(NO_GEOMETRY)
+            return
+        self._count_type(str(geometry.get('type')))
+        if geometry.get('type') == 'GeometryCollection':
+            # Members only widen the box; the collection is what the feature has
+            for member in geometry.get('geometries') or []:
+                if isinstance(member, dict):
+                    self._extend_bbox(member.get('coordinates'))
+            return
+        self._extend_bbox(geometry.get('coordinates'))
+
+    def merge(self, other: 'GeoJSONSummary') -> 'GeoJSONSummary':
+        self.feature_count += other.feature_count
+        for geometry_type, count in other.geometry_types.items():
+            self.geometry_types[geometry_type] = self.geometry_types.get(geometry_type, 0) + count
+        if other.bbox:
+            self._widen(*other.bbox)
+        self.properties.merge(other.properties)
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'feature_count': self.feature_count,
+            'geometry_types': dict(self.geometry_types),
+            'bbox': self.bbox,
+        }
+
+    def _count_type(self, geometry_type: str):
+        self.geometry_types[geometry_type] = self.geometry_types.get(geometry_type, 0) + 1
+
+    def _extend_bbox(self, coordinates: Any):
+        # Nested position lists of any depth; each innermost list is read in one go
+        stack = [coordinates]
+        while stack:
+            value = stack.pop()
+            if not isinstance(value, list) or not value:
+                continue
+            first = value[0]
+            if _is_number(first):
+                if len(value) >= 2 and _is_number(value[1]) and _is_wgs84(first, value[1]):
+                    self._widen(first, value[1], first, value[1])
+            elif isinstance(first, list) and first and _is_number(first[0]):
+                # Positions out of longitude/latitude range are projected (UTM) or broken, not places
+                positions = [position for position in value
+                             if isinstance(position, list) and len(position) >= 2
+                             and _is_number(position[0]) and _is_number(position[1])
+                             and _is_wgs84(position[0], position[1])]
+                if positions:
+                    xs = [position[0] for position in positions]
+                    ys = [position[1] for position in positions]
+                    self._widen(min(xs), min(ys), max(xs), max(ys))
+            else:
+                stack.extend(value)
+
+    def _widen(self, west: float, south: float, east: float, north: float):
+        if self.bbox is None:
+            self.bbox = [west, south, east, north]
+            return
+        bbox = self.bbox
+        if west < bbox[0]:
+            bbox[0] = west
+        if south < bbox[1]:
+            bbox[1] = south
+        if east > bbox[2]:
+            bbox[2] = east
+        if north > bbox[3]:
+            bbox[3] = north
+
+
+def iter_geojson_features(source: Any, encoding: str = 'utf-8',
+                          members: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+    """Yield the features of a FeatureCollection one at a time; a lone Feature or geometry counts as one.
+
+    Only the feature being read is held in memory; members other than
+    'features' are small (type, name, crs, bbox) and are decoded whole,
+    into the given dict when there is one.
+    """
+    reader = ChunkedJSONReader(iter_text_chunks(source, encoding))
+    if reader.peek() != '{':
+        return
+    if members is None:
+        members = {}
+    for key in reader.iter_object_keys():
+        if key == 'features' and reader.peek() == '[':
+            for feature in reader.iter_array_items():
+                if isinstance(feature, dict):
+                    yield feature
+        else:
+            members[key] = reader.decode_value()
+
+    if members.get('type') == 'Feature':
+        yield members
+    elif members.get('type') in GEOMETRY_TYPES:
+        yield {'type': 'Feature', 'geometry': members, 'properties': {}}
+
+
+def scan_geojson(source: Any, encoding: str = 'utf-8', summary: Optional[GeoJSONSummary] = None) -> GeoJSONSummary:
+    """Summary of one GeoJSON document, merged into summary when given.
+
+    A document whose legacy 'crs' member names a CRS other than WGS84
+    contributes no bounding box, since its positions are not degrees.
+    """
+    document = GeoJSONSummary()
+    members: Dict[str, Any] = {}
+    for feature in iter_geojson_features(source, encoding, members):
+        document.add_feature(feature)
+    if not is_wgs84_crs(members.get('crs')):
+        document.bbox = None
+    return summary.merge(document) if summary is not None else document
+
+
+def is_wgs84_crs(crs: Any) -> bool:
+    """Whether a legacy GeoJSON 'crs' member (absent meaning the RFC 7946 default) is WGS84 lon/lat."""
+    if crs is None:
+        return True
+    name = (crs.get('properties') or {}).get('name') if isinstance(crs, dict) else None
+    return isinstance(name, str) and name.strip() in WGS84_CRS_NAMES
+
+
+def _is_wgs84(lon: float, lat: float) -> bool:
+    return -180 <= lon <= 180 and -90 <= lat <= 90
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
@@ -0,0 +1,326 @@
+import json
+import os
+from itertools import chain
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .json_stream import ChunkedJSONReader, JSONValueTooLarge, iter_json_events
+from .parallel import (
+    PARALLEL_MIN_BYTES,
+    file_line_aligned_ranges,
+    line_aligned_ranges,
+    map_in_processes,
+    source_file_path,
+    worker_count,
+)
+from .streaming import iter_file_range, iter_text_chunks, iter_text_lines
+
+
+ROOT = ''
+# Path segment standing for every item of an array: /tags/* or /orders/*/id
+ITEMS = '*'
+
+# JSON types as reported per path
+TYPE_OBJECT = 'object'
+TYPE_ARRAY = 'array'
+TYPE_STRING = 'string'
+TYPE_INTEGER = 'integer'
+TYPE_NUMBER = 'number'
+TYPE_BOOLEAN = 'boolean'
+TYPE_NULL = 'null'
+
+_EVENT_TYPES = {'string': TYPE_STRING, 'boolean': TYPE_BOOLEAN, 'null': TYPE_NULL}
+
+# Longest array item decoded as a whole; bigger ones are walked event by event
+MAX_ITEM_CHARS = 8 * 1024 * 1024
+
+
+class PathStats:
+    """What was seen at one JSON pointer: how often, with which types, a few values and array lengths."""
+    __slots__ = ('count', 'types', 'values', 'array_count', 'array_min', 'array_max', 'array_total')
+
+    def __init__(self):
+        self.count = 0
+        self.types: Dict[str, int] = {}
+        # First scalar values, for type detection
+        self.values: List[Any] = []
+        self.array_count = 0
+        self.array_min: Optional[int] = None
+        self.array_max: Optional[int] = None
+        self.array_total = 0
+
+    def add_length(self, length: int):
+        self.array_count += 1
+        self.array_total += length
+        if self.array_min is None or length < self.array_min:
+            self.array_min = length
+        if self.array_max is None or length > self.array_max:
+            self.array_max = length
+
+    def merge(self, other: 'PathStats', max_values: int):
+        self.count += other.count
+        for json_type, count in other.types.items():
+            self.types[json_type] = self.types.get(json_type, 0) + count
+        self.values.extend(other.values[:max(0, max_values - len(self.values))])
+        if other.array_count:
+            self.array_count += other.array_count
+            self.array_total += other.array_total
+            self.array_min = other.array_min if self.array_min is None else min(self.array_min, other.array_min)
+            self.array_max = other.array_max if self.array_max is None else max(self.array_max, other.array_max)
+
+    def array_length(self) -> Optional[Dict[str, Any]]:
+        if not self.array_count:
+            return None
+        return {
+            'min': self.array_min,
+            'max': self.array_max,
+            'mean': round(self.array_total / self.array_count, 3),
+        }
+
+
+class JSONSchemaSummary:
+    """Union schema of a set of JSON records, keyed by JSON pointer.
+
+    Records can be fed as parsed values (add_value) or as parser events
+    (add_events), which never builds the document. Summaries of different
+    chunks, files or workers combine with merge(). At most max_paths paths
+    are tracked, so documents that use object keys as data (ids, dates...)
+    cannot exhaust memory.
+    """
+
+    def __init__(self, max_values: int = 50, max_paths: int = 10000):
+        self.max_values = max_values
+        self.max_paths = max_paths
+        self.record_count = 0
+        self.errors = 0
+        self.truncated = False
+        self.paths: Dict[str, PathStats] = {}
+
+    def add_value(self, record: Any):
+        self.record_count += 1
+        stack = [(ROOT, record)]
+        while stack:
+            path, value = stack.pop()
+            json_type = _value_type(value)
+            stats = self._see(path, json_type, value)
+            if json_type == TYPE_OBJECT:
+                # Reversed so children are first seen in document order
+                stack.extend((child_pointer(path, key), child) for key, child in reversed(list(value.items())))
+            elif json_type == TYPE_ARRAY:
+                if stats is not None:
+                    stats.add_length(len(value))
+                items_path = path + '/' + ITEMS
+                stack.extend((items_path, item) for item in reversed(value))
+
+    def add_events(self, events: Iterator[Tuple[str, Any]], first_event: Tuple[str, Any]):
+        """Add the value that starts with first_event, consuming exactly its events."""
+        self.record_count += 1
+        # Open containers as [path, is_array, item_count, key_path]
+        stack: List[List[Any]] = []
+        event, value = first_event
+        while True:
+            if event == 'map_key':
+                stack[-1][3] = child_pointer(stack[-1][0], value)
+            elif event in ('end_map', 'end_array'):
+                path, is_array, item_count, _ = stack.pop()
+                if is_array:
+                    stats = self.paths.get(path)
+                    if stats is not None:
+                        stats.add_length(item_count)
+                if not stack:
+                    return
+            else:
+                if not stack:
+                    path = ROOT
+                elif stack[-1][1]:
+                    stack[-1][2] += 1
+                    path = stack[-1][0] + '/' + ITEMS
+                else:
+                    path = stack[-1][3]
+
+                if event == 'start_map':
+                    self._see(path, TYPE_OBJECT)
+                    stack.append([path, False, 0, None])
+                elif event == 'start_array':
+                    self._see(path, TYPE_ARRAY)
+                    stack.append([path, True, 0, None])
+                else:
+                    self._see(path, _event_type(event, value), value)
+                    if not stack:
+                        return
+            event, value = next(events)
+
+    def merge(self, other: 'JSONSchemaSummary') -> 'JSONSchemaSummary':
+        self.record_count += other.record_count
+        self.errors += other.errors
+        self.truncated = self.truncated or other.truncated
+        for path, other_stats in other.paths.items():
+            stats = self.paths.get(path)
+            if stats is None:
+                if len(self.paths) >= self.max_paths:
+                    self.truncated = True
+                    continue
+                stats = self.paths[path] = PathStats()
+            stats.merge(other_stats, self.max_values)
+        return self
+
+    def presence(self, path: str) -> Optional[float]:
+        """Share of the parent objects that have this key; None for array items and the root."""
+        if path == ROOT or path.endswith('/' + ITEMS):
+            return None
+        parent = self.paths.get(path[:path.rfind('/')])
+        parent_objects = parent.types.get(TYPE_OBJECT, 0) if parent else 0
+        if not parent_objects:
+            return None
+        return self.paths[path].count / parent_objects
+
+    def describe(self, path: str) -> Dict[str, Any]:
+        stats = self.paths[path]
+        result = {
+            'path': path,
+            'types': dict(stats.types),
+        }
+        presence = self.presence(path)
+        if presence is not None:
+            result['presence'] = round(presence, 3)
+        array_length = stats.array_length()
+        if array_length:
+            result['array_length'] = array_length
+        return result
+
+    def _see(self, path: str, json_type: str, value: Any = None) -> Optional[PathStats]:
+        stats = self.paths.get(path)
+        if stats is None:
+            if len(self.paths) >= self.max_paths:
+                self.truncated = True
+                return None
+            stats = self.paths[path] = PathStats()
+        stats.count += 1
+        stats.types[json_type] = stats.types.get(json_type, 0) + 1
+        if json_type not in (TYPE_OBJECT, TYPE_ARRAY, TYPE_NULL) and len(stats.values) < self.max_values:
+            stats.values.append(value)
+        return stats
+
+
+def child_pointer(path: str, key: str) -> str:
+    # RFC 6901 escaping: '~' -> '~0', '/' -> '~1'
+    return path + '/' + str(key).replace('~', '~0').replace('/', '~1')
+
+
+def pointer_tokens(path: str) -> List[str]:
+    return [token.replace('~1', '/').replace('~0', '~') for token in path.split('/')[1:]]
+
+
+def infer_json_schema(source: Any, encoding: str = 'utf-8', limit: Optional[int] = None,
+                      summary: Optional[JSONSchemaSummary] = None) -> JSONSchemaSummary:
+    """Union schema of the items of a top-level array, or of the top-level value.
+
+    Array items are decoded one at a time with the json module; an item
+    longer than MAX_ITEM_CHARS, and any other document, is walked from
+    parser events instead, so memory stays bounded either way.
+    """
+    summary = summary or JSONSchemaSummary()
+    reader = ChunkedJSONReader(iter_text_chunks(source, encoding))
+    if reader.peek() != '[':
+        events = iter_json_events(reader.remaining())
+        first_event = next(events, None)
+        if first_event is not None:
+            summary.add_events(events, first_event)
+        return summary
+
+    try:
+        for item in reader.iter_array_items(MAX_ITEM_CHARS):
+            if limit is not None and summary.record_count >= limit:
+                break
+            summary.add_value(item)
+        return summary
+    except JSONValueTooLarge:
+        pass
+
+    # Walk the rest of the array, from the item that was too big, as events
+    events = iter_json_events(chain(['['], reader.remaining()))
+    next(events)
+    for item_event in events:
+        if item_event[0] == 'end_array' or (limit is not None and summary.record_count >= limit):
+            break
+        summary.add_events(events, item_event)
+    return summary
+
+
+def infer_ndjson_schema_lines(lines: Iterable[str], limit: Optional[int] = None,
+                              summary: Optional[JSONSchemaSummary] = None) -> JSONSchemaSummary:
+    summary = summary or JSONSchemaSummary()
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if limit is not None and summary.record_count >= limit:
+            break
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            summary.errors += 1
+            continue
+        summary.add_value(record)
+    return summary
+
+
+def infer_ndjson_schema(source: Any, encoding: str = 'utf-8', limit: Optional[int] = None,
+                        workers: Optional[int] = None, min_parallel_bytes: int = PARALLEL_MIN_BYTES) -> JSONSchemaSummary:
+    """Union schema of an NDJSON document, splitting full scans of big inputs across processes.
+
+    With a limit only the first records are read, in this process. Without
+    one, str/bytes buffers and files on disk are cut into newline-aligned
+    ranges whose summaries are merged in order, as N-Triples are.
+    """
+    if limit is not None:
+        return infer_ndjson_schema_lines(iter_text_lines(source, encoding), limit)
+
+    workers = workers or worker_count()
+    path = source_file_path(source)
+    if path is not None:
+        if workers > 1 and os.path.getsize(path) >= min_parallel_bytes:
+            ranges = file_line_aligned_ranges(path, workers)
+            return _merge(map_in_processes(_infer_file_range, [(path, start, end) for start, end in ranges], encoding))
+    elif isinstance(source, (str, bytes, bytearray)) and workers > 1 and len(source) >= min_parallel_bytes:
+        payloads = [source[start:end] for start, end in line_aligned_ranges(source, workers)]
+        return _merge(map_in_processes(_infer_buffer, payloads, encoding))
+
+    return infer_ndjson_schema_lines(iter_text_lines(source, encoding))
+
+
+def _infer_buffer(buffer: Any, encoding: str) -> JSONSchemaSummary:
+    return infer_ndjson_schema_lines(iter_text_lines(buffer, encoding))
+
+
+def _infer_file_range(file_range, encoding: str) -> JSONSchemaSummary:
+    path, start, end = file_range
+    return infer_ndjson_schema_lines(iter_text_lines(iter_file_range(path, start, end), encoding))
+
+
+def _merge(summaries: List[JSONSchemaSummary]) -> JSONSchemaSummary:
+    merged = summaries[0]
+    for summary in summaries[1:]:
+        merged.merge(summary)
+    return merged
+
+
+def _value_type(value: Any) -> str:
+    if isinstance(value, dict):
+        return TYPE_OBJECT
+    if isinstance(value, list):
+        return TYPE_ARRAY
+    if isinstance(value, str):
+        return TYPE_STRING
+    if isinstance(value, bool):
+        return TYPE_BOOLEAN
+    if isinstance(value, int):
+        return TYPE_INTEGER
+    if isinstance(value, float):
+        return TYPE_NUMBER
+    return TYPE_NULL
+
+
+def _event_type(event: str, value: Any) -> str:
+    if event == 'number':
+        return TYPE_INTEGER if isinstance(value, int) else TYPE_NUMBER
+    return _EVENT_TYPES.get(event, TYPE_NULL)
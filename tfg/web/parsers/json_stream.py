@@ -0,0 +1,415 @@
+import json
+import re
+from itertools import chain
+from json.decoder import scanstring
+from typing import Any, Iterator, List, Optional, Tuple
+
+from .streaming import iter_text_chunks
+
+
+_WHITESPACE_RE = re.compile(r'[ \t\n\r]*')
+_NUMBER_RE = re.compile(r'-?(?:0|[1-9]\d*)(\.\d+)?([eE][-+]?\d+)?')
+_NUMBER_CHARS_RE = re.compile(r'[-+.eE0-9]*')
+
+# Parser states
+_VALUE = 0
+_VALUE_OR_CLOSE = 1
+_KEY = 2
+_KEY_OR_CLOSE = 3
+_COLON = 4
+_AFTER_VALUE = 5
+
+_SCALAR_EVENTS = ('string', 'number', 'boolean', 'null')
+
+
+class _Tokenizer:
+    """Pull tokenizer over text chunks; strings are decoded with json's C scanner."""
+
+    def __init__(self, chunks: Iterator[str]):
+        self._chunks = chunks
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self._eof = True
+            return False
+        # Drop consumed text so the buffer stays around one chunk
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def _error(self, message: str):
+        raise json.JSONDecodeError(message, self._buf, self._pos)
+
+    def next_token(self) -> Tuple[str, Any]:
+        while True:
+            self._pos = _WHITESPACE_RE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                break
+            if not self._fill():
+                return 'eof', None
+
+        char = self._buf[self._pos]
+        if char in '{}[]:,':
+            self._pos += 1
+            return char, None
+        if char == '"':
+            return 'string', self._read_string()
+        if char == '-' or char.isdigit():
+            return 'number', self._read_number()
+        if char in 'tfn':
+            return self._read_literal()
+        self._error('Expecting value')
+
+    def _read_string(self) -> str:
+        scan_from = self._pos + 1
+        while True:
+            if self._buf.find('"', scan_from) != -1:
+                try:
+                    value, end = scanstring(self._buf, self._pos + 1)
+                    self._pos = end
+                    return value
+                except json.JSONDecodeError:
+                    if self._eof:
+                        raise
+            # Only scan the newly read text for a closing quote next time
+            pending = len(self._buf) - self._pos
+            if not self._fill():
+                self._error('Unterminated string')
+            scan_from = self._pos + pending
+
+    def _read_number(self) -> Any:
+        # Read the whole run of number characters first, so '1' is not taken from '1.5'
+        while True:
+            end = _NUMBER_CHARS_RE.match(self._buf, self._pos).end()
+            if end < len(self._buf) or not self._fill():
+                break
+        match = _NUMBER_RE.match(self._buf, self._pos)
+        if not match or match.end() != end:
+            self._error('Invalid number')
+        self._pos = end
+        if match.group(1) or match.group(2):
+            return float(match.group(0))
+        return int(match.group(0))
+
+    def _read_literal(self) -> Tuple[str, Any]:
+        while len(self._buf) - self._pos < 5 and self._fill():
+            pass
+        for literal, event, value in (('true', 'boolean', True), ('false', 'boolean', False), ('null', 'null', None)):
+            if self._buf.startswith(literal, self._pos):
+                self._pos += len(literal)
+                return event, value
+        self._error('Expecting value')
+
+
+def iter_json_events(source: Any, encoding: str = 'utf-8') -> Iterator[Tuple[str, Any]]:
+    """Yield (event, value) pairs for the first JSON document in source.
+
+    Events are start_map, map_key, end_map, start_array, end_array, string,
+    number, boolean and null. Input is read chunk by chunk, so a consumer that
+    stops iterating early never reads the rest of the source.
+    """
+    tokenizer = _Tokenizer(iter_text_chunks(source, encoding))
+    stack: List[str] = []
+    state = _VALUE
+
+    while True:
+        if state == _AFTER_VALUE and not stack:
+            return
+
+        kind, value = tokenizer.next_token()
+        if kind == 'eof':
+            raise json.JSONDecodeError('Unexpected end of JSON input', '', 0)
+
+        if state in (_VALUE, _VALUE_OR_CLOSE):
+            if kind == ']' and state == _VALUE_OR_CLOSE:
+                stack.pop()
+                yield 'end_array', None
+                state = _AFTER_VALUE
+            elif kind == '{':
+                stack.append('map')
+                yield 'start_map', None
+                state = _KEY_OR_CLOSE
+            elif kind == '[':
+                stack.append('array')
+                yield 'start_array', None
+                state = _VALUE_OR_CLOSE
+            elif kind in _SCALAR_EVENTS:
+                yield kind, value
+                state = _AFTER_VALUE
+            else:
+                raise json.JSONDecodeError(f'Unexpected {kind!r}', '', 0)
+
+        elif state in (_KEY, _KEY_OR_CLOSE):
+            if kind == 'string':
+                yield 'map_key', value
+                state = _COLON
+            elif kind == '}' and state == _KEY_OR_CLOSE:
+                stack.pop()
+                yield 'end_map', None
+                state = _AFTER_VALUE
+            else:
+                raise json.JSONDecodeError('Expecting property name', '', 0)
+
+        elif state == _COLON:
+            if kind != ':':
+                raise json.JSONDecodeError("Expecting ':' delimiter", '', 0)
+            state = _VALUE
+
+        else:
+            if kind == ',':
+                state = _KEY if stack[-1] == 'map' else _VALUE
+            elif kind == '}' and stack[-1] == 'map':
+                stack.pop()
+                yield 'end_map', None
+            elif kind == ']' and stack[-1] == 'array':
+                stack.pop()
+                yield 'end_array', None
+            else:
+                raise json.JSONDecodeError("Expecting ',' delimiter", '', 0)
+
+
+def build_value(events: Iterator[Tuple[str, Any]], first_event: Tuple[str, Any],
+                max_array_items: Optional[int] = None, max_depth: Optional[int] = None, _depth: int = 0) -> Any:
+    """Build the value that starts with first_event, consuming exactly its events.
+
+    Arrays keep at most max_array_items items. Containers nested deeper than
+    max_depth are summarized: objects become {} and arrays keep only a scalar
+    first item, which is all the type detection looks at.
+    """
+    event, value = first_event
+    if event in _SCALAR_EVENTS:
+        return value
+
+    summarize = max_depth is not None and _depth > max_depth
+    if event == 'start_map':
+        result = {}
+        for event, value in events:
+            if event == 'end_map':
+                return result
+            child = build_value(events, next(events), max_array_items, max_depth, _depth + 1)
+            if not summarize:
+                result[value] = child
+        return result
+
+    if event == 'start_array':
+        result = []
+        for item_event in events:
+            if item_event[0] == 'end_array':
+                return result
+            if summarize:
+                if result or item_event[0] not in _SCALAR_EVENTS:
+                    skip_value(events, item_event)
+                    continue
+            elif max_array_items is not None and len(result) >= max_array_items:
+                skip_value(events, item_event)
+                continue
+            result.append(build_value(events, item_event, max_array_items, max_depth, _depth + 1))
+        return result
+
+    raise ValueError(f'Unexpected JSON event {event!r}')
+
+
+def skip_value(events: Iterator[Tuple[str, Any]], first_event: Tuple[str, Any]):
+    if first_event[0] not in ('start_map', 'start_array'):
+        return
+    depth = 1
+    for event, _ in events:
+        if event in ('start_map', 'start_array'):
+            depth += 1
+        elif event in ('end_map', 'end_array'):
+            depth -= 1
+            if depth == 0:
+                return
+
+
+class JSONValueTooLarge(ValueError):
+    pass
+
+
+class ChunkedJSONReader:
+    """Decodes one value at a time from text chunks with the json module's C decoder.
+
+    Much faster than walking events when the values of interest (array items,
+    object members) are small: only the value being decoded is buffered, so
+    memory follows the largest single value rather than the document.
+    """
+
+    def __init__(self, chunks: Iterator[str]):
+        self._chunks = chunks
+        self._buf = ''
+        self._pos = 0
+        self._decoder = json.JSONDecoder()
+
+    def peek(self) -> str:
+        self._skip_whitespace()
+        return self._buf[self._pos:self._pos + 1]
+
+    def consume(self, char: str) -> bool:
+        if self.peek() != char:
+            return False
+        self._pos += 1
+        return True
+
+    def decode_value(self, max_chars: Optional[int] = None) -> Any:
+        """Decode the next value; JSONValueTooLarge leaves the reader at its start."""
+        self._skip_whitespace()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                pending = len(self._buf) - self._pos
+                if max_chars is not None and pending > max_chars:
+                    raise JSONValueTooLarge(f'JSON value longer than {max_chars} characters')
+                # Read at least as much again before retrying, so a long value costs a few decodes
+                if not self._fill_to(2 * pending):
+                    raise
+                continue
+            # A number cut at the end of the buffer still decodes; retry once more text is in
+            if end == len(self._buf) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    def iter_array_items(self, max_chars: Optional[int] = None) -> Iterator[Any]:
+        """Decode the items of the array that starts here, one at a time."""
+        if not self.consume('['):
+            self._error('Expecting array')
+        if self.consume(']'):
+            return
+        while True:
+            yield self.decode_value(max_chars)
+            if self.consume(']'):
+                return
+            if not self.consume(','):
+                self._error("Expecting ',' delimiter")
+
+    def iter_object_keys(self) -> Iterator[str]:
+        """Yield the keys of the object that starts here, each time leaving the reader at its value.
+
+        The caller has to read the value (decode_value, iter_array_items...)
+        before asking for the next key.
+        """
+        if not self.consume('{'):
+            self._error('Expecting object')
+        if self.consume('}'):
+            return
+        while True:
+            if self.peek() != '"':
+                self._error('Expecting property name')
+            key = self.decode_value()
+            if not self.consume(':'):
+                self._error("Expecting ':' delimiter")
+            yield key
+            if self.consume('}'):
+                return
+            if not self.consume(','):
+                self._error("Expecting ',' delimiter")
+
+    def remaining(self) -> Iterator[str]:
+        """The text not read yet, as chunks, e.g. to go on with iter_json_events."""
+        return chain([self._buf[self._pos:]], self._chunks)
+
+    def _fill(self) -> bool:
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            return False
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def _fill_to(self, size: int) -> bool:
+        filled = False
+        while len(self._buf) - self._pos < size and self._fill():
+            filled = True
+        return filled
+
+    def _skip_whitespace(self):
+        while True:
+            self._pos = _WHITESPACE_RE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf) or not self._fill():
+                return
+
+    def _error(self, message: str):
+        raise json.JSONDecodeError(message, self._buf, self._pos)
+
+
+def iter_json_records(source: Any, limit: Optional[int] = None, encoding: str = 'utf-8',
+                      max_array_items: Optional[int] = None, max_depth: Optional[int] = None) -> Iterator[Any]:
+    """Yield the items of a top-level array one at a time, or the top-level value itself.
+
+    Parsing stops as soon as `limit` records have been produced.
+    """
+    if limit is not None and limit <= 0:
+        return
+    events = iter_json_events(source, encoding)
+    first_event = next(events, None)
+    if first_event is None:
+        return
+
+    if first_event[0] != 'start_array':
+        yield build_value(events, first_event, max_array_items, max_depth)
+        return
+
+    produced = 0
+    for item_event in events:
+        if item_event[0] == 'end_array':
+            return
+        yield build_value(events, item_event, max_array_items, max_depth)
+        produced += 1
+        if limit is not None and produced >= limit:
+            return
+
+
+def preview_json(source: Any, max_chars: int = 2000, encoding: str = 'utf-8') -> Tuple[str, bool]:
+    """Pretty-print the start of a JSON document like json.dumps(indent=2).
+
+    Only the events needed for the first max_chars characters are parsed.
+    Returns the text and whether it was truncated.
+    """
+    parts: List[str] = []
+    size = 0
+    # One entry per open container: True until its first child is written
+    open_containers: List[bool] = []
+    expecting_value_after_key = False
+
+    def write(text: str) -> bool:
+        nonlocal size
+        parts.append(text)
+        size += len(text)
+        return size > max_chars
+
+    def begin_child() -> bool:
+        nonlocal expecting_value_after_key
+        if expecting_value_after_key:
+            expecting_value_after_key = False
+            return False
+        if not open_containers:
+            return False
+        separator = '\n' if open_containers[-1] else ',\n'
+        open_containers[-1] = False
+        return write(separator + '  ' * len(open_containers))
+
+    for event, value in iter_json_events(source, encoding):
+        if event == 'map_key':
+            full = begin_child() or write(json.dumps(value, ensure_ascii=False) + ': ')
+            expecting_value_after_key = True
+        elif event in ('start_map', 'start_array'):
+            full = begin_child() or write('{' if event == 'start_map' else '[')
+            open_containers.append(True)
+        elif event in ('end_map', 'end_array'):
+            empty = open_containers.pop()
+            closing = '}' if event == 'end_map' else ']'
+            full = write(closing if empty else '\n' + '  ' * len(open_containers) + closing)
+        else:
+            full = begin_child() or write(json.dumps(value, ensure_ascii=False))
+
+        if full:
+            return ''.join(parts)[:max_chars], True
+
+    return ''.join(parts), False
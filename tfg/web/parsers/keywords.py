@@ -0,0 +1,153 @@
+import math
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+# Words that never make a keyword, compared without accents: Spanish and English function
+# words, plus the generic words of column names and web addresses
+STOPWORDS = frozenset("""
+    a al algo algun alguna algunas alguno algunos ante antes aqui asi aun cada como con contra cual
+    cuales cuando de del desde donde dos el ella ellas ellos en entre era eran es esa esas ese eso esos
+    esta estan estas este esto estos fue fueron ha han hasta hay la las le les lo los mas me mi mientras
+    muy nada ni no nos o otra otras otro otros para pero poco por porque que quien se segun ser si sin
+    sobre son su sus tambien tan tiene tienen todo todos tras tu un una uno unos unas y ya
+    about after all also an and any are as at be been but by can for from had has have if in into is it
+    its may more no not of on or other our out over such than that the their them then there these they
+    this those to under up was were what when where which while who will with within without would
+    cod codigo code id identificador num numero number nombre name fecha date dato datos data valor
+    value tipo type total otros observaciones campo field http https www com org html
+""".split())
+# Stop words that may sit between two content words of a phrase ('centro de salud')
+CONNECTORS = frozenset(('de', 'del', 'of'))
+# Longest phrase kept from a RAKE split, in content words
+MAX_PHRASE_WORDS = 3
+MIN_WORD_LENGTH = 3
+
+_WORD_RE = re.compile(r'[^\W\d_]+')
+_CAMEL_RE = re.compile(r'(?<=[a-záéíóúñ])(?=[A-ZÁÉÍÓÚÑ])')
+# Punctuation ends a phrase just like a stop word does
+_SEPARATOR_RE = re.compile(r'[^\w\s]|_|\d')
+
+
+def normalize_term(word: str) -> str:
+    """Lowercase and without accents: the form terms are counted and compared in."""
+    text = unicodedata.normalize('NFKD', word.lower())
+    return ''.join(char for char in text if not unicodedata.combining(char))
+
+
+def split_column_name(name: str) -> str:
+    """'tipoCentro_salud' -> 'tipo Centro salud', so column names read like text."""
+    return ' '.join(_CAMEL_RE.sub(' ', part) for part in re.split(r'[_\-.\s]+', name) if part)
+
+
+def document_terms(texts: Iterable[str]) -> Set[str]:
+    """Distinct normalized terms of a document, as counted in the corpus document frequencies."""
+    terms = set()
+    for text in texts:
+        for word in _WORD_RE.findall(text):
+            term = normalize_term(word)
+            if len(term) >= MIN_WORD_LENGTH and term not in STOPWORDS:
+                terms.add(term)
+    return terms
+
+
+def candidate_phrases(text: str) -> List[List[str]]:
+    """RAKE split of a text: runs of content words between stop words and punctuation, lowercased.
+
+    A single connector between two content words stays in the phrase.
+    """
+    phrases = []
+    for fragment in _SEPARATOR_RE.split(text):
+        phrase: List[str] = []
+        connector = None
+        for word in _WORD_RE.findall(fragment):
+            term = normalize_term(word)
+            if term in CONNECTORS and phrase and connector is None:
+                connector = word.lower()
+            elif len(term) < MIN_WORD_LENGTH or term in STOPWORDS:
+                if phrase:
+                    phrases.append(phrase)
+                phrase = []
+                connector = None
+            else:
+                if connector is not None:
+                    phrase.append(connector)
+                    connector = None
+                phrase.append(word.lower())
+        if phrase:
+            phrases.append(phrase)
+    # Long runs are usually lists of names rather than a phrase; their start is kept
+    return [_truncate(phrase) for phrase in phrases]
+
+
+def content_words(phrase: Iterable[str]) -> List[str]:
+    return [word for word in phrase if word not in CONNECTORS]
+
+
+class KeywordExtractor:
+    """RAKE phrase scores weighted by TF-IDF against a corpus of the user's other datasets.
+
+    Each phrase scores the sum of its words' degree/frequency (RAKE), times
+    the log of how often it occurs, times the mean inverse document frequency
+    of its words, so words every dataset of the user has ('municipio',
+    'provincia') sink below the ones that set this dataset apart.
+    """
+
+    def __init__(self, document_frequency: Optional[Dict[str, int]] = None, document_count: int = 0):
+        self.document_frequency = document_frequency or {}
+        self.document_count = document_count
+
+    def idf(self, term: str) -> float:
+        # Smoothed, so an empty corpus leaves every term at 1.0
+        return math.log((self.document_count + 1) / (self.document_frequency.get(term, 0) + 1)) + 1.0
+
+    def extract(self, texts: Iterable[str], limit: int = 5) -> List[Tuple[str, float]]:
+        """The best (keyword, score) pairs, with no keyword repeating the words of a better one."""
+        phrase_counts: Dict[Tuple[str, ...], int] = {}
+        for text in texts:
+            for phrase in candidate_phrases(text):
+                key = tuple(phrase)
+                phrase_counts[key] = phrase_counts.get(key, 0) + 1
+
+        frequency: Dict[str, int] = {}
+        degree: Dict[str, int] = {}
+        for phrase, count in phrase_counts.items():
+            words = content_words(phrase)
+            for word in words:
+                frequency[word] = frequency.get(word, 0) + count
+                degree[word] = degree.get(word, 0) + count * len(words)
+
+        scored = []
+        for phrase, count in phrase_counts.items():
+            words = content_words(phrase)
+            rake = sum(degree[word] / frequency[word] for word in words)
+            idf = sum(self.idf(normalize_term(word)) for word in words) / len(words)
+            scored.append((rake * math.log1p(count) * idf, phrase))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+
+        keywords = []
+        chosen: List[Set[str]] = []
+        for score, phrase in scored:
+            terms = {normalize_term(word) for word in content_words(phrase)}
+            if any(terms <= kept or kept <= terms for kept in chosen):
+                continue
+            chosen.append(terms)
+            keywords.append((' '.join(phrase), round(score, 3)))
+            if len(keywords) == limit:
+                break
+        return keywords
+
+
+def _truncate(phrase: List[str]) -> List[str]:
+    kept = []
+    words = 0
+    for word in phrase:
+        if word not in CONNECTORS:
+            if words == MAX_PHRASE_WORDS:
+                break
+            words += 1
+        kept.append(word)
+    if kept[-1] in CONNECTORS:
+        kept.pop()
+    return kept
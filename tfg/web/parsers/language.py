@@ -0,0 +1,132 @@
+import math
+import operator
+import os
+import re
+from collections import Counter
+from itertools import repeat
+from typing import Iterable, List, Optional, Tuple
+
+
+# One text per language (ISO 639-1 code as the file name) from which its trigram profile is built
+LANGUAGES_DIR = os.path.join(os.path.dirname(__file__), 'data', 'languages')
+NGRAM_SIZE = 3
+# Additive smoothing, so trigrams the profile never saw still get a (small) probability
+SMOOTHING = 0.5
+# Sampled text is scored in chunks of about this many characters; each chunk is one vote
+CHUNK_CHARS = 100
+# Text scored at most, and the least that is worth a guess
+MAX_SAMPLE_CHARS = 8000
+MIN_SAMPLE_CHARS = 40
+# Below this much text the confidence is scaled down, since a few words can pass for several languages
+CONFIDENT_SAMPLE_CHARS = 200
+# Values with fewer letters than this (codes, numbers, initials) say nothing of the language
+MIN_VALUE_LETTERS = 4
+
+_NON_LETTER_RE = re.compile(r"[\W\d_]+")
+
+
+class LanguageProfile:
+    """Log-probabilities of the character trigrams of one language."""
+
+    __slots__ = ('code', 'log_probs', 'unseen')
+
+    def __init__(self, code: str, counts: Counter):
+        self.code = code
+        total = sum(counts.values())
+        denominator = total + SMOOTHING * (len(counts) + 1)
+        self.log_probs = {gram: math.log((count + SMOOTHING) / denominator) for gram, count in counts.items()}
+        self.unseen = math.log(SMOOTHING / denominator)
+
+    def score(self, grams: Counter) -> float:
+        # All in C: log_probs.get(gram, unseen) * count, summed
+        return sum(map(operator.mul, map(self.log_probs.get, grams, repeat(self.unseen)), grams.values()))
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase words separated by single spaces, with a space on each side ('El río 3' -> ' el río ')."""
+    words = _NON_LETTER_RE.sub(' ', text.lower()).split()
+    return f" {' '.join(words)} " if words else ''
+
+
+def trigrams(text: str) -> Counter:
+    return Counter(text[i:i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1))
+
+
+class LanguageDetector:
+    """Naive Bayes over character trigrams: offline, and a few milliseconds for a full sample.
+
+    The language is the one that best explains the whole sample; its
+    confidence is the share of the sample's chunks (weighted by their
+    length) that, scored on their own, agree with it, scaled down for
+    samples shorter than CONFIDENT_SAMPLE_CHARS.
+    """
+
+    def __init__(self, profiles: Iterable[LanguageProfile]):
+        self.profiles = list(profiles)
+
+    @classmethod
+    def from_directory(cls, path: str = LANGUAGES_DIR) -> 'LanguageDetector':
+        profiles = []
+        for file_name in sorted(os.listdir(path)):
+            code, extension = os.path.splitext(file_name)
+            if extension != '.txt':
+                continue
+            with open(os.path.join(path, file_name), encoding='utf-8') as text_file:
+                profiles.append(LanguageProfile(code, trigrams(normalize_text(text_file.read()))))
+        return cls(profiles)
+
+    def detect(self, texts: Iterable[str]) -> List[Tuple[str, float]]:
+        """(ISO 639-1 code, confidence) pairs, the most likely first; [] when there is too little text."""
+        chunks = _chunks(texts)
+        sampled = sum(len(chunk) for chunk in chunks)
+        if sampled < MIN_SAMPLE_CHARS or not self.profiles:
+            return []
+
+        totals = {profile.code: 0.0 for profile in self.profiles}
+        votes = {profile.code: 0 for profile in self.profiles}
+        for chunk in chunks:
+            grams = trigrams(chunk)
+            scores = {profile.code: profile.score(grams) for profile in self.profiles}
+            for code, score in scores.items():
+                totals[code] += score
+            votes[max(scores, key=scores.get)] += len(chunk)
+
+        weight = sum(votes.values()) / min(1.0, sampled / CONFIDENT_SAMPLE_CHARS)
+        ranked = sorted(totals, key=totals.get, reverse=True)
+        return [(code, round(votes[code] / weight, 3)) for code in ranked]
+
+
+_detector: Optional[LanguageDetector] = None
+
+
+def get_language_detector() -> LanguageDetector:
+    """The detector built from the bundled texts, on first use."""
+    global _detector
+    if _detector is None:
+        _detector = LanguageDetector.from_directory()
+    return _detector
+
+
+def _chunks(texts: Iterable[str]) -> List[str]:
+    # Consecutive values are joined until a chunk is long enough to vote; repeated values count once
+    chunks = []
+    current = ''
+    seen = set()
+    sampled = 0
+    for text in texts:
+        if text in seen:
+            continue
+        seen.add(text)
+        normalized = normalize_text(text)
+        if sum(char != ' ' for char in normalized) < MIN_VALUE_LETTERS:
+            continue
+        current = current + normalized[1:] if current else normalized
+        sampled += len(normalized)
+        if len(current) >= CHUNK_CHARS:
+            chunks.append(current)
+            current = ''
+        if sampled >= MAX_SAMPLE_CHARS:
+            break
+    if current:
+        chunks.append(current)
+    return chunks
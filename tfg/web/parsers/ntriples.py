@@ -0,0 +1,95 @@
+import os
+import re
+from typing import Any, Iterable, Optional
+
+from .parallel import (
+    PARALLEL_MIN_BYTES,
+    file_line_aligned_ranges,
+    line_aligned_ranges,
+    map_in_processes,
+    source_file_path,
+    worker_count,
+)
+from .streaming import iter_file_range, iter_text_lines
+from .turtle_stream import RDF_LANG_STRING, TurtleSummary, _unescape
+
+
+_BNODE = r'_:[^\s<>"]*[^\s<>".]'
+
+# subject predicate object [graph] . -- one statement per line (N-Triples / N-Quads)
+_STATEMENT_RE = re.compile(
+    r'[ \t]*(?:<([^>]*)>|(' + _BNODE + r'))'
+    r'[ \t]*<([^>]*)>'
+    r'[ \t]*(?:<([^>]*)>|(' + _BNODE + r')'
+    r'|"((?:[^"\\]|\\.)*)"(?:\^\^<([^>]*)>|@([A-Za-z]+(?:-[A-Za-z0-9]+)*))?)'
+    r'[ \t]*(?:<[^>]*>|' + _BNODE + r')?'
+    r'[ \t]*\.[ \t]*(?:#.*)?$'
+)
+
+
+def scan_ntriples_lines(lines: Iterable[str], summary: Optional[TurtleSummary] = None) -> TurtleSummary:
+    summary = summary or TurtleSummary()
+    add_triple = summary.add_triple
+    add_subject = summary.add_subject
+    match_statement = _STATEMENT_RE.match
+
+    for line in lines:
+        line = line.rstrip('\r\n')
+        match = match_statement(line)
+        if match is None:
+            stripped = line.strip()
+            if stripped and not stripped.startswith('#'):
+                summary.errors += 1
+            continue
+
+        subject_iri, subject_bnode, predicate, object_iri, object_bnode, literal, datatype, language = match.groups()
+        add_subject(subject_iri if subject_iri is not None else subject_bnode)
+        predicate = _unescape(predicate)
+        if literal is not None:
+            if language:
+                datatype = RDF_LANG_STRING
+            add_triple(predicate, 'literal', _unescape(literal), _unescape(datatype) if datatype else None)
+        else:
+            add_triple(predicate, 'iri', _unescape(object_iri) if object_iri is not None else object_bnode)
+
+    return summary
+
+
+def scan_ntriples(source: Any, encoding: str = 'utf-8', workers: Optional[int] = None,
+                  min_parallel_bytes: int = PARALLEL_MIN_BYTES) -> TurtleSummary:
+    """Summarize an N-Triples/N-Quads document, splitting big inputs across processes.
+
+    Statements are one per line, so the input is cut into newline-aligned ranges
+    that are parsed independently and merged in order. str/bytes buffers and
+    files on disk are split; other streams are read once in this process.
+    """
+    workers = workers or worker_count()
+    path = source_file_path(source)
+    if path is not None:
+        if workers > 1 and os.path.getsize(path) >= min_parallel_bytes:
+            ranges = file_line_aligned_ranges(path, workers)
+            return _merge(map_in_processes(_scan_file_range, [(path, start, end) for start, end in ranges], encoding))
+        return scan_ntriples_lines(iter_text_lines(source, encoding))
+
+    if isinstance(source, (str, bytes, bytearray)) and workers > 1 and len(source) >= min_parallel_bytes:
+        payloads = [source[start:end] for start, end in line_aligned_ranges(source, workers)]
+        return _merge(map_in_processes(_scan_buffer, payloads, encoding))
+
+    return scan_ntriples_lines(iter_text_lines(source, encoding))
+
+
+def _scan_buffer(buffer: Any, encoding: str) -> TurtleSummary:
+    return scan_ntriples_lines(iter_text_lines(buffer, encoding))
+
+
+def _scan_file_range(file_range, encoding: str) -> TurtleSummary:
+    path, start, end = file_range
+    return scan_ntriples_lines(iter_text_lines(iter_file_range(path, start, end), encoding))
+
+
+def _merge(summaries) -> TurtleSummary:
+    merged = summaries[0]
+    for summary in summaries[1:]:
+        merged.merge(summary)
+    return merged
+
@@ -0,0 +1,111 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+
+# Below this size the cost of shipping work to other processes outweighs the gain
+PARALLEL_MIN_BYTES = 8 * 1024 * 1024
+
+_pool: Optional[ProcessPoolExecutor] = None
+# True inside pool workers, which must not start pools of their own
+_in_worker = False
+
+
+def worker_count() -> int:
+    return os.cpu_count() or 1
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Shared pool, created on first use so importing the parsers stays cheap."""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=worker_count(), initializer=_mark_worker)
+    return _pool
+
+
+def _mark_worker():
+    global _in_worker
+    _in_worker = True
+
+
+def in_worker() -> bool:
+    return _in_worker
+
+
+def reset_process_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def line_aligned_ranges(data: Any, parts: int) -> List[Tuple[int, int]]:
+    """Split a str/bytes buffer into at most `parts` [start, end) ranges that end on a newline."""
+    newline = '\n' if isinstance(data, str) else b'\n'
+    return _aligned_ranges(len(data), parts, lambda target: _buffer_line_end(data, newline, target))
+
+
+def file_line_aligned_ranges(path: str, parts: int) -> List[Tuple[int, int]]:
+    """Like line_aligned_ranges, over the bytes of a file on disk."""
+    size = os.path.getsize(path)
+    with open(path, 'rb') as file_obj:
+        def line_end(target: int) -> int:
+            file_obj.seek(target)
+            file_obj.readline()
+            return file_obj.tell()
+        return _aligned_ranges(size, parts, line_end)
+
+
+def source_file_path(source: Any) -> Optional[str]:
+    """Path of a source the workers can re-open themselves, or None."""
+    # Uploaded files spooled to disk (and plain open() files)
+    if hasattr(source, 'temporary_file_path'):
+        return source.temporary_file_path()
+    name = getattr(source, 'name', None)
+    if hasattr(source, 'read') and isinstance(name, str) and os.path.isfile(name):
+        return name
+    return None
+
+
+def map_in_processes(func: Callable, payloads: Sequence[Any], *args) -> List[Any]:
+    """Run func(payload, *args) for every payload on the shared pool, keeping payload order.
+
+    Falls back to running in this process when the pool cannot be used
+    (no fork support, a worker died...), so callers always get a result.
+    """
+    if len(payloads) > 1 and not _in_worker:
+        try:
+            pool = get_process_pool()
+            futures = [pool.submit(func, payload, *args) for payload in payloads]
+            return [future.result() for future in futures]
+        except (BrokenProcessPool, OSError, RuntimeError) as e:
+            print(f"Process pool unavailable, parsing in-process: {e}")
+            reset_process_pool()
+    return [func(payload, *args) for payload in payloads]
+
+
+def _buffer_line_end(data: Any, newline: Any, target: int) -> int:
+    end = data.find(newline, target)
+    return len(data) if end == -1 else end + 1
+
+
+def _aligned_ranges(size: int, parts: int, line_end: Callable[[int], int]) -> List[Tuple[int, int]]:
+    # Every boundary is moved to the end of the line it falls in, so each line
+    # belongs to exactly one range
+    parts = max(1, parts)
+    ranges = []
+    start = 0
+    for index in range(1, parts):
+        target = size * index // parts
+        if target <= start:
+            continue
+        end = min(size, line_end(target - 1))
+        if end > start:
+            ranges.append((start, end))
+            start = end
+        if start >= size:
+            break
+    if start < size or not ranges:
+        ranges.append((start, size))
+    return ranges
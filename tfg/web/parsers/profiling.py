@@ -0,0 +1,305 @@
+import base64
+import heapq
+import json
+import math
+import zlib
+from collections import Counter
+from hashlib import blake2b
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from . import type_classifier
+
+
+# Distinct values buffered before the sketches are updated, once per value with its count
+_PENDING_MAX = 16384
+# Values longer than this are cut in top-k entries and ranges (not in the distinct count)
+_DISPLAY_MAX = 200
+TOP_K = 10
+
+
+class HyperLogLog:
+    """Approximate distinct count in 2**precision bytes (about 3% error for the default 10).
+
+    Values are hashed with blake2b instead of hash(), which is salted per
+    process, so registers built in different workers or requests can be merged.
+    """
+
+    def __init__(self, precision: int = 10, registers: Optional[bytearray] = None):
+        self.precision = precision
+        self.registers = registers if registers is not None else bytearray(1 << precision)
+
+    def update(self, values: Iterable[str]):
+        registers = self.registers
+        remaining_bits = 64 - self.precision
+        mask = (1 << remaining_bits) - 1
+        for value in values:
+            hashed = int.from_bytes(blake2b(value.encode('utf-8', 'surrogatepass'), digest_size=8).digest(), 'big')
+            index = hashed >> remaining_bits
+            # Rank of the first set bit in what is left of the hash
+            rank = remaining_bits - (hashed & mask).bit_length() + 1
+            if rank > registers[index]:
+                registers[index] = rank
+
+    def merge(self, other: 'HyperLogLog'):
+        if other.precision != self.precision:
+            raise ValueError('Cannot merge HyperLogLog sketches of different precision')
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+
+    def estimate(self) -> int:
+        size = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / size)
+        raw = alpha * size * size / sum(2.0 ** -register for register in self.registers)
+        zeros = self.registers.count(0)
+        if raw <= 2.5 * size and zeros:
+            # Linear counting is more accurate while many registers are still empty
+            return round(size * math.log(size / zeros))
+        return round(raw)
+
+    def to_text(self) -> str:
+        return base64.b64encode(zlib.compress(bytes(self.registers))).decode('ascii')
+
+    @classmethod
+    def from_text(cls, text: str) -> 'HyperLogLog':
+        registers = bytearray(zlib.decompress(base64.b64decode(text)))
+        return cls(len(registers).bit_length() - 1, registers)
+
+
+class SpaceSaving:
+    """Top-k frequent values in `capacity` counters; each count overestimates by at most its error."""
+
+    def __init__(self, capacity: int = 64):
+        self.capacity = capacity
+        # value -> [count, error]
+        self.counters: Dict[str, List[int]] = {}
+
+    def add(self, value: str, count: int = 1):
+        counter = self.counters.get(value)
+        if counter is not None:
+            counter[0] += count
+        elif len(self.counters) < self.capacity:
+            self.counters[value] = [count, 0]
+        else:
+            # The new value takes over the smallest counter and inherits its count as error
+            smallest = min(self.counters, key=lambda key: self.counters[key][0])
+            floor = self.counters.pop(smallest)[0]
+            self.counters[value] = [floor + count, floor]
+
+    def add_counts(self, counts: Dict[str, int]):
+        """Add a batch of exact counts, merging it as a summary that has no error."""
+        batch = SpaceSaving(len(counts) + 1)
+        batch.counters = {value: [count, 0] for value, count in counts.items()}
+        self.merge(batch)
+
+    def merge(self, other: 'SpaceSaving'):
+        # A value missing from a full summary may still have had up to its smallest count there
+        own_floor = self._floor()
+        other_floor = other._floor()
+        merged = {}
+        for value in set(self.counters) | set(other.counters):
+            count, error = self.counters.get(value, [own_floor, own_floor])
+            other_count, other_error = other.counters.get(value, [other_floor, other_floor])
+            merged[value] = [count + other_count, error + other_error]
+        self.counters = dict(heapq.nlargest(self.capacity, merged.items(), key=lambda item: item[1][0]))
+
+    def top(self, k: int = TOP_K) -> List[Tuple[str, int]]:
+        ranked = sorted(self.counters.items(), key=lambda item: (-item[1][0], item[0]))
+        return [(value, counter[0]) for value, counter in ranked[:k]]
+
+    def _floor(self) -> int:
+        if len(self.counters) < self.capacity:
+            return 0
+        return min(counter[0] for counter in self.counters.values())
+
+
+class ColumnProfile:
+    """Streaming statistics of one column: nulls, ranges, distinct count, top values and lengths.
+
+    add() only counts the value; the sketches are updated in batches of
+    distinct values, which keeps the per-cell cost of a full scan low.
+    add_all() counts a whole batch of a column at C speed.
+    Profiles of the same column built over different files, chunks or
+    workers combine with merge().
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.null_count = 0
+        self.distinct = HyperLogLog()
+        self.frequent = SpaceSaving()
+        # Power-of-two length buckets (0, 1, 2, 4, 8...) -> values
+        self.lengths: Dict[int, int] = {}
+        # Kind ('numeric', 'date', 'text') -> [min, max]
+        self.ranges: Dict[str, List[Any]] = {}
+        self._pending: Dict[str, int] = {}
+
+    def add(self, value: Any, count: int = 1):
+        if value is None or (isinstance(value, str) and not value.strip()):
+            self.null_count += count
+            return
+        if not isinstance(value, str):
+            value = json.dumps(value, ensure_ascii=False, sort_keys=True, default=str)
+        self.count += count
+        pending = self._pending
+        pending[value] = pending.get(value, 0) + count
+        if len(pending) >= _PENDING_MAX:
+            self._flush()
+
+    def add_all(self, values: Iterable[Any]) -> 'ColumnProfile':
+        values = list(values)
+        try:
+            # Keyed on the type too, since True == 1 == 1.0 would otherwise share one count
+            counts = Counter((type(value), value) for value in values)
+        except TypeError:
+            # Unhashable JSON values (lists, dicts)
+            counts = Counter((type(value), value) if _is_hashable(value)
+                             else (str, json.dumps(value, ensure_ascii=False, sort_keys=True, default=str))
+                             for value in values)
+        for (_, value), count in counts.items():
+            self.add(value, count)
+        return self
+
+    def merge(self, other: 'ColumnProfile') -> 'ColumnProfile':
+        self._flush()
+        other._flush()
+        self.count += other.count
+        self.null_count += other.null_count
+        self.distinct.merge(other.distinct)
+        self.frequent.merge(other.frequent)
+        for bucket, count in other.lengths.items():
+            self.lengths[bucket] = self.lengths.get(bucket, 0) + count
+        for kind, (low, high) in other.ranges.items():
+            self._widen(kind, low, high)
+        return self
+
+    def to_dict(self, data_type: Optional[str] = None) -> Dict[str, Any]:
+        """Readable summary for a column of data_type, as returned by the API and cached."""
+        self._flush()
+        result = {
+            'count': self.count,
+            'null_count': self.null_count,
+            'distinct': min(self.distinct.estimate(), self.count),
+        }
+        value_range = self.ranges.get(_range_kind(data_type))
+        if value_range:
+            result['min'], result['max'] = value_range
+        result['top_values'] = [{'value': value, 'count': count} for value, count in self.frequent.top()]
+        result['length_histogram'] = {str(bucket): count for bucket, count in sorted(self.lengths.items())}
+        return result
+
+    def to_state(self) -> Dict[str, Any]:
+        """The sketches from_state() rebuilds, for profiles merged across chunks and workers.
+
+        Server-side only: they are kilobytes per column, so they stay out of
+        the API responses and the extraction cache.
+        """
+        self._flush()
+        return {
+            'count': self.count,
+            'null_count': self.null_count,
+            'hll': self.distinct.to_text(),
+            'top': [[value, count, error] for value, (count, error) in self.frequent.counters.items()],
+            'lengths': dict(self.lengths),
+            'ranges': self.ranges,
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> 'ColumnProfile':
+        profile = cls()
+        profile.count = state['count']
+        profile.null_count = state['null_count']
+        profile.distinct = HyperLogLog.from_text(state['hll'])
+        profile.frequent.counters = {value: [count, error] for value, count, error in state['top']}
+        profile.lengths = {int(bucket): count for bucket, count in state['lengths'].items()}
+        profile.ranges = {kind: list(bounds) for kind, bounds in state['ranges'].items()}
+        return profile
+
+    def _flush(self):
+        pending = self._pending
+        if not pending:
+            return
+        self.distinct.update(pending)
+        lengths = self.lengths
+        shown_counts: Dict[str, int] = {}
+        numbers = []
+        days = []
+        for value, count in pending.items():
+            shown = value[:_DISPLAY_MAX]
+            shown_counts[shown] = shown_counts.get(shown, 0) + count
+            bucket = 1 << (len(value).bit_length() - 1) if value else 0
+            lengths[bucket] = lengths.get(bucket, 0) + count
+            try:
+                number = float(value)
+            except ValueError:
+                number = None
+            if number is not None:
+                if math.isfinite(number):
+                    numbers.append(number)
+            elif type_classifier.classify_string(value.strip()) == type_classifier.TYPE_DATE:
+                day = type_classifier.parse_date(value)
+                if day is not None:
+                    days.append(day.isoformat())
+        self._widen('text', min(shown_counts), max(shown_counts))
+        if numbers:
+            self._widen('numeric', _as_number(min(numbers)), _as_number(max(numbers)))
+        if days:
+            self._widen('date', min(days), max(days))
+        self.frequent.add_counts(shown_counts)
+        self._pending = {}
+
+    def _widen(self, kind: str, low: Any, high: Any):
+        bounds = self.ranges.get(kind)
+        if bounds is None:
+            self.ranges[kind] = [low, high]
+            return
+        if low < bounds[0]:
+            bounds[0] = low
+        if high > bounds[1]:
+            bounds[1] = high
+
+
+def merge_profile_dicts(first: Dict[str, Any], second: Dict[str, Any]) -> Dict[str, Any]:
+    """Combine the to_dict() summaries of one column read from two files.
+
+    Counts, ranges and lengths add up exactly and the top values are ranked
+    over both lists; without the sketches the distinct count is the larger
+    of the two, a lower bound.
+    """
+    count = first.get('count', 0) + second.get('count', 0)
+    result = {
+        'count': count,
+        'null_count': first.get('null_count', 0) + second.get('null_count', 0),
+        'distinct': min(max(first.get('distinct', 0), second.get('distinct', 0)), count),
+    }
+    if 'min' in first and 'min' in second:
+        try:
+            result['min'] = min(first['min'], second['min'])
+            result['max'] = max(first['max'], second['max'])
+        except TypeError:
+            # The files read the column as different types: the first one's range stands
+            result['min'], result['max'] = first['min'], first['max']
+    elif 'min' in first or 'min' in second:
+        bounds = first if 'min' in first else second
+        result['min'], result['max'] = bounds['min'], bounds['max']
+    top_counts: Counter = Counter()
+    for top in first.get('top_values', []) + second.get('top_values', []):
+        top_counts[top['value']] += top['count']
+    ranked = sorted(top_counts.items(), key=lambda item: (-item[1], item[0]))
+    result['top_values'] = [{'value': value, 'count': count} for value, count in ranked[:TOP_K]]
+    lengths = Counter(first.get('length_histogram', {}))
+    lengths.update(second.get('length_histogram', {}))
+    result['length_histogram'] = {bucket: lengths[bucket] for bucket in sorted(lengths, key=int)}
+    return result
+
+
+def _range_kind(data_type: Optional[str]) -> Optional[str]:
+    if data_type in (type_classifier.TYPE_NUMERIC, type_classifier.TYPE_DATE, type_classifier.TYPE_TEXT):
+        return data_type
+    return None
+
+
+def _is_hashable(value: Any) -> bool:
+    return not isinstance(value, (dict, list))
+
+
+def _as_number(number: float) -> Any:
+    return int(number) if number.is_integer() and abs(number) < 2 ** 53 else number
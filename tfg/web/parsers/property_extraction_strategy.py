@@ -1,28 +1,94 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
 import re
 import csv
+import base64
+import copy
 import json
-from io import StringIO
-from datetime import datetime
+from itertools import chain, zip_longest
+from xml.etree import ElementTree as ET
+
+from . import type_classifier
+from .columnar import Base64Buffer, ColumnSchema, read_arrow_schema, read_parquet_schema
+from .csv_scan import map_csv_chunks
+from .geojson import iter_geojson_features, scan_geojson
+from .json_schema import (
+    ITEMS,
+    TYPE_ARRAY,
+    TYPE_INTEGER,
+    TYPE_NUMBER,
+    JSONSchemaSummary,
+    infer_json_schema,
+    infer_ndjson_schema,
+    pointer_tokens,
+)
+from .json_stream import iter_json_records
+from .ntriples import scan_ntriples
+from .parallel import PARALLEL_MIN_BYTES
+from .profiling import ColumnProfile
+from .sampling import RowSampler
+from .spreadsheet import SheetSample, read_workbook_samples
+from .streaming import iter_raw_chunks, iter_text_lines, read_text
+from .turtle_stream import RDF_LANG_STRING, TurtleSummary, scan_turtle
+
+
+# Records the JSON/NDJSON union schema is built over by default, so extraction cost stays
+# bounded by the sample as with the other strategies; schema_records=None scans everything
+SCHEMA_SAMPLE_RECORDS = 1000
 
 
 class PropertyInfo: 
-    DATA_TYPE_TEXT = 'text'
-    DATA_TYPE_NUMERIC = 'numeric'
-    DATA_TYPE_DATE = 'date'
-    DATA_TYPE_COORDINATES = 'coordinates'
-    DATA_TYPE_BOOLEAN = 'boolean'
+    DATA_TYPE_TEXT = type_classifier.TYPE_TEXT
+    DATA_TYPE_NUMERIC = type_classifier.TYPE_NUMERIC
+    DATA_TYPE_DATE = type_classifier.TYPE_DATE
+    DATA_TYPE_COORDINATES = type_classifier.TYPE_COORDINATES
+    DATA_TYPE_BOOLEAN = type_classifier.TYPE_BOOLEAN
     
-    def __init__(self, name: str, data_type: str):
+    __slots__ = ('name', 'data_type', 'confidence', 'iri', 'stats', 'sheet', 'profile', 'schema', 'schema_truncated')
+    
+    def __init__(self, name: str, data_type: str, confidence: Optional[float] = None, iri: Optional[str] = None,
+                 stats: Optional[Dict[str, Any]] = None, sheet: Optional[str] = None,
+                 profile: Optional[ColumnProfile] = None, schema: Optional[List[Dict[str, Any]]] = None,
+                 schema_truncated: bool = False):
         self.name = name
         self.data_type = data_type
+        self.confidence = confidence
+        # Full predicate IRI for RDF properties
+        self.iri = iri
+        # Column statistics stored in the file itself (min, max, null_count, row_count)
+        self.stats = stats
+        # Workbook sheet the column belongs to
+        self.sheet = sheet
+        # Statistics gathered over the values the strategy read
+        self.profile = profile
+        # JSON pointer paths the property was found at, with their types, presence and array lengths
+        self.schema = schema
+        # The document had more paths than were tracked, so schema may miss some
+        self.schema_truncated = schema_truncated
     
-    def to_dict(self) -> Dict[str, str]:
-        return {
+    def to_dict(self, with_state: bool = False) -> Dict[str, Any]:
+        """API form of the property; with_state adds the profile sketches, for merging on the server."""
+        result = {
             'name': self.name,
             'type': self.data_type
         }
+        if self.confidence is not None:
+            result['confidence'] = round(self.confidence, 3)
+        if self.iri:
+            result['iri'] = self.iri
+        if self.stats:
+            result['stats'] = self.stats
+        if self.sheet:
+            result['sheet'] = self.sheet
+        if self.profile is not None:
+            result['profile'] = self.profile.to_dict(self.data_type)
+            if with_state:
+                result['profile_state'] = self.profile.to_state()
+        if self.schema:
+            result['schema'] = self.schema
+        if self.schema_truncated:
+            result['schema_truncated'] = True
+        return result
 
 
 class PropertyExtractionStrategy(ABC):
@@ -31,122 +97,63 @@ class PropertyExtractionStrategy(ABC):
     def extract_properties(self, content: str) -> List[PropertyInfo]:
         pass
     
-    def _detect_type(self, value: Any) -> str:
-        if value is None or value == '':
-            return PropertyInfo.DATA_TYPE_TEXT
-        
-        # Check Python native types first (for JSON parsed values)
-        if isinstance(value, bool):
-            return PropertyInfo.DATA_TYPE_BOOLEAN
-        
-        if isinstance(value, (int, float)):
-            return PropertyInfo.DATA_TYPE_NUMERIC
-        
-        # For lists and dicts, detect based on structure
-        if isinstance(value, list):
-            if value and isinstance(value[0], (int, float)):
-                return PropertyInfo.DATA_TYPE_NUMERIC
-            elif value and len(value) == 2 and all(isinstance(v, (int, float)) for v in value):
-                return PropertyInfo.DATA_TYPE_COORDINATES
-            return PropertyInfo.DATA_TYPE_TEXT
-        
-        if isinstance(value, dict):
-            return PropertyInfo.DATA_TYPE_TEXT
-        
-        # Convert to string for pattern matching
-        value_str = str(value).strip()
-        
-        if self._is_boolean(value_str):
-            return PropertyInfo.DATA_TYPE_BOOLEAN
-        
-        if self._is_numeric(value_str):
-            return PropertyInfo.DATA_TYPE_NUMERIC
-        
-        if self._is_coordinates(value_str):
-            return PropertyInfo.DATA_TYPE_COORDINATES
-        
-        if self._is_date(value_str):
-            return PropertyInfo.DATA_TYPE_DATE
-        
-        return PropertyInfo.DATA_TYPE_TEXT
+    def extract_properties_from_stream(self, source: Any, encoding: str = 'utf-8') -> List[PropertyInfo]:
+        # Strategies without a streaming parser read the whole source
+        return self.extract_properties(read_text(source, encoding))
     
-    def _is_boolean(self, value: str) -> bool:
-        value_lower = value.lower()
-        return value_lower in ['true', 'false', 'yes', 'no', '0', '1', 'si', 'sí']
+    def iter_column_values(self, source: Any, names: Iterable[str], encoding: str = 'utf-8') -> Iterator[Tuple[str, Any]]:
+        """Every value of the named properties as (name, value), in one pass over the source.
+        
+        Names are the ones extract_properties reports. Formats without a
+        tabular reading yield nothing.
+        """
+        return iter(())
     
-    def _is_numeric(self, value: str) -> bool:
-        numeric_pattern = r'^-?\d+\.?\d*([eE][-+]?\d+)?$'
-        return bool(re.match(numeric_pattern, value))
+    def _detect_type(self, value: Any) -> str:
+        return type_classifier.classify_value(value)
     
-    def _is_coordinates(self, value: str) -> bool:
-        latlong_pattern = r'^-?\d+\.?\d*\s*,\s*-?\d+\.?\d*$'
-        if re.match(latlong_pattern, value):
-            return True
-        
-        if 'point' in value.lower() and ('coordinates' in value.lower() or '[' in value):
-            return True
-        
-        if any(keyword in value.upper() for keyword in ['POINT', 'POLYGON', 'LINESTRING']):
-            return True
-        
-        return False
-    
-    def _is_date(self, value: str) -> bool:
-        date_patterns = [
-            r'^\d{4}-\d{2}-\d{2}',
-            r'^\d{2}/\d{2}/\d{4}',
-            r'^\d{4}/\d{2}/\d{2}',
-            r'^\d{2}-\d{2}-\d{4}',
-        ]
-        
-        for pattern in date_patterns:
-            if re.match(pattern, value):
-                return True
-        
-        date_formats = [
-            '%Y-%m-%d',
-            '%d/%m/%Y',
-            '%m/%d/%Y',
-            '%Y/%m/%d',
-            '%d-%m-%Y',
-            '%Y-%m-%dT%H:%M:%S',
-            '%Y-%m-%d %H:%M:%S',
-        ]
-        
-        for fmt in date_formats:
-            try:
-                datetime.strptime(value, fmt)
-                return True
-            except ValueError:
-                continue
-        
-        return False
+    def _detect_column_type(self, values: Iterable[Any]) -> Tuple[str, float]:
+        """Vote a type over sampled values, returning it with the share of values that agree."""
+        return type_classifier.vote_column_type(values)
 
 
 class CSVExtractionStrategy(PropertyExtractionStrategy):
     
+    # Bounded prefix handed to csv.Sniffer
+    SNIFF_MAX_LINES = 5
+    SNIFF_MAX_CHARS = 64 * 1024
+    # Rows profiled together, column by column
+    PROFILE_BATCH_ROWS = 1024
+    
+    def __init__(self, head_rows: int = 100, reservoir_rows: int = 1000,
+                 max_rows: Optional[int] = None, seed: Optional[int] = None,
+                 workers: Optional[int] = None, min_parallel_bytes: int = PARALLEL_MIN_BYTES):
+        # Column types are voted over the first head_rows rows plus a reservoir sample
+        # of the remaining ones; reservoir_rows=0 stops reading after the head.
+        # Full passes over big buffers and files are split into chunks across processes.
+        self.head_rows = head_rows
+        self.reservoir_rows = reservoir_rows
+        self.max_rows = max_rows
+        self.seed = seed
+        self.workers = workers
+        self.min_parallel_bytes = min_parallel_bytes
+    
     def extract_properties(self, content: str) -> List[PropertyInfo]:
+        return self.extract_properties_from_stream(content)
+    
+    def extract_properties_from_stream(self, source: Any, encoding: str = 'utf-8') -> List[PropertyInfo]:
         try:
-            lines = content.split('\n')
-            if len(lines) < 2:
+            csv_reader = self._open_reader(source, encoding)
+            if csv_reader is None:
                 return []
-            
-            # Auto-detect delimiter using csv.Sniffer
-            sample = '\n'.join(lines[:5])  # Use first 5 lines for detection
-            try:
-                sniffer = csv.Sniffer()
-                dialect = sniffer.sniff(sample, delimiters=',;\t|')
-                delimiter = dialect.delimiter
-            except csv.Error:
-                # Fallback: try common delimiters manually
-                delimiter = self._detect_delimiter_manually(lines[0])
-            
-            csv_reader = csv.reader(StringIO(content), delimiter=delimiter)
             headers = next(csv_reader)
             
-            try:
-                first_row = next(csv_reader)
-            except StopIteration:
+            profiles, sampler = self._scan_in_chunks(source, encoding, csv_reader.dialect.delimiter, len(headers))
+            if sampler is None:
+                profiles = [ColumnProfile() for _ in headers]
+                sampler = self._sample_rows(csv_reader, profiles)
+            rows = sampler.rows
+            if not rows:
                 return [PropertyInfo(h.strip(), PropertyInfo.DATA_TYPE_TEXT) for h in headers if h.strip()]
             
             properties = []
@@ -155,15 +162,103 @@ class CSVExtractionStrategy(PropertyExtractionStrategy):
                 if not header:
                     continue
                 
-                value = first_row[i] if i < len(first_row) else ''
-                data_type = self._detect_type(value)
-                properties.append(PropertyInfo(header, data_type))
+                values = (row[i] if i < len(row) else '' for row in rows)
+                data_type, confidence = self._detect_column_type(values)
+                properties.append(PropertyInfo(header, data_type, confidence, profile=profiles[i]))
             
             return properties
         except Exception as e:
             print(f"Error extracting CSV properties: {e}")
             return []
     
+    def iter_column_values(self, source: Any, names: Iterable[str], encoding: str = 'utf-8') -> Iterator[Tuple[str, Any]]:
+        csv_reader = self._open_reader(source, encoding)
+        if csv_reader is None:
+            return
+        headers = [header.strip() for header in next(csv_reader)]
+        wanted = set(names)
+        columns = [(i, header) for i, header in enumerate(headers) if header in wanted]
+        if not columns:
+            return
+        for row in csv_reader:
+            for i, header in columns:
+                if i < len(row):
+                    yield header, row[i]
+    
+    def _open_reader(self, source: Any, encoding: str):
+        """csv.reader positioned at the header row, or None when there is not enough data."""
+        lines = iter_text_lines(source, encoding)
+        prefix = self._read_sniff_prefix(lines)
+        if len(prefix) < 2 and not (prefix and prefix[-1].endswith('\n')):
+            return None
+        
+        # Auto-detect delimiter using csv.Sniffer
+        sample = ''.join(prefix)
+        try:
+            sniffer = csv.Sniffer()
+            dialect = sniffer.sniff(sample, delimiters=',;\t|')
+            delimiter = dialect.delimiter
+        except csv.Error:
+            # Fallback: try common delimiters manually
+            delimiter = self._detect_delimiter_manually(prefix[0])
+        
+        # Replay the sniffed prefix and keep reading lazily from the source
+        return csv.reader(chain(prefix, lines), delimiter=delimiter)
+    
+    def _scan_in_chunks(self, source: Any, encoding: str, delimiter: str,
+                        column_count: int) -> Tuple[List[ColumnProfile], Optional[RowSampler]]:
+        """Profile and sample every row on record-aligned chunks in the pool; (profiles, None) when not split."""
+        if self.reservoir_rows <= 0 or self.max_rows is not None:
+            # Only reading the head (or a fixed number of rows): nothing to split
+            return [], None
+        results = map_csv_chunks(source, _profile_csv_chunk, self, delimiter, column_count, encoding=encoding,
+                                 workers=self.workers, min_parallel_bytes=self.min_parallel_bytes)
+        if not results:
+            return [], None
+        states, sampler = results[0]
+        profiles = [ColumnProfile.from_state(state) for state in states]
+        for states, chunk_sampler in results[1:]:
+            for profile, state in zip(profiles, states):
+                profile.merge(ColumnProfile.from_state(state))
+            sampler.merge(chunk_sampler)
+        return profiles, sampler
+    
+    def _sample_rows(self, csv_reader, profiles: List[ColumnProfile]) -> RowSampler:
+        """Single streaming pass over the data rows keeping a bounded sample and profiling every row read."""
+        sampler = RowSampler(self.head_rows, self.reservoir_rows, self.seed)
+        batch = []
+        for row in csv_reader:
+            if not row:
+                continue
+            if self.max_rows is not None and sampler.seen >= self.max_rows:
+                break
+            sampler.add(row)
+            batch.append(row)
+            if len(batch) >= self.PROFILE_BATCH_ROWS:
+                self._profile_rows(batch, profiles)
+                batch = []
+            if not sampler.wants_more:
+                break
+        self._profile_rows(batch, profiles)
+        return sampler
+    
+    def _profile_rows(self, rows: List[List[str]], profiles: List[ColumnProfile]):
+        # Rows are transposed so each column is counted in one call; short rows pad with None
+        if not rows:
+            return
+        for profile, values in zip(profiles, zip_longest(*rows)):
+            profile.add_all(values)
+    
+    def _read_sniff_prefix(self, lines) -> List[str]:
+        prefix = []
+        size = 0
+        for line in lines:
+            prefix.append(line)
+            size += len(line)
+            if len(prefix) >= self.SNIFF_MAX_LINES or size >= self.SNIFF_MAX_CHARS:
+                break
+        return prefix
+    
     def _detect_delimiter_manually(self, first_line: str) -> str:
         """Manually detect delimiter by counting occurrences of common separators."""
         delimiters = [',', ';', '\t', '|', ':']
@@ -178,28 +273,168 @@ class CSVExtractionStrategy(PropertyExtractionStrategy):
         return ','
 
 
+def _profile_csv_chunk(lines: Iterable[str], index: int, strategy: CSVExtractionStrategy,
+                       delimiter: str, column_count: int) -> Tuple[List[Dict[str, Any]], RowSampler]:
+    # Runs in a pool worker; profiles travel back as their mergeable dicts
+    csv_reader = csv.reader(lines, delimiter=delimiter)
+    if index == 0:
+        next(csv_reader, None)
+    if strategy.seed is not None:
+        # Chunks drawing the same random sequence would pick rows at the same positions
+        strategy = copy.copy(strategy)
+        strategy.seed += index
+    profiles = [ColumnProfile() for _ in range(column_count)]
+    sampler = strategy._sample_rows(csv_reader, profiles)
+    return [profile.to_state() for profile in profiles], sampler
+
+
+class ColumnarExtractionStrategy(PropertyExtractionStrategy):
+    """Formats that describe their columns in a schema; only the schema is read, never the rows.
+    
+    Binary content kept as base64 text (as it is stored in fichero.contenido)
+    is accepted too, and only the schema bytes are decoded from it.
+    """
+    
+    def extract_properties(self, content: str) -> List[PropertyInfo]:
+        return self.extract_properties_from_stream(Base64Buffer(content) if isinstance(content, str) else content)
+    
+    def extract_properties_from_stream(self, source: Any, encoding: str = 'utf-8') -> List[PropertyInfo]:
+        try:
+            return [
+                PropertyInfo(column.name.strip(), column.data_type, stats=column.stats)
+                for column in self._read_columns(source)
+                if column.name.strip()
+            ]
+        except Exception as e:
+            print(f"Error extracting {self.format_name} properties: {e}")
+            return []
+    
+    @abstractmethod
+    def _read_columns(self, source: Any) -> List[ColumnSchema]:
+        pass
+
+
+class ParquetExtractionStrategy(ColumnarExtractionStrategy):
+    format_name = 'Parquet'
+    
+    def _read_columns(self, source: Any) -> List[ColumnSchema]:
+        columns, _ = read_parquet_schema(source)
+        return columns
+
+
+class ArrowExtractionStrategy(ColumnarExtractionStrategy):
+    format_name = 'Arrow'
+    
+    def _read_columns(self, source: Any) -> List[ColumnSchema]:
+        return read_arrow_schema(source)
+
+
+class SpreadsheetExtractionStrategy(PropertyExtractionStrategy):
+    """XLSX and ODS workbooks: one set of properties per sheet, from its header row and a row sample.
+    
+    Base64 text (as binary files are stored in fichero.contenido) is accepted too.
+    """
+    
+    def __init__(self, head_rows: int = 100, reservoir_rows: int = 0, seed: Optional[int] = None):
+        # Same sampling knobs as CSV; without a reservoir each sheet is left after head_rows rows
+        self.head_rows = head_rows
+        self.reservoir_rows = reservoir_rows
+        self.seed = seed
+    
+    def extract_properties(self, content: str) -> List[PropertyInfo]:
+        if isinstance(content, str):
+            content = base64.b64decode(content)
+        return self.extract_properties_from_stream(content)
+    
+    def extract_properties_from_stream(self, source: Any, encoding: str = 'utf-8') -> List[PropertyInfo]:
+        try:
+            properties = []
+            for sheet in read_workbook_samples(source, self.head_rows, self.reservoir_rows, self.seed):
+                properties.extend(self._sheet_properties(sheet))
+            return properties
+        except Exception as e:
+            print(f"Error extracting spreadsheet properties: {e}")
+            return []
+    
+    def _sheet_properties(self, sheet: SheetSample) -> List[PropertyInfo]:
+        properties = []
+        for column, header in sheet.headers:
+            header = str(header).strip()
+            if not header:
+                continue
+            if not sheet.rows:
+                properties.append(PropertyInfo(header, PropertyInfo.DATA_TYPE_TEXT, sheet=sheet.name))
+                continue
+            values = [row.get(column) for row in sheet.rows]
+            data_type, confidence = self._detect_column_type(values)
+            properties.append(PropertyInfo(header, data_type, confidence, sheet=sheet.name,
+                                           profile=ColumnProfile().add_all(values)))
+        return properties
+
+
 class JSONExtractionStrategy(PropertyExtractionStrategy):
     
+    def __init__(self, sample_size: int = 20, max_depth: int = 2, infer_schema: bool = True,
+                 schema_records: Optional[int] = SCHEMA_SAMPLE_RECORDS):
+        # With infer_schema, a union schema is built over the first schema_records records
+        # (every record when None) at any depth; otherwise properties are merged over the first
+        # sample_size records, down to max_depth levels and the first item of each list
+        self.sample_size = sample_size
+        self.max_depth = max_depth
+        self.infer_schema = infer_schema
+        self.schema_records = schema_records
+    
     def extract_properties(self, content: str) -> List[PropertyInfo]:
+        return self.extract_properties_from_stream(content)
+    
+    def extract_properties_from_stream(self, source: Any, encoding: str = 'utf-8') -> List[PropertyInfo]:
         try:
-            data = json.loads(content)
-            
-            if isinstance(data, list):
-                if not data or not isinstance(data[0], dict):
-                    return []
-                data = data[0]
+            if self.infer_schema:
+                return self._properties_from_schema(infer_json_schema(source, encoding, limit=self.schema_records))
             
-            if isinstance(data, dict):
-                properties_dict = {}
-                self._extract_recursive(data, properties_dict, current_depth=0, max_depth=2)
-                return list(properties_dict.values())
+            values_by_property = {}
+            # Containers below the walked depth are only needed for their type,
+            # so the parser summarizes them instead of building them
+            records = iter_json_records(
+                source,
+                limit=self.sample_size,
+                encoding=encoding,
+                max_array_items=self.sample_size,
+                max_depth=2 * (self.max_depth + 1),
+            )
+            for record in records:
+                if isinstance(record, dict):
+                    self._extract_recursive(record, values_by_property, current_depth=0, max_depth=self.max_depth)
             
-            return []
+            return self._properties_from_values(values_by_property)
         except Exception as e:
             print(f"Error extracting JSON properties: {e}")
             return []
     
-    def _extract_recursive(self, obj: Any, properties_dict: Dict[str, PropertyInfo], current_depth: int, max_depth: int):
+    def iter_column_values(self, source: Any, names: Iterable[str], encoding: str = 'utf-8') -> Iterator[Tuple[str, Any]]:
+        wanted = set(names)
+        for record in self._iter_all_records(source, encoding):
+            yield from self._iter_named_values(record, wanted, current_depth=0)
+    
+    def _iter_all_records(self, source: Any, encoding: str) -> Iterator[Any]:
+        return iter_json_records(source, encoding=encoding)
+    
+    def _iter_named_values(self, obj: Any, wanted: set, current_depth: int) -> Iterator[Tuple[str, Any]]:
+        # Same walk as _extract_recursive (unbounded with infer_schema), over every item of nested record lists
+        max_depth = None if self.infer_schema else self.max_depth
+        if (max_depth is not None and current_depth > max_depth) or not isinstance(obj, dict):
+            return
+        for key, value in obj.items():
+            name = self._format_property_name(key)
+            if name in wanted:
+                yield name, value
+            if max_depth is None or current_depth < max_depth:
+                children = value if isinstance(value, list) else [value]
+                for child in children:
+                    if isinstance(child, dict):
+                        yield from self._iter_named_values(child, wanted, current_depth + 1)
+    
+    def _extract_recursive(self, obj: Any, values_by_property: Dict[str, List[Any]], current_depth: int, max_depth: int):
         if current_depth > max_depth:
             return
         
@@ -207,20 +442,66 @@ class JSONExtractionStrategy(PropertyExtractionStrategy):
             for key, value in obj.items():
                 formatted_name = self._format_property_name(key)
                 
-                if formatted_name and formatted_name not in properties_dict:
-                    data_type = self._detect_type(value)
-                    properties_dict[formatted_name] = PropertyInfo(formatted_name, data_type)
+                if formatted_name:
+                    values_by_property.setdefault(formatted_name, []).append(value)
                 
                 if current_depth < max_depth:
                     if isinstance(value, dict):
-                        self._extract_recursive(value, properties_dict, current_depth + 1, max_depth)
+                        self._extract_recursive(value, values_by_property, current_depth + 1, max_depth)
                     elif isinstance(value, list) and value:
                         if isinstance(value[0], dict):
-                            self._extract_recursive(value[0], properties_dict, current_depth + 1, max_depth)
+                            self._extract_recursive(value[0], values_by_property, current_depth + 1, max_depth)
         
         elif isinstance(obj, list) and obj:
             if isinstance(obj[0], dict):
-                self._extract_recursive(obj[0], properties_dict, current_depth, max_depth)
+                self._extract_recursive(obj[0], values_by_property, current_depth, max_depth)
+    
+    def _properties_from_values(self, values_by_property: Dict[str, List[Any]]) -> List[PropertyInfo]:
+        properties = []
+        for name, values in values_by_property.items():
+            data_type, confidence = self._detect_column_type(values)
+            properties.append(PropertyInfo(name, data_type, confidence, profile=ColumnProfile().add_all(values)))
+        return properties
+    
+    def _properties_from_schema(self, summary: JSONSchemaSummary) -> List[PropertyInfo]:
+        # Paths ending in the same key (/id, /orders/*/id) make one property, as the sampled walk does
+        paths_by_property: Dict[str, List[str]] = {}
+        for path in summary.paths:
+            tokens = pointer_tokens(path)
+            if not tokens or tokens[-1] == ITEMS:
+                continue
+            name = self._format_property_name(tokens[-1])
+            if name:
+                paths_by_property.setdefault(name, []).append(path)
+        
+        properties = []
+        for name, paths in paths_by_property.items():
+            values = []
+            item_values = []
+            numeric_items = total_items = 0
+            for path in paths:
+                stats = summary.paths[path]
+                values.extend(stats.values)
+                items = summary.paths.get(path + '/' + ITEMS)
+                if TYPE_ARRAY in stats.types and items is not None:
+                    item_values.extend(items.values)
+                    numeric_items += items.types.get(TYPE_INTEGER, 0) + items.types.get(TYPE_NUMBER, 0)
+                    total_items += sum(items.types.values())
+            if values:
+                data_type, confidence = self._detect_column_type(values)
+            elif not total_items:
+                # Only objects, empty lists or nulls: nothing to vote on
+                data_type, confidence = type_classifier.TYPE_TEXT, None
+            else:
+                # Lists only: numeric lists are numeric, like classify_value does with a list
+                share = numeric_items / total_items
+                data_type = type_classifier.TYPE_NUMERIC if share >= 0.5 else type_classifier.TYPE_TEXT
+                confidence = max(share, 1 - share)
+            values.extend(item_values)
+            properties.append(PropertyInfo(name, data_type, confidence, profile=ColumnProfile().add_all(values),
+                                           schema=[summary.describe(path) for path in paths],
+                                           schema_truncated=summary.truncated))
+        return properties
     
     def _format_property_name(self, name: str) -> str:
         if not name:
@@ -228,102 +509,299 @@ class JSONExtractionStrategy(PropertyExtractionStrategy):
         return name.replace('_', ' ').replace('-', ' ').strip()
 
 
-class RDFXMLExtractionStrategy(PropertyExtractionStrategy):
+class NDJSONExtractionStrategy(JSONExtractionStrategy):
     
-    def extract_properties(self, content: str) -> List[PropertyInfo]:
+    def __init__(self, sample_size: int = 20, max_depth: int = 2, reservoir_size: int = 0, seed: Optional[int] = None,
+                 infer_schema: bool = True, schema_records: Optional[int] = SCHEMA_SAMPLE_RECORDS,
+                 workers: Optional[int] = None, min_parallel_bytes: int = PARALLEL_MIN_BYTES):
+        # One JSON document per line. Without infer_schema, keys are merged over the first
+        # sample_size records plus, if reservoir_size > 0, a reservoir sample of the remaining
+        # lines. Full schema scans (schema_records=None) of big inputs are split across
+        # processes by lines.
+        super().__init__(sample_size, max_depth, infer_schema, schema_records)
+        self.reservoir_size = reservoir_size
+        self.seed = seed
+        self.workers = workers
+        self.min_parallel_bytes = min_parallel_bytes
+    
+    def extract_properties_from_stream(self, source: Any, encoding: str = 'utf-8') -> List[PropertyInfo]:
         try:
-            properties = {}
+            if self.infer_schema:
+                summary = infer_ndjson_schema(source, encoding, limit=self.schema_records,
+                                              workers=self.workers, min_parallel_bytes=self.min_parallel_bytes)
+                return self._properties_from_schema(summary)
             
-            predicate_pattern = r'<([a-zA-Z0-9_-]+):([a-zA-Z0-9_-]+)[^>]*>([^<]*)<'
-            
-            sample_content = content[:10000] if len(content) > 10000 else content
-            
-            for match in re.finditer(predicate_pattern, sample_content):
-                namespace = match.group(1)
-                predicate = match.group(2)
-                value = match.group(3).strip()
-                
-                if namespace.lower() == 'rdf' and predicate in ['RDF', 'Description', 'Bag', 'Seq']:
-                    continue
-                
-                prop_name = self._format_property_name(predicate)
-                
-                if value and prop_name not in properties:
-                    data_type = self._detect_type(value)
-                    properties[prop_name] = PropertyInfo(prop_name, data_type)
-                elif prop_name not in properties:
-                    properties[prop_name] = PropertyInfo(prop_name, PropertyInfo.DATA_TYPE_TEXT)
+            values_by_property = {}
+            for record in self._iter_sampled_records(source, encoding):
+                if isinstance(record, dict):
+                    self._extract_recursive(record, values_by_property, current_depth=0, max_depth=self.max_depth)
             
-            return list(properties.values())
+            return self._properties_from_values(values_by_property)
         except Exception as e:
-            print(f"Error extracting RDF/XML properties: {e}")
+            print(f"Error extracting NDJSON properties: {e}")
             return []
     
+    def _iter_all_records(self, source: Any, encoding: str) -> Iterator[Any]:
+        for line in iter_text_lines(source, encoding):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+    
+    def _iter_sampled_records(self, source: Any, encoding: str):
+        # Lines are sampled raw and only the kept ones are decoded
+        sampler = RowSampler(self.sample_size, self.reservoir_size, self.seed)
+        for line in iter_text_lines(source, encoding):
+            line = line.strip()
+            if not line:
+                continue
+            sampler.add(line)
+            if not sampler.wants_more:
+                break
+        
+        for line in sampler.rows:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+class GeoJSONExtractionStrategy(JSONExtractionStrategy):
+    
+    def extract_properties_from_stream(self, source: Any, encoding: str = 'utf-8') -> List[PropertyInfo]:
+        # Features are streamed one at a time: their 'properties' give the schema and
+        # their geometries the feature count, geometry types and bounding box
+        try:
+            summary = scan_geojson(source, encoding)
+            properties = self._properties_from_schema(summary.properties)
+            properties.append(PropertyInfo('geometry', PropertyInfo.DATA_TYPE_COORDINATES, 1.0, stats=summary.to_dict()))
+            return properties
+        except Exception as e:
+            print(f"Error extracting GeoJSON properties: {e}")
+            return []
+    
+    def _iter_all_records(self, source: Any, encoding: str) -> Iterator[Any]:
+        for feature in iter_geojson_features(source, encoding):
+            yield feature.get('properties') or {}
+
+
+class RDFExtractionStrategy(PropertyExtractionStrategy):
+    
+    def _properties_from_predicates(self, predicates: Dict[str, Tuple[Optional[str], List[str]]],
+                                    prefixes: Dict[str, str]) -> List[PropertyInfo]:
+        """Build properties from predicate IRI -> (declared datatype, sampled literal values)."""
+        local_names = {iri: self._format_property_name(self._local_name(iri)) for iri in predicates}
+        name_counts = {}
+        for name in local_names.values():
+            name_counts[name] = name_counts.get(name, 0) + 1
+        
+        properties = []
+        for iri, (datatype, values) in predicates.items():
+            prop_name = local_names[iri]
+            if not prop_name:
+                continue
+            if name_counts[prop_name] > 1:
+                # Same local name in two vocabularies (dc:title / dct:title)
+                namespace = iri[:len(iri) - len(self._local_name(iri))]
+                prop_name = f"{prop_name} ({prefixes.get(namespace) or namespace})"
+            
+            if datatype:
+                properties.append(PropertyInfo(prop_name, type_classifier.type_from_datatype(datatype), iri=iri))
+            elif values:
+                data_type, confidence = self._detect_column_type(values)
+                properties.append(PropertyInfo(prop_name, data_type, confidence, iri=iri))
+            else:
+                properties.append(PropertyInfo(prop_name, PropertyInfo.DATA_TYPE_TEXT, iri=iri))
+        return properties
+    
+    def _properties_from_summary(self, summary: TurtleSummary) -> List[PropertyInfo]:
+        # Literal datatypes collapse to langString for tagged text, which is plain text
+        predicates = {
+            iri: (stats.datatype if stats.datatype != RDF_LANG_STRING else None, stats.literals)
+            for iri, stats in summary.predicates.items()
+        }
+        prefixes = {namespace: prefix for prefix, namespace in summary.prefixes.items()}
+        return self._properties_from_predicates(predicates, prefixes)
+    
+    def _local_name(self, iri: str) -> str:
+        return re.split(r'[#/:]', iri)[-1]
+    
     def _format_property_name(self, name: str) -> str:
         if not name:
             return ''
         return name.replace('_', ' ').replace('-', ' ').strip()
 
 
-class RDFTurtleExtractionStrategy(PropertyExtractionStrategy):
+class RDFXMLExtractionStrategy(RDFExtractionStrategy):
+    
+    RDF_NS = 'http://www.w3.org/1999/02/22-rdf-syntax-ns#'
+    
+    # Node element frames hold property elements; parseType="Literal" properties are
+    # recorded, but the XML inside them (literal frames) is content, not more triples
+    _ROOT, _NODE, _PROPERTY, _LITERAL_PROPERTY, _LITERAL = range(5)
+    XML_LITERAL = RDF_NS + 'XMLLiteral'
+    
+    def __init__(self, stable_after: int = 10000, max_values_per_property: int = 50):
+        # Parsing stops once stable_after property elements went by without a new predicate
+        self.stable_after = stable_after
+        self.max_values_per_property = max_values_per_property
     
     def extract_properties(self, content: str) -> List[PropertyInfo]:
+        return self.extract_properties_from_stream(content)
+    
+    def extract_properties_from_stream(self, source: Any, encoding: str = 'utf-8') -> List[PropertyInfo]:
+        predicates = {}
+        prefixes = {}
         try:
-            properties = {}
-            
-            sample_content = content[:10000] if len(content) > 10000 else content
-            
-            literal_pattern = r'([a-zA-Z0-9_-]+):([a-zA-Z0-9_-]+)\s+["\']([^"\']*)["\']'
-            
-            for match in re.finditer(literal_pattern, sample_content):
-                namespace = match.group(1)
-                predicate = match.group(2)
-                value = match.group(3).strip()
-                
-                prop_name = self._format_property_name(predicate)
-                
-                if prop_name not in properties:
-                    data_type = self._detect_type(value)
-                    properties[prop_name] = PropertyInfo(prop_name, data_type)
-            
-            typed_literal_pattern = r'([a-zA-Z0-9_-]+):([a-zA-Z0-9_-]+)\s+"[^"]*"\^\^xsd:(\w+)'
-            
-            for match in re.finditer(typed_literal_pattern, sample_content):
-                namespace = match.group(1)
-                predicate = match.group(2)
-                xsd_type = match.group(3).lower()
+            self._scan(source, predicates, prefixes)
+        except ET.ParseError as e:
+            # Keep whatever was read before the malformed part
+            print(f"Error parsing RDF/XML: {e}")
+        except Exception as e:
+            print(f"Error extracting RDF/XML properties: {e}")
+            return []
+        return self._properties_from_predicates(
+            {iri: (stats['datatype'], stats['values']) for iri, stats in predicates.items()},
+            prefixes,
+        )
+    
+    def _scan(self, source: Any, predicates: Dict[str, Dict[str, Any]], prefixes: Dict[str, str]):
+        parser = ET.XMLPullParser(events=('start-ns', 'start', 'end'))
+        frames = []
+        root = None
+        since_new_predicate = 0
+        
+        # Bytes are fed as-is so expat honours the XML encoding declaration
+        for chunk in iter_raw_chunks(source):
+            parser.feed(chunk)
+            for event, payload in parser.read_events():
+                if event == 'start-ns':
+                    prefix, uri = payload
+                    prefixes.setdefault(uri, prefix)
+                    continue
                 
-                prop_name = self._format_property_name(predicate)
+                if event == 'start':
+                    parent = frames[-1] if frames else None
+                    if root is None:
+                        root = payload
+                    frame = self._classify_element(payload, parent)
+                    frames.append(frame)
+                    if frame == self._NODE:
+                        since_new_predicate = self._record_property_attributes(payload, predicates, since_new_predicate)
+                    continue
                 
-                if prop_name not in properties:
-                    if xsd_type in ['date', 'datetime', 'time']:
-                        data_type = PropertyInfo.DATA_TYPE_DATE
-                    elif xsd_type in ['integer', 'decimal', 'double', 'float']:
-                        data_type = PropertyInfo.DATA_TYPE_NUMERIC
-                    elif xsd_type == 'boolean':
-                        data_type = PropertyInfo.DATA_TYPE_BOOLEAN
-                    else:
-                        data_type = PropertyInfo.DATA_TYPE_TEXT
-                    
-                    properties[prop_name] = PropertyInfo(prop_name, data_type)
-            
-            uri_pattern = r'([a-zA-Z0-9_-]+):([a-zA-Z0-9_-]+)\s+<[^>]+>'
-            
-            for match in re.finditer(uri_pattern, sample_content):
-                namespace = match.group(1)
-                predicate = match.group(2)
+                frame = frames.pop()
+                if frame == self._LITERAL:
+                    # Left whole until its property closes, which reads the markup as its value
+                    continue
+                if frame in (self._PROPERTY, self._LITERAL_PROPERTY) or (frame == self._NODE and frames and frames[-1] == self._NODE):
+                    # parseType="Resource" properties are NODE frames nested in a node
+                    is_new = self._record_property(payload, predicates, frame == self._LITERAL_PROPERTY)
+                    since_new_predicate = 0 if is_new else since_new_predicate + 1
                 
-                prop_name = self._format_property_name(predicate)
+                payload.clear()
+                if len(frames) == 1:
+                    # Top-level node finished: drop it so memory stays constant
+                    root.clear()
                 
-                if prop_name not in properties:
-                    properties[prop_name] = PropertyInfo(prop_name, PropertyInfo.DATA_TYPE_TEXT)
-            
-            return list(properties.values())
+                if since_new_predicate >= self.stable_after:
+                    return
+        parser.close()
+    
+    def _classify_element(self, element, parent: Optional[int]) -> int:
+        if parent is None:
+            return self._ROOT if element.tag == f'{{{self.RDF_NS}}}RDF' else self._NODE
+        if parent in (self._LITERAL_PROPERTY, self._LITERAL):
+            return self._LITERAL
+        if parent in (self._ROOT, self._PROPERTY):
+            return self._NODE
+        
+        parse_type = element.get(f'{{{self.RDF_NS}}}parseType')
+        if parse_type == 'Resource':
+            return self._NODE
+        if parse_type == 'Literal':
+            return self._LITERAL_PROPERTY
+        return self._PROPERTY
+    
+    def _record_property(self, element, predicates: Dict[str, Dict[str, Any]], xml_literal: bool = False) -> bool:
+        iri = self._tag_to_iri(element.tag)
+        if self._is_syntax_term(iri):
+            return False
+        
+        is_new = iri not in predicates
+        stats = predicates.setdefault(iri, {'values': [], 'datatype': None})
+        
+        datatype = self.XML_LITERAL if xml_literal else element.get(f'{{{self.RDF_NS}}}datatype')
+        if datatype and not stats['datatype']:
+            stats['datatype'] = datatype
+        
+        if xml_literal:
+            # The literal is the markup itself; its text is what a sample value can show
+            value = ' '.join(''.join(element.itertext()).split())
+            if value and len(stats['values']) < self.max_values_per_property:
+                stats['values'].append(value)
+        elif element.get(f'{{{self.RDF_NS}}}resource') is None and len(element) == 0:
+            value = (element.text or '').strip()
+            if value and len(stats['values']) < self.max_values_per_property:
+                stats['values'].append(value)
+        return is_new
+    
+    def _record_property_attributes(self, element, predicates: Dict[str, Dict[str, Any]], since_new_predicate: int) -> int:
+        for name, value in element.attrib.items():
+            if not name.startswith('{') or name.startswith(f'{{{self.RDF_NS}}}') or name.startswith('{http://www.w3.org/XML/1998/namespace}'):
+                continue
+            iri = self._tag_to_iri(name)
+            stats = predicates.get(iri)
+            if stats is None:
+                stats = predicates[iri] = {'values': [], 'datatype': None}
+                since_new_predicate = 0
+            if value.strip() and len(stats['values']) < self.max_values_per_property:
+                stats['values'].append(value.strip())
+        return since_new_predicate
+    
+    def _is_syntax_term(self, iri: str) -> bool:
+        if not iri.startswith(self.RDF_NS):
+            return False
+        local_name = iri[len(self.RDF_NS):]
+        return local_name in ('RDF', 'Description', 'Bag', 'Seq', 'Alt', 'li') or re.fullmatch(r'_\d+', local_name) is not None
+    
+    def _tag_to_iri(self, tag: str) -> str:
+        if tag.startswith('{'):
+            namespace, local_name = tag[1:].split('}', 1)
+            return namespace + local_name
+        return tag
+
+
+class RDFTurtleExtractionStrategy(RDFExtractionStrategy):
+    
+    def extract_properties(self, content: str) -> List[PropertyInfo]:
+        return self.extract_properties_from_stream(content)
+    
+    def extract_properties_from_stream(self, source: Any, encoding: str = 'utf-8') -> List[PropertyInfo]:
+        try:
+            return self._properties_from_summary(scan_turtle(source, encoding))
         except Exception as e:
             print(f"Error extracting Turtle properties: {e}")
             return []
+
+
+class NTriplesExtractionStrategy(RDFExtractionStrategy):
+    """N-Triples and N-Quads; big inputs are parsed in parallel by line ranges."""
     
-    def _format_property_name(self, name: str) -> str:
-        if not name:
-            return ''
-        return name.replace('_', ' ').replace('-', ' ').strip()
+    def __init__(self, workers: Optional[int] = None, min_parallel_bytes: int = PARALLEL_MIN_BYTES):
+        self.workers = workers
+        self.min_parallel_bytes = min_parallel_bytes
+    
+    def extract_properties(self, content: str) -> List[PropertyInfo]:
+        return self.extract_properties_from_stream(content)
+    
+    def extract_properties_from_stream(self, source: Any, encoding: str = 'utf-8') -> List[PropertyInfo]:
+        try:
+            summary = scan_ntriples(source, encoding, self.workers, self.min_parallel_bytes)
+            return self._properties_from_summary(summary)
+        except Exception as e:
+            print(f"Error extracting N-Triples properties: {e}")
+            return []
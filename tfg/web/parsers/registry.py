@@ -0,0 +1,257 @@
+import json
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .columnar import ARROW_MAGIC, PARQUET_MAGIC
+from .spreadsheet import ODS_MIMETYPE
+from .property_extraction_strategy import (
+    ArrowExtractionStrategy,
+    CSVExtractionStrategy,
+    GeoJSONExtractionStrategy,
+    JSONExtractionStrategy,
+    NDJSONExtractionStrategy,
+    NTriplesExtractionStrategy,
+    ParquetExtractionStrategy,
+    PropertyExtractionStrategy,
+    RDFTurtleExtractionStrategy,
+    RDFXMLExtractionStrategy,
+    SpreadsheetExtractionStrategy,
+)
+
+
+# Detection only ever looks at this much of the content
+SNIFF_BYTES = 4096
+
+# Sniffer verdicts: a signature that settles the format on its own, or a hint
+# that only applies when the file name and MIME type say nothing
+STRONG = 2
+WEAK = 1
+
+_UTF8_BOM = b'\xef\xbb\xbf'
+_ZIP_MAGIC = 'PK\x03\x04'
+_RDF_NAMESPACE = 'http://www.w3.org/1999/02/22-rdf-syntax-ns#'
+# Turtle's @prefix/@base, or SPARQL-style PREFIX/BASE only when followed by an IRI,
+# so a CSV header such as 'Base imponible;IVA' is not taken for Turtle
+_TURTLE_DIRECTIVE_RE = re.compile(
+    r'@prefix\s|@base\s|(?i:prefix)\s+[^\s:<>]*:\s*<[^>\s]*>|(?i:base)\s*<[^>\s]*>'
+)
+_NTRIPLES_LINE_RE = re.compile(r'(?:<[^>\s]*>|_:\S+)\s+<[^>\s]*>\s+(?:<[^>\s]*>|_:\S+|").*\.\s*$')
+_CSV_DELIMITERS = (',', ';', '\t', '|')
+_GEOJSON_TYPE_RE = re.compile(r'"type"\s*:\s*"(?:FeatureCollection|Feature)"')
+
+
+class FormatSpec:
+    __slots__ = ('name', 'factory', 'extensions', 'mime_keywords', 'magic', 'sniffer', 'binary')
+
+    def __init__(self, name: str, factory: Callable[[], PropertyExtractionStrategy],
+                 extensions: Tuple[str, ...] = (), mime_keywords: Tuple[str, ...] = (),
+                 magic: Tuple[bytes, ...] = (), sniffer: Optional[Callable[[str], int]] = None,
+                 binary: bool = False):
+        self.name = name
+        self.factory = factory
+        self.extensions = extensions
+        self.mime_keywords = mime_keywords
+        self.magic = magic
+        self.sniffer = sniffer
+        # Stored as base64 text; the strategy reads that text directly
+        self.binary = binary
+
+
+# Registration order is the detection order, so NDJSON is tried before JSON
+_formats: List[FormatSpec] = []
+_strategies: Dict[str, PropertyExtractionStrategy] = {}
+
+
+def register_format(name: str, factory: Callable[[], PropertyExtractionStrategy],
+                    extensions: Tuple[str, ...] = (), mime_keywords: Tuple[str, ...] = (),
+                    magic: Tuple[bytes, ...] = (), sniffer: Optional[Callable[[str], int]] = None,
+                    binary: bool = False):
+    _formats.append(FormatSpec(name, factory, extensions, mime_keywords, magic, sniffer, binary))
+    _strategies.pop(name, None)
+
+
+def supported_formats() -> List[str]:
+    return [spec.name for spec in _formats]
+
+
+def is_binary_format(tipo_formato: Optional[str]) -> bool:
+    return any(spec.binary and spec.name == (tipo_formato or '').upper() for spec in _formats)
+
+
+def get_strategy(tipo_formato: Optional[str]) -> Optional[PropertyExtractionStrategy]:
+    """Shared strategy instance for a tipo_formato. Strategies keep no per-call state."""
+    if not tipo_formato:
+        return None
+    tipo_formato = tipo_formato.upper()
+    strategy = _strategies.get(tipo_formato)
+    if strategy is None:
+        spec = next((spec for spec in _formats if spec.name == tipo_formato), None)
+        if spec is None:
+            return None
+        strategy = _strategies[tipo_formato] = spec.factory()
+    return strategy
+
+
+def detect_format(content: Any = None, file_name: str = '', file_type: str = '',
+                  declared: Optional[str] = None) -> Optional[str]:
+    """Pick a tipo_formato from the start of the content, the file name and the MIME type.
+
+    Only the first SNIFF_BYTES of content are inspected. Content signatures
+    (magic bytes, an XML prolog, @prefix...) win over the name, then comes the
+    declared format (e.g. the one stored with the file); weaker hints such as
+    delimiter statistics only decide when nothing else does.
+    """
+    file_name = (file_name or '').lower()
+    file_type = (file_type or '').lower()
+    strong, weak = _sniff(content) if content else (None, None)
+    if strong:
+        return strong
+    # Extensions are unambiguous; MIME keywords are substrings ('xml' is in many types)
+    for spec in _formats:
+        if file_name and file_name.endswith(spec.extensions):
+            return spec.name
+    for spec in _formats:
+        if any(keyword in file_type for keyword in spec.mime_keywords):
+            return spec.name
+    if declared and declared.upper() in supported_formats():
+        return declared.upper()
+    return weak
+
+
+def strategy_for(content: Any = None, file_name: str = '', file_type: str = '',
+                 default: Optional[str] = None) -> Optional[PropertyExtractionStrategy]:
+    return get_strategy(detect_format(content, file_name, file_type) or default)
+
+
+def _sniff(content: Any) -> Tuple[Optional[str], Optional[str]]:
+    head = content[:SNIFF_BYTES]
+    if isinstance(head, (bytes, bytearray, memoryview)):
+        head = bytes(head)
+        for spec in _formats:
+            if spec.magic and head.startswith(spec.magic):
+                return spec.name, None
+        if head.startswith(_UTF8_BOM):
+            head = head[len(_UTF8_BOM):]
+        head = head.decode('utf-8', errors='replace')
+    elif isinstance(head, str):
+        head = head.lstrip('\ufeff')
+    else:
+        return None, None
+
+    weak = None
+    for spec in _formats:
+        if spec.sniffer is None:
+            continue
+        verdict = spec.sniffer(head)
+        if verdict == STRONG:
+            return spec.name, None
+        if verdict == WEAK and weak is None:
+            weak = spec.name
+    return None, weak
+
+
+def _complete_lines(head: str, limit: int = 20) -> List[str]:
+    # The last line of the prefix may be cut short, so it is left out unless it is the only one
+    lines = head.splitlines()
+    if len(lines) > 1 and len(head) >= SNIFF_BYTES:
+        lines = lines[:-1]
+    return [line for line in lines if line.strip()][:limit]
+
+
+def _first_statements(head: str) -> List[str]:
+    return [line for line in _complete_lines(head) if not line.lstrip().startswith('#')]
+
+
+def _sniff_xlsx(head: str) -> int:
+    # Zip member names are stored in clear, and workbook parts live under xl/
+    return STRONG if head.startswith(_ZIP_MAGIC) and 'xl/' in head else 0
+
+
+def _sniff_ods(head: str) -> int:
+    # ODF packages start with an uncompressed 'mimetype' member holding the media type
+    return STRONG if head.startswith(_ZIP_MAGIC) and 'mimetype' + ODS_MIMETYPE in head else 0
+
+
+def _sniff_rdf_xml(head: str) -> int:
+    text = head.lstrip()
+    if not text.startswith('<'):
+        return 0
+    if _RDF_NAMESPACE in text or '<rdf:RDF' in text:
+        return STRONG
+    # Plain XML: RDF/XML is the only XML reader there is
+    return STRONG if text.startswith('<?xml') else WEAK
+
+
+def _sniff_turtle(head: str) -> int:
+    statements = _first_statements(head)
+    if statements and _TURTLE_DIRECTIVE_RE.match(statements[0].lstrip()):
+        return STRONG
+    return 0
+
+
+def _sniff_ntriples(head: str) -> int:
+    statements = _first_statements(head)
+    if statements and all(_NTRIPLES_LINE_RE.match(line.strip()) for line in statements):
+        return STRONG
+    return 0
+
+
+def _sniff_ndjson(head: str) -> int:
+    lines = _complete_lines(head, limit=5)
+    if len(lines) < 2 or not lines[0].lstrip().startswith(('{', '[')):
+        return 0
+    for line in lines:
+        try:
+            json.loads(line)
+        except ValueError:
+            return 0
+    return STRONG
+
+
+def _sniff_geojson(head: str) -> int:
+    # GeoJSON is plain JSON; the top-level type (usually the first member) gives it away
+    text = head.lstrip()
+    if text.startswith('{') and _GEOJSON_TYPE_RE.search(text):
+        return STRONG
+    return 0
+
+
+def _sniff_json(head: str) -> int:
+    # NDJSON is registered first and has already claimed one-document-per-line content
+    return STRONG if head.lstrip().startswith(('{', '[')) else 0
+
+
+def _sniff_csv(head: str) -> int:
+    lines = _complete_lines(head)
+    if len(lines) < 2:
+        return 0
+    for delimiter in _CSV_DELIMITERS:
+        counts = {line.count(delimiter) for line in lines}
+        if len(counts) == 1 and counts.pop() > 0:
+            return WEAK
+    return 0
+
+
+register_format('PARQUET', ParquetExtractionStrategy,
+                extensions=('.parquet',), mime_keywords=('parquet',), magic=(PARQUET_MAGIC,), binary=True)
+register_format('ARROW', ArrowExtractionStrategy,
+                extensions=('.arrow', '.feather', '.arrows'), mime_keywords=('apache.arrow',),
+                magic=(ARROW_MAGIC,), binary=True)
+register_format('XLSX', SpreadsheetExtractionStrategy,
+                extensions=('.xlsx', '.xlsm'), mime_keywords=('spreadsheetml',), sniffer=_sniff_xlsx, binary=True)
+register_format('ODS', SpreadsheetExtractionStrategy,
+                extensions=('.ods',), mime_keywords=('opendocument.spreadsheet',), sniffer=_sniff_ods, binary=True)
+register_format('RDF-TURTLE', RDFTurtleExtractionStrategy,
+                extensions=('.ttl', '.turtle'), mime_keywords=('turtle',), sniffer=_sniff_turtle)
+register_format('RDF-NTRIPLES', NTriplesExtractionStrategy,
+                extensions=('.nt', '.nq'), mime_keywords=('n-triples', 'n-quads'), sniffer=_sniff_ntriples)
+register_format('NDJSON', NDJSONExtractionStrategy,
+                extensions=('.ndjson', '.jsonl'), mime_keywords=('ndjson', 'jsonl', 'json-seq'), sniffer=_sniff_ndjson)
+register_format('GEOJSON', GeoJSONExtractionStrategy,
+                extensions=('.geojson',), mime_keywords=('geo+json',), sniffer=_sniff_geojson)
+register_format('JSON', JSONExtractionStrategy,
+                extensions=('.json',), mime_keywords=('json',), sniffer=_sniff_json)
+register_format('RDF-XML', RDFXMLExtractionStrategy,
+                extensions=('.rdf', '.xml'), mime_keywords=('xml', 'rdf'), sniffer=_sniff_rdf_xml)
+register_format('CSV', CSVExtractionStrategy,
+                extensions=('.csv',), mime_keywords=('csv',), sniffer=_sniff_csv)
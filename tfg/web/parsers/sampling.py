@@ -0,0 +1,114 @@
+import math
+import random
+from typing import Any, List, Optional, Tuple
+
+
+class RowSampler:
+    """Keeps the first `head_size` rows plus a uniform reservoir sample of the rest.
+
+    The reservoir uses Algorithm L, so after it fills up only the rows that are
+    actually kept cost a random draw. Memory is bounded by head_size + reservoir_size.
+    """
+
+    def __init__(self, head_size: int = 100, reservoir_size: int = 1000, seed: Optional[int] = None):
+        self.head_size = max(0, head_size)
+        self.reservoir_size = max(0, reservoir_size)
+        self.seen = 0
+        self._head: List[Any] = []
+        self._reservoir: List[Any] = []
+        self._random = random.Random(seed)
+        self._weight = 0.0
+        self._next_index = 0
+
+    @property
+    def rows(self) -> List[Any]:
+        return self._head + self._reservoir
+
+    @property
+    def wants_more(self) -> bool:
+        # Without a reservoir there is no point reading past the head
+        return self.reservoir_size > 0 or len(self._head) < self.head_size
+
+    def add(self, row: Any):
+        self.seen += 1
+        if len(self._head) < self.head_size:
+            self._head.append(row)
+            return
+
+        if not self.reservoir_size:
+            return
+
+        filled = len(self._reservoir)
+        if filled < self.reservoir_size:
+            self._reservoir.append(row)
+            if filled + 1 == self.reservoir_size:
+                self._weight = self._draw_weight()
+                self._next_index = self.seen + self._draw_skip()
+            return
+
+        if self.seen == self._next_index:
+            self._reservoir[self._random.randrange(self.reservoir_size)] = row
+            self._weight *= self._draw_weight()
+            self._next_index += self._draw_skip()
+
+    def merge(self, other: 'RowSampler') -> 'RowSampler':
+        """Fold in a sampler with the same sizes that read the rows following this one's.
+
+        The head takes other's first rows while it has room. The reservoir is
+        redrawn from both reservoirs plus other's leftover head rows, each group
+        weighted by the number of rows it stands for, so the result is
+        distributed as if a single sampler had read every row.
+        """
+        room = self.head_size - len(self._head)
+        groups = [
+            (list(self._reservoir), self.seen - len(self._head)),
+            (other._head[room:], len(other._head[room:])),
+            (list(other._reservoir), other.seen - len(other._head)),
+        ]
+        self._head.extend(other._head[:room])
+        self.seen += other.seen
+        if self.reservoir_size:
+            self._reservoir = self._draw(groups)
+            if len(self._reservoir) == self.reservoir_size:
+                # Algorithm L's threshold after `seen` rows is the k-th smallest of `seen` uniform keys
+                tail = self.seen - len(self._head)
+                self._weight = self._random.betavariate(self.reservoir_size, tail - self.reservoir_size + 1)
+                self._next_index = self.seen + self._draw_skip()
+        return self
+
+    def _draw(self, groups: List[Tuple[List[Any], int]]) -> List[Any]:
+        # Each group's rows are a uniform sample of `size` rows; draw without replacement across groups
+        pools = []
+        remaining = []
+        for rows, size in groups:
+            if size > 0 and rows:
+                self._random.shuffle(rows)
+                pools.append(rows)
+                remaining.append(size)
+        drawn = []
+        total = sum(remaining)
+        while len(drawn) < self.reservoir_size and total > 0:
+            pick = self._random.randrange(total)
+            index = 0
+            while pick >= remaining[index]:
+                pick -= remaining[index]
+                index += 1
+            drawn.append(pools[index].pop())
+            remaining[index] -= 1
+            total -= 1
+        return drawn
+
+    def _draw_weight(self) -> float:
+        return math.exp(math.log(self._uniform()) / self.reservoir_size)
+
+    def _draw_skip(self) -> int:
+        if self._weight >= 1.0:
+            return 1
+        return int(math.floor(math.log(self._uniform()) / math.log(1.0 - self._weight))) + 1
+
+    def _uniform(self) -> float:
+        # random() may return 0.0, which log() does not accept
+        value = self._random.random()
+        while value == 0.0:
+            value = self._random.random()
+        return value
@@ -0,0 +1,204 @@
+import random
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .fingerprint import normalize_column_name
+from .gazetteer import Gazetteer
+from .type_classifier import TYPE_COORDINATES, TYPE_NUMERIC, TYPE_TEXT
+
+
+# Column names (normalized) for a lone latitude or longitude, and for place names
+_LATITUDE_NAME_RE = re.compile(r'(?:^|_)(?:lat|latitud|latitude)(?:_|$)')
+_LONGITUDE_NAME_RE = re.compile(r'(?:^|_)(?:lon|lng|long|longitud|longitude)(?:_|$)')
+_PLACE_NAME_RE = re.compile(
+    r'(?:^|_)(?:municipio|municipality|localidad|poblacion|ciudad|city|town|provincia|province|'
+    r'comunidad|ccaa|region|pais|country|isla|comarca)(?:_|$)'
+)
+
+_PAIR_RE = re.compile(r'\s*(-?\d+(?:\.\d+)?)\s*[,;]\s*(-?\d+(?:\.\d+)?)\s*$')
+_WKT_RE = re.compile(
+    r'\s*(?:SRID=\d+;)?\s*(?:MULTI)?(?:POINT|LINESTRING|POLYGON)\s*(ZM|Z|M)?\s*\(|\s*GEOMETRYCOLLECTION\b',
+    re.IGNORECASE
+)
+_NUMBER_RE = re.compile(r'-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?')
+
+# Positions kept per axis to trim outliers (a stray 0,0) off the box used for place lookups
+SAMPLE_SIZE = 4096
+TRIM_SHARE = 0.01
+TRIM_MIN_SAMPLE = 100
+# A text column counts as place names when at least this share of its values are in the gazetteer
+MIN_NAME_SHARE = 0.5
+# Longer values are sentences, not place names
+MAX_NAME_LENGTH = 80
+_NAME_CACHE_MAX_ENTRIES = 10000
+
+
+def spatial_column_role(name: str, data_type: str) -> Optional[str]:
+    """How a column helps locate the data: 'geometry', 'lat', 'lon', 'place' or None."""
+    if data_type == TYPE_COORDINATES:
+        return 'geometry'
+    normalized = normalize_column_name(name)
+    if data_type == TYPE_NUMERIC:
+        if _LATITUDE_NAME_RE.search(normalized):
+            return 'lat'
+        if _LONGITUDE_NAME_RE.search(normalized):
+            return 'lon'
+    if data_type == TYPE_TEXT and _PLACE_NAME_RE.search(normalized):
+        return 'place'
+    return None
+
+
+def parse_positions(text: str) -> Optional[List[Tuple[float, float]]]:
+    """(lon, lat) positions of a 'lat, lon' pair or a WKT geometry; None when text is neither.
+
+    Positions outside WGS84 degrees (projected coordinates) are dropped.
+    """
+    pair = _PAIR_RE.match(text)
+    if pair:
+        first, second = float(pair.group(1)), float(pair.group(2))
+        # Pairs are written latitude first, unless the first value cannot be one
+        lat, lon = (first, second) if abs(first) <= 90 else (second, first)
+        return [(lon, lat)] if _is_wgs84(lon, lat) else []
+    wkt = _WKT_RE.match(text)
+    if wkt:
+        dimensions = 2 + len(wkt.group(1) or '')
+        numbers = [float(number) for number in _NUMBER_RE.findall(text, wkt.end())]
+        positions = [(numbers[i], numbers[i + 1]) for i in range(0, len(numbers) - dimensions + 1, dimensions)]
+        return [(lon, lat) for lon, lat in positions if _is_wgs84(lon, lat)]
+    return None
+
+
+class SpatialScanner:
+    """Bounding box of the positions, and the places named, in a set of columns read in one pass.
+
+    Values can be 'lat, lon' pairs, WKT geometries, or plain numbers in
+    columns named as latitudes or longitudes; other text is looked up in the
+    gazetteer as a place name.
+    """
+
+    def __init__(self, columns: Iterable[str], gazetteer: Gazetteer, seed: Optional[int] = None):
+        self.gazetteer = gazetteer
+        self.position_count = 0
+        # [min, max] per axis
+        self.lon_range: Optional[List[float]] = None
+        self.lat_range: Optional[List[float]] = None
+        self._axes = {}
+        for name in columns:
+            normalized = normalize_column_name(name)
+            if _LATITUDE_NAME_RE.search(normalized):
+                self._axes[name] = 'lat'
+            elif _LONGITUDE_NAME_RE.search(normalized):
+                self._axes[name] = 'lon'
+        self._samples = {'lon': [], 'lat': []}
+        self._seen = {'lon': 0, 'lat': 0}
+        self._random = random.Random(seed)
+        self._text_counts: Dict[str, int] = {}
+        self._place_counts: Dict[str, Dict[str, int]] = {}
+        self._names: Dict[str, Optional[str]] = {}
+
+    def add(self, name: str, value: Any):
+        if value is None or isinstance(value, bool):
+            return
+        axis = self._axes.get(name)
+        if axis is not None:
+            number = _to_float(value)
+            if number is not None and abs(number) <= (90 if axis == 'lat' else 180):
+                self._add_coordinate(axis, number)
+            return
+        if isinstance(value, (int, float, list, dict)):
+            return
+        text = str(value).strip()
+        if not text:
+            return
+        positions = parse_positions(text)
+        if positions is not None:
+            for lon, lat in positions:
+                self.position_count += 1
+                self._add_coordinate('lon', lon)
+                self._add_coordinate('lat', lat)
+            return
+        self._text_counts[name] = self._text_counts.get(name, 0) + 1
+        place_id = self._match_name(text)
+        if place_id is not None:
+            counts = self._place_counts.setdefault(name, {})
+            counts[place_id] = counts.get(place_id, 0) + 1
+
+    def bbox(self, trimmed: bool = False) -> Optional[List[float]]:
+        """[west, south, east, north]; trimmed drops the outermost TRIM_SHARE of each axis."""
+        if self.lon_range is None or self.lat_range is None:
+            return None
+        if not trimmed:
+            return [self.lon_range[0], self.lat_range[0], self.lon_range[1], self.lat_range[1]]
+        west, east = self._trimmed_range('lon')
+        south, north = self._trimmed_range('lat')
+        return [west, south, east, north]
+
+    def named_places(self) -> Dict[str, int]:
+        """Gazetteer place id -> count, over the columns that mostly hold place names."""
+        counts: Dict[str, int] = {}
+        for name, place_counts in self._place_counts.items():
+            if sum(place_counts.values()) < self._text_counts[name] * MIN_NAME_SHARE:
+                continue
+            for place_id, count in place_counts.items():
+                counts[place_id] = counts.get(place_id, 0) + count
+        return counts
+
+    def _add_coordinate(self, axis: str, value: float):
+        bounds = self.lon_range if axis == 'lon' else self.lat_range
+        if bounds is None:
+            bounds = [value, value]
+            if axis == 'lon':
+                self.lon_range = bounds
+            else:
+                self.lat_range = bounds
+        elif value < bounds[0]:
+            bounds[0] = value
+        elif value > bounds[1]:
+            bounds[1] = value
+        # Reservoir sample (algorithm R) of the axis, for the trimmed box
+        self._seen[axis] += 1
+        sample = self._samples[axis]
+        if len(sample) < SAMPLE_SIZE:
+            sample.append(value)
+        else:
+            slot = self._random.randrange(self._seen[axis])
+            if slot < SAMPLE_SIZE:
+                sample[slot] = value
+
+    def _trimmed_range(self, axis: str) -> Tuple[float, float]:
+        bounds = self.lon_range if axis == 'lon' else self.lat_range
+        sample = sorted(self._samples[axis])
+        if len(sample) < TRIM_MIN_SAMPLE:
+            return bounds[0], bounds[1]
+        cut = int(len(sample) * TRIM_SHARE)
+        return sample[cut], sample[-cut - 1]
+
+    def _match_name(self, text: str) -> Optional[str]:
+        if len(text) > MAX_NAME_LENGTH:
+            return None
+        if text in self._names:
+            return self._names[text]
+        place = self.gazetteer.match_name(text)
+        place_id = place.id if place is not None else None
+        if len(self._names) < _NAME_CACHE_MAX_ENTRIES:
+            self._names[text] = place_id
+        return place_id
+
+
+def is_wgs84_bbox(bbox: Optional[List[float]]) -> bool:
+    """Whether a [west, south, east, north] box is in longitude/latitude degrees."""
+    return (bbox is not None and len(bbox) == 4 and _is_wgs84(bbox[0], bbox[1]) and _is_wgs84(bbox[2], bbox[3])
+            and bbox[0] <= bbox[2] and bbox[1] <= bbox[3])
+
+
+def _is_wgs84(lon: float, lat: float) -> bool:
+    return -180 <= lon <= 180 and -90 <= lat <= 90
+
+
+def _to_float(value: Any) -> Optional[float]:
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).strip().replace(',', '.'))
+    except ValueError:
+        return None
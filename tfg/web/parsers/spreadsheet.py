@@ -0,0 +1,377 @@
+import io
+import posixpath
+import re
+import zipfile
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+from xml.etree import ElementTree as ET
+
+from .sampling import RowSampler
+
+
+ODS_MIMETYPE = 'application/vnd.oasis.opendocument.spreadsheet'
+
+_OFFICE_DOCUMENT_REL = '/officeDocument'
+_SHARED_STRINGS_REL = '/sharedStrings'
+_STYLES_REL = '/styles'
+_RELS_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+_STRICT_RELS_NS = 'http://purl.oclc.org/ooxml/officeDocument/relationships'
+
+# Built-in number formats that display a date (ECMA-376 18.8.30, plus the CJK ones)
+_BUILTIN_DATE_FORMATS = set(range(14, 23)) | set(range(27, 37)) | {45, 46, 47} | set(range(50, 59))
+# Quoted text, escaped characters and [Red]/[h]/[$-409] sections of a format code
+_FORMAT_NOISE_RE = re.compile(r'"[^"]*"|\\.|\[[^\]]*\]')
+_CELL_COLUMN_RE = re.compile(r'[A-Z]+')
+
+_EXCEL_EPOCH = datetime(1899, 12, 30)
+_EXCEL_1904_EPOCH = datetime(1904, 1, 1)
+
+# A row or cell repeated more than this is layout (empty filler), not data
+_MAX_REPEAT = 1000
+
+
+class SheetSample:
+    """Header and a bounded sample of the data rows of one sheet."""
+    __slots__ = ('name', 'headers', 'rows', 'row_count')
+
+    def __init__(self, name: str):
+        self.name = name
+        # (column index, header) pairs of the first non-empty row
+        self.headers: List[Tuple[int, str]] = []
+        # Sampled data rows as {column index: value}
+        self.rows: List[Dict[int, Any]] = []
+        # Data rows read before sampling stopped
+        self.row_count = 0
+
+
+class _SharedString:
+    # Placeholder for a sharedStrings.xml entry, resolved once the sample is known
+    __slots__ = ('index',)
+
+    def __init__(self, index: int):
+        self.index = index
+
+
+def read_workbook_samples(source: Any, head_rows: int = 100, reservoir_rows: int = 0,
+                          seed: Optional[int] = None) -> List[SheetSample]:
+    """Sample every sheet of an XLSX or ODS workbook in workbook order.
+
+    Sheets are parsed as XML streams and left as soon as the sampler wants
+    no more rows, so memory does not grow with the number of rows. Only the
+    zip container itself (compressed) is held in memory when the source is
+    not a seekable file.
+    """
+    with zipfile.ZipFile(_seekable(source)) as archive:
+        names = set(archive.namelist())
+        if 'content.xml' in names and _read_mimetype(archive, names).startswith(ODS_MIMETYPE):
+            return _read_ods(archive, head_rows, reservoir_rows, seed)
+        return _read_xlsx(archive, head_rows, reservoir_rows, seed)
+
+
+def _seekable(source: Any) -> Any:
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source)
+    if hasattr(source, 'seek') and (not hasattr(source, 'seekable') or source.seekable()):
+        source.seek(0)
+        return source
+    # Plain streams have to be read to the end to reach the zip directory
+    return io.BytesIO(source.read() if hasattr(source, 'read') else b''.join(source))
+
+
+def _read_mimetype(archive: zipfile.ZipFile, names: Set[str]) -> str:
+    if 'mimetype' not in names:
+        return ''
+    return archive.read('mimetype')[:256].decode('ascii', errors='replace').strip()
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit('}', 1)[-1]
+
+
+def _iter_elements(stream: Any, watched: Set[str], starts: Set[str] = frozenset()) -> Iterator[Tuple[str, str, Any]]:
+    """Yield (event, local name, element) when a watched element ends, or a `starts` one begins.
+
+    Watched elements are dropped from their parent once handled, so a sheet
+    with millions of rows keeps a flat memory profile.
+    """
+    stack = []
+    for event, element in ET.iterparse(stream, events=('start', 'end')):
+        if event == 'start':
+            stack.append(element)
+            if starts:
+                name = _local_name(element.tag)
+                if name in starts:
+                    yield event, name, element
+            continue
+        stack.pop()
+        name = _local_name(element.tag)
+        if name in watched:
+            yield event, name, element
+            if stack:
+                stack[-1].remove(element)
+
+
+def _add_row(sheet: SheetSample, sampler: RowSampler, row: Dict[int, Any]) -> bool:
+    """Feed one non-empty row; returns False once the sheet needs no more rows."""
+    if not sheet.headers:
+        sheet.headers = [(column, value) for column, value in sorted(row.items())]
+        return sampler.wants_more
+    sampler.add(row)
+    return sampler.wants_more
+
+
+# --- XLSX ------------------------------------------------------------------
+
+def _read_xlsx(archive: zipfile.ZipFile, head_rows: int, reservoir_rows: int,
+               seed: Optional[int]) -> List[SheetSample]:
+    workbook_path = _office_document_path(archive)
+    relationships = _read_relationships(archive, workbook_path)
+    sheets, uses_1904 = _read_workbook(archive, workbook_path, relationships)
+    date_styles = _read_date_styles(archive, _relationship_target(relationships, _STYLES_REL))
+    epoch = _EXCEL_1904_EPOCH if uses_1904 else _EXCEL_EPOCH
+
+    samples = []
+    for name, path in sheets:
+        if path not in archive.NameToInfo:
+            continue
+        sheet = SheetSample(name)
+        sampler = RowSampler(head_rows, reservoir_rows, seed)
+        with archive.open(path) as stream:
+            for _, _, row_element in _iter_elements(stream, {'row'}):
+                row = _xlsx_row(row_element, date_styles, epoch)
+                if row and not _add_row(sheet, sampler, row):
+                    break
+        sheet.rows = sampler.rows
+        sheet.row_count = sampler.seen
+        samples.append(sheet)
+
+    _resolve_shared_strings(archive, _relationship_target(relationships, _SHARED_STRINGS_REL), samples)
+    return samples
+
+
+def _office_document_path(archive: zipfile.ZipFile) -> str:
+    if '_rels/.rels' in archive.NameToInfo:
+        for rel_type, target in _read_relationships(archive, '').values():
+            if rel_type.endswith(_OFFICE_DOCUMENT_REL):
+                return target
+    return 'xl/workbook.xml'
+
+
+def _read_relationships(archive: zipfile.ZipFile, part_path: str) -> Dict[str, Tuple[str, str]]:
+    """Relationship id -> (type, target path inside the archive) of a part."""
+    folder, part_name = posixpath.split(part_path)
+    rels_path = posixpath.join(folder, '_rels', part_name + '.rels')
+    if rels_path not in archive.NameToInfo:
+        return {}
+    relationships = {}
+    for element in ET.fromstring(archive.read(rels_path)):
+        target = element.get('Target', '')
+        if element.get('TargetMode') == 'External':
+            continue
+        if target.startswith('/'):
+            path = target.lstrip('/')
+        else:
+            path = posixpath.normpath(posixpath.join(folder, target))
+        relationships[element.get('Id')] = (element.get('Type', ''), path)
+    return relationships
+
+
+def _relationship_target(relationships: Dict[str, Tuple[str, str]], rel_suffix: str) -> Optional[str]:
+    for rel_type, path in relationships.values():
+        if rel_type.endswith(rel_suffix):
+            return path
+    return None
+
+
+def _read_workbook(archive: zipfile.ZipFile, workbook_path: str,
+                   relationships: Dict[str, Tuple[str, str]]) -> Tuple[List[Tuple[str, str]], bool]:
+    """(sheet name, sheet path) in workbook order, and whether dates count from 1904."""
+    sheets = []
+    uses_1904 = False
+    root = ET.fromstring(archive.read(workbook_path))
+    for element in root.iter():
+        name = _local_name(element.tag)
+        if name == 'workbookPr':
+            uses_1904 = element.get('date1904') in ('1', 'true')
+        elif name == 'sheet':
+            rel_id = element.get(f'{{{_RELS_NS}}}id') or element.get(f'{{{_STRICT_RELS_NS}}}id')
+            if rel_id in relationships:
+                sheets.append((element.get('name', ''), relationships[rel_id][1]))
+    return sheets, uses_1904
+
+
+def _read_date_styles(archive: zipfile.ZipFile, styles_path: Optional[str]) -> Set[int]:
+    """Indexes of the cell styles (cellXfs) whose number format shows a date."""
+    if not styles_path or styles_path not in archive.NameToInfo:
+        return set()
+    root = ET.fromstring(archive.read(styles_path))
+    custom_formats = {}
+    date_styles = set()
+    for element in root:
+        name = _local_name(element.tag)
+        if name == 'numFmts':
+            for number_format in element:
+                code = _FORMAT_NOISE_RE.sub('', number_format.get('formatCode', '')).lower()
+                custom_formats[int(number_format.get('numFmtId', -1))] = any(c in code for c in 'dmy')
+        elif name == 'cellXfs':
+            for index, style in enumerate(element):
+                format_id = int(style.get('numFmtId', 0))
+                if custom_formats.get(format_id, format_id in _BUILTIN_DATE_FORMATS):
+                    date_styles.add(index)
+    return date_styles
+
+
+def _xlsx_row(row_element: Any, date_styles: Set[int], epoch: datetime) -> Dict[int, Any]:
+    row = {}
+    next_column = 0
+    for cell in row_element:
+        if _local_name(cell.tag) != 'c':
+            continue
+        reference = cell.get('r')
+        column = _column_index(reference) if reference else next_column
+        next_column = column + 1
+        value = _xlsx_cell_value(cell, date_styles, epoch)
+        if value is not None and value != '':
+            row[column] = value
+    return row
+
+
+def _column_index(reference: str) -> int:
+    match = _CELL_COLUMN_RE.match(reference)
+    index = 0
+    for letter in match.group() if match else '':
+        index = index * 26 + ord(letter) - 64
+    return index - 1
+
+
+def _xlsx_cell_value(cell: Any, date_styles: Set[int], epoch: datetime) -> Any:
+    cell_type = cell.get('t', 'n')
+    if cell_type == 'inlineStr':
+        return ''.join(_text_runs(next((child for child in cell if _local_name(child.tag) == 'is'), ())))
+
+    raw = next((child.text for child in cell if _local_name(child.tag) == 'v'), None)
+    if raw is None or cell_type == 'e':
+        return None
+    if cell_type == 's':
+        return _SharedString(int(raw))
+    if cell_type == 'b':
+        return raw.strip() == '1'
+    if cell_type == 'n' and int(cell.get('s', 0)) in date_styles:
+        return _serial_to_iso(raw, epoch)
+    # 'str' (formula results), 'd' (ISO dates) and plain numbers are kept as text
+    return raw
+
+
+def _serial_to_iso(raw: str, epoch: datetime) -> str:
+    try:
+        moment = epoch + timedelta(days=float(raw))
+    except (ValueError, OverflowError):
+        return raw
+    if moment.hour or moment.minute or moment.second:
+        return moment.isoformat(timespec='seconds')
+    return moment.date().isoformat()
+
+
+def _text_runs(element: Any) -> Iterator[str]:
+    # <t> directly or inside rich text runs <r>; phonetic hints (<rPh>) are left out
+    for child in element:
+        name = _local_name(child.tag)
+        if name == 't':
+            yield child.text or ''
+        elif name == 'r':
+            yield from _text_runs(child)
+
+
+def _resolve_shared_strings(archive: zipfile.ZipFile, strings_path: Optional[str], samples: List[SheetSample]):
+    """Replace shared string placeholders, reading sharedStrings.xml only up to the last index used."""
+    wanted = {
+        value.index
+        for sheet in samples
+        for row in [dict(sheet.headers)] + sheet.rows
+        for value in row.values()
+        if isinstance(value, _SharedString)
+    }
+    strings = {}
+    if wanted and strings_path and strings_path in archive.NameToInfo:
+        last = max(wanted)
+        index = 0
+        with archive.open(strings_path) as stream:
+            for _, _, element in _iter_elements(stream, {'si'}):
+                if index in wanted:
+                    strings[index] = ''.join(_text_runs(element))
+                if index >= last:
+                    break
+                index += 1
+
+    def resolve(value: Any) -> Any:
+        return strings.get(value.index, '') if isinstance(value, _SharedString) else value
+
+    for sheet in samples:
+        sheet.headers = [(column, resolve(value)) for column, value in sheet.headers]
+        sheet.rows = [{column: resolve(value) for column, value in row.items()} for row in sheet.rows]
+
+
+# --- ODS -------------------------------------------------------------------
+
+def _read_ods(archive: zipfile.ZipFile, head_rows: int, reservoir_rows: int,
+              seed: Optional[int]) -> List[SheetSample]:
+    # All sheets share content.xml, so a finished sheet is skipped over rather than left
+    samples = []
+    sheet = sampler = None
+    collecting = False
+    with archive.open('content.xml') as stream:
+        for event, name, element in _iter_elements(stream, {'table', 'table-row'}, starts={'table'}):
+            if name == 'table':
+                if event == 'start':
+                    sheet = SheetSample(_ods_attribute(element, 'name'))
+                    sampler = RowSampler(head_rows, reservoir_rows, seed)
+                    collecting = True
+                elif sheet is not None:
+                    sheet.rows = sampler.rows
+                    sheet.row_count = sampler.seen
+                    samples.append(sheet)
+                    sheet = None
+            elif collecting and sheet is not None:
+                row = _ods_row(element)
+                if row:
+                    repeat = min(int(_ods_attribute(element, 'number-rows-repeated') or 1), _MAX_REPEAT)
+                    for _ in range(repeat):
+                        collecting = _add_row(sheet, sampler, row)
+                        if not collecting:
+                            break
+    return samples
+
+
+def _ods_attribute(element: Any, name: str) -> Optional[str]:
+    for key, value in element.attrib.items():
+        if _local_name(key) == name:
+            return value
+    return None
+
+
+def _ods_row(row_element: Any) -> Dict[int, Any]:
+    row = {}
+    column = 0
+    for cell in row_element:
+        if _local_name(cell.tag) not in ('table-cell', 'covered-table-cell'):
+            continue
+        repeat = int(_ods_attribute(cell, 'number-columns-repeated') or 1)
+        value = _ods_cell_value(cell)
+        if value is not None and value != '':
+            for offset in range(min(repeat, _MAX_REPEAT)):
+                row[column + offset] = value
+        column += repeat
+    return row
+
+
+def _ods_cell_value(cell: Any) -> Any:
+    attributes = {_local_name(key): value for key, value in cell.attrib.items()}
+    value_type = attributes.get('value-type')
+    if value_type in ('float', 'percentage', 'currency'):
+        return attributes.get('value')
+    if value_type == 'date':
+        return attributes.get('date-value')
+    if value_type == 'boolean':
+        return attributes.get('boolean-value') == 'true'
+    paragraphs = [''.join(child.itertext()) for child in cell if _local_name(child.tag) == 'p']
+    return '\n'.join(paragraphs).strip()
@@ -0,0 +1,105 @@
+from typing import Any, Iterator, Optional
+
+from .encoding import TextDecoder, detect_encoding
+
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def iter_text_chunks(source: Any, encoding: Optional[str] = 'utf-8', chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[str]:
+    """Yield decoded text chunks from a str, bytes, file-like object or iterable of str/bytes chunks.
+
+    encoding=None detects it on the first chunk. A UTF-8 source that turns
+    out not to be UTF-8 further on is decoded as Windows-1252 from there.
+    """
+    if isinstance(source, str):
+        for start in range(0, len(source), chunk_size):
+            yield source[start:start + chunk_size]
+        return
+
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        view = memoryview(source)
+        chunks = (view[start:start + chunk_size] for start in range(0, len(view), chunk_size))
+    elif hasattr(source, 'read'):
+        chunks = _iter_file_chunks(source, chunk_size)
+    else:
+        chunks = source
+
+    decoder = None
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            if chunk:
+                yield chunk
+            continue
+
+        if decoder is None:
+            decoder = TextDecoder(encoding or detect_encoding(chunk) or 'utf-8')
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+
+    if decoder is not None:
+        tail = decoder.decode(b'', final=True)
+        if tail:
+            yield tail
+
+
+def iter_text_lines(source: Any, encoding: Optional[str] = 'utf-8', chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[str]:
+    """Yield lines (keeping their terminators) without materializing the whole input."""
+    pending = []
+    for chunk in iter_text_chunks(source, encoding, chunk_size):
+        start = 0
+        end = chunk.find('\n')
+        while end != -1:
+            if pending:
+                pending.append(chunk[start:end + 1])
+                yield ''.join(pending)
+                pending = []
+            else:
+                yield chunk[start:end + 1]
+            start = end + 1
+            end = chunk.find('\n', start)
+
+        if start < len(chunk):
+            pending.append(chunk[start:])
+
+    if pending:
+        yield ''.join(pending)
+
+
+def iter_raw_chunks(source: Any, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[Any]:
+    """Yield the source's chunks undecoded, for parsers that handle encodings themselves (XML)."""
+    if isinstance(source, (str, bytes, bytearray, memoryview)):
+        for start in range(0, len(source), chunk_size):
+            yield source[start:start + chunk_size]
+    elif hasattr(source, 'read'):
+        yield from _iter_file_chunks(source, chunk_size)
+    else:
+        yield from source
+
+
+def iter_file_range(path: str, start: int, end: int, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield the bytes of path between offsets start and end."""
+    with open(path, 'rb') as file_obj:
+        file_obj.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            chunk = file_obj.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def read_text(source: Any, encoding: Optional[str] = 'utf-8') -> str:
+    if isinstance(source, str):
+        return source
+    return ''.join(iter_text_chunks(source, encoding))
+
+
+def _iter_file_chunks(file_obj: Any, chunk_size: int) -> Iterator[Any]:
+    while True:
+        chunk = file_obj.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
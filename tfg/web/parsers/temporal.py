@@ -0,0 +1,115 @@
+import re
+from datetime import date, datetime
+from typing import Any, Iterable, List, Optional, Pattern, Set, Tuple
+
+
+# Candidate layouts as (name, regex with y/m/d groups). Day-first comes before
+# month-first, so an ambiguous column (every day <= 12) reads as dd/mm/aaaa.
+_DATE_LAYOUTS: List[Tuple[str, Pattern]] = [
+    ('aaaa-mm-dd', re.compile(r'(?P<y>\d{4})-(?P<m>\d{1,2})-(?P<d>\d{1,2})(?![\d])')),
+    ('dd/mm/aaaa', re.compile(r'(?P<d>\d{1,2})/(?P<m>\d{1,2})/(?P<y>\d{4})(?![\d])')),
+    ('mm/dd/aaaa', re.compile(r'(?P<m>\d{1,2})/(?P<d>\d{1,2})/(?P<y>\d{4})(?![\d])')),
+    ('aaaa/mm/dd', re.compile(r'(?P<y>\d{4})/(?P<m>\d{1,2})/(?P<d>\d{1,2})(?![\d])')),
+    ('dd-mm-aaaa', re.compile(r'(?P<d>\d{1,2})-(?P<m>\d{1,2})-(?P<y>\d{4})(?![\d])')),
+    ('dd.mm.aaaa', re.compile(r'(?P<d>\d{1,2})\.(?P<m>\d{1,2})\.(?P<y>\d{4})(?![\d])')),
+]
+
+# Values looked at to pick a column's layout
+DETECTION_SAMPLE = 200
+# Share of the sampled values the chosen layout has to read
+DETECTION_MIN_SHARE = 0.8
+
+
+class DateRangeScanner:
+    """True min/max date of a column read in one pass.
+
+    The layout is detected once, over the first DETECTION_SAMPLE values;
+    after that each value costs one anchored regex match, and only distinct
+    (year, month, day) triples are kept, so calendar validation and the
+    min/max run over a handful of entries instead of every row.
+    """
+
+    def __init__(self):
+        self.layout: Optional[str] = None
+        self._pattern: Optional[Pattern] = None
+        self._sample: List[str] = []
+        self._detected = False
+        self._days: Set[Tuple[str, str, str]] = set()
+        self._native: List[date] = []
+
+    def add(self, value: Any):
+        if isinstance(value, (date, datetime)):
+            self._native.append(value.date() if isinstance(value, datetime) else value)
+            return
+        if not isinstance(value, str):
+            return
+        value = value.strip()
+        if not value:
+            return
+        if self._detected:
+            self._match(value)
+            return
+        self._sample.append(value)
+        if len(self._sample) >= DETECTION_SAMPLE:
+            self._detect()
+
+    def add_all(self, values: Iterable[Any]) -> 'DateRangeScanner':
+        for value in values:
+            self.add(value)
+        return self
+
+    def date_range(self) -> Optional[Tuple[date, date]]:
+        if not self._detected:
+            self._detect()
+        days = [day for day in map(_to_date, self._days) if day is not None] + self._native
+        if not days:
+            return None
+        return min(days), max(days)
+
+    def _detect(self):
+        self._detected = True
+        sample, self._sample = self._sample, []
+        if not sample:
+            return
+        best = max(_DATE_LAYOUTS, key=lambda layout: _valid_share(layout[1], sample))
+        if _valid_share(best[1], sample) < DETECTION_MIN_SHARE:
+            return
+        self.layout, self._pattern = best
+        for value in sample:
+            self._match(value)
+
+    def _match(self, value: str):
+        if self._pattern is None:
+            return
+        match = self._pattern.match(value)
+        if match:
+            self._days.add(match.group('y', 'm', 'd'))
+
+
+def merge_ranges(ranges: Iterable[Optional[Tuple[date, date]]]) -> Optional[Tuple[date, date]]:
+    ranges = [value_range for value_range in ranges if value_range]
+    if not ranges:
+        return None
+    return min(start for start, _ in ranges), max(end for _, end in ranges)
+
+
+def format_temporal_extent(value_range: Tuple[date, date]) -> str:
+    """'dd-mm-aaaa / dd-mm-aaaa', the format of the extension_temporal field."""
+    start, end = value_range
+    return f"{start:%d-%m-%Y} / {end:%d-%m-%Y}"
+
+
+def _valid_share(pattern: Pattern, sample: List[str]) -> float:
+    valid = 0
+    for value in sample:
+        match = pattern.match(value)
+        if match and _to_date(match.group('y', 'm', 'd')) is not None:
+            valid += 1
+    return valid / len(sample)
+
+
+def _to_date(parts: Tuple[str, str, str]) -> Optional[date]:
+    try:
+        return date(int(parts[0]), int(parts[1]), int(parts[2]))
+    except ValueError:
+        return None
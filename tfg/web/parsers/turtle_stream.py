@@ -0,0 +1,377 @@
+import re
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urljoin
+
+from .streaming import iter_text_chunks
+
+
+RDF_TYPE = 'http://www.w3.org/1999/02/22-rdf-syntax-ns#type'
+XSD = 'http://www.w3.org/2001/XMLSchema#'
+RDF_LANG_STRING = 'http://www.w3.org/1999/02/22-rdf-syntax-ns#langString'
+
+_PN_PREFIX = r'(?:[^\W\d_](?:[\w.-]*[\w-])?)?'
+_PN_LOCAL = r'(?:(?:[\w:-]|%[0-9A-Fa-f]{2}|\\[^\s])(?:(?:[\w.:-]|%[0-9A-Fa-f]{2}|\\[^\s])*(?:[\w:-]|%[0-9A-Fa-f]{2}|\\[^\s]))?)?'
+
+# Leading whitespace and comments, then one alternation per token kind tried in order
+_TOKEN_RE = re.compile(
+    r'(?:[ \t\r\n]+|#[^\r\n]*)*'
+    r'(?:(?P<iri><(?:[^<>"{}|^`\\\x00-\x20]|\\u[0-9A-Fa-f]{4}|\\U[0-9A-Fa-f]{8})*>)'
+    r'|(?P<string>"""(?:[^"\\]|\\.|"(?!""))*"""'
+    r"|'''(?:[^'\\]|\\.|'(?!''))*'''"
+    r'|"(?:[^"\\\r\n]|\\.)*"'
+    r"|'(?:[^'\\\r\n]|\\.)*')"
+    r'|(?P<lang>@[A-Za-z]+(?:-[A-Za-z0-9]+)*)'
+    r'|(?P<caret>\^\^)'
+    r'|(?P<number>[+-]?(?:\d+\.\d*[eE][+-]?\d+|\.\d+[eE][+-]?\d+|\d+[eE][+-]?\d+|\d*\.\d+|\d+))'
+    r'|(?P<bnode>_:[\w](?:[\w.-]*[\w-])?)'
+    r'|(?P<pname>' + _PN_PREFIX + r':' + _PN_LOCAL + r')'
+    r'|(?P<word>[A-Za-z]+)'
+    r'|(?P<punct>[.;,\[\]()]))?',
+    re.DOTALL,
+)
+
+_ESCAPE_RE = re.compile(r'\\(?:u([0-9A-Fa-f]{4})|U([0-9A-Fa-f]{8})|(.))', re.DOTALL)
+_ECHARS = {'t': '\t', 'b': '\b', 'n': '\n', 'r': '\r', 'f': '\f', '"': '"', "'": "'", '\\': '\\'}
+_LOCAL_ESCAPE_RE = re.compile(r'\\(.)')
+# Characters a match must leave unread before it is known to be complete
+_LOOKAHEAD = 16
+# Characters that begin a token which may not match until more input arrives
+_PARTIAL_TOKEN_STARTS = frozenset('"\'<@^_+-')
+
+# Parser states
+_SUBJECT = 0
+_PREDICATE = 1
+_OBJECT = 2
+_AFTER_OBJECT = 3
+_AFTER_SUBJECT_NODE = 4
+
+
+class PredicateStats:
+    __slots__ = ('count', 'datatypes', 'literals', 'samples')
+
+    def __init__(self):
+        self.count = 0
+        self.datatypes: Dict[str, int] = {}
+        self.literals: List[str] = []
+        self.samples: List[str] = []
+
+    @property
+    def datatype(self) -> Optional[str]:
+        if not self.datatypes:
+            return None
+        return max(self.datatypes, key=self.datatypes.get)
+
+
+class TurtleSummary:
+    """Predicate statistics gathered in one pass over a Turtle document."""
+
+    def __init__(self, max_literals: int = 50, max_samples: int = 3, max_subjects: int = 100000):
+        self.prefixes: Dict[str, str] = {}
+        self.predicates: Dict[str, PredicateStats] = {}
+        self.triple_count = 0
+        self.subjects_sample: List[str] = []
+        self.errors = 0
+        # Set once a subject went uncounted for max_subjects: subject_count is then a lower bound
+        self.subjects_truncated = False
+        self._subjects = set()
+        self._max_literals = max_literals
+        self._max_samples = max_samples
+        self._max_subjects = max_subjects
+
+    @property
+    def subject_count(self) -> int:
+        return len(self._subjects)
+
+    def add_subject(self, subject: str):
+        if subject in self._subjects:
+            return
+        if len(self._subjects) >= self._max_subjects:
+            self.subjects_truncated = True
+            return
+        self._subjects.add(subject)
+        if len(self.subjects_sample) < 10:
+            self.subjects_sample.append(subject)
+
+    def add_triple(self, predicate: str, kind: str, value: str, datatype: Optional[str] = None):
+        self.triple_count += 1
+        stats = self.predicates.get(predicate)
+        if stats is None:
+            stats = self.predicates[predicate] = PredicateStats()
+        stats.count += 1
+        if datatype:
+            stats.datatypes[datatype] = stats.datatypes.get(datatype, 0) + 1
+        if kind == 'literal' and len(stats.literals) < self._max_literals:
+            stats.literals.append(value)
+        if len(stats.samples) < self._max_samples:
+            stats.samples.append(value)
+
+    def merge(self, other: 'TurtleSummary'):
+        """Fold in a summary of another part of the same document."""
+        self.prefixes.update(other.prefixes)
+        self.triple_count += other.triple_count
+        self.errors += other.errors
+        self.subjects_truncated = self.subjects_truncated or other.subjects_truncated
+        for subject in other.subjects_sample:
+            self.add_subject(subject)
+        for subject in other._subjects:
+            self.add_subject(subject)
+        for predicate, other_stats in other.predicates.items():
+            stats = self.predicates.get(predicate)
+            if stats is None:
+                stats = self.predicates[predicate] = PredicateStats()
+            stats.count += other_stats.count
+            for datatype, count in other_stats.datatypes.items():
+                stats.datatypes[datatype] = stats.datatypes.get(datatype, 0) + count
+            stats.literals.extend(other_stats.literals[:self._max_literals - len(stats.literals)])
+            stats.samples.extend(other_stats.samples[:self._max_samples - len(stats.samples)])
+
+    def expand(self, prefixed_name: str) -> str:
+        prefix, _, local_name = prefixed_name.partition(':')
+        namespace = self.prefixes.get(prefix)
+        return namespace + local_name if namespace is not None else prefixed_name
+
+
+class _Tokenizer:
+
+    def __init__(self, chunks: Iterator[str]):
+        self._chunks = chunks
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+        self._peeked: Optional[Tuple[str, str]] = None
+
+    def _fill(self, min_chars: int) -> bool:
+        """Append at least min_chars of input; False once the input is exhausted."""
+        if self._eof:
+            return False
+        pieces = [self._buf[self._pos:]]
+        added = 0
+        while added < min_chars:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                self._eof = True
+                break
+            pieces.append(chunk)
+            added += len(chunk)
+        self._buf = ''.join(pieces)
+        self._pos = 0
+        return added > 0
+
+    def peek(self) -> Tuple[str, str]:
+        if self._peeked is None:
+            self._peeked = self._next()
+        return self._peeked
+
+    def next(self) -> Tuple[str, str]:
+        token = self.peek()
+        self._peeked = None
+        return token
+
+    def _next(self) -> Tuple[str, str]:
+        # A token close to the end of the buffer may continue in the next chunk
+        # ('1' of '1e3', '""' of '"""'); the read size doubles on each retry so
+        # long literals stay linear
+        want = 1
+        while True:
+            match = _TOKEN_RE.match(self._buf, self._pos)
+            kind = match.lastgroup
+            if kind == 'string' and self._is_partial_long_string(match.start(kind), match.group(kind)):
+                kind = None
+            if kind and (match.end() + _LOOKAHEAD <= len(self._buf) or self._eof):
+                self._pos = match.end()
+                return kind, match.group(kind)
+            if kind:
+                # Skip the whitespace before the token for good, it is complete
+                self._pos = match.start(kind)
+            elif match.end() < len(self._buf) and self._buf[match.end()] not in _PARTIAL_TOKEN_STARTS:
+                # Nothing can start with this character, so more input would not help
+                self._pos = match.end() + 1
+                return 'error', self._buf[self._pos - 1]
+            if not self._fill(max(want, len(self._buf) - self._pos)):
+                if kind:
+                    continue
+                self._pos = match.end()
+                if self._pos >= len(self._buf):
+                    return 'eof', ''
+                # Unrecognised character: report it and move on
+                self._pos += 1
+                return 'error', self._buf[self._pos - 1]
+            want *= 2
+
+    def _is_partial_long_string(self, start: int, text: str) -> bool:
+        # '"""abc' without its closing quotes would otherwise match as the empty string '""'
+        opening = self._buf[start:start + 3]
+        if opening not in ('"""', "'''"):
+            return False
+        return not (len(text) >= 6 and text.startswith(opening)) and not self._eof
+
+
+def scan_turtle(source: Any, encoding: str = 'utf-8', summary: Optional[TurtleSummary] = None) -> TurtleSummary:
+    """Tokenize a Turtle document once, in chunks, collecting per-predicate statistics."""
+    summary = summary or TurtleSummary()
+    tokens = _Tokenizer(iter_text_chunks(source, encoding))
+    base = ''
+    state = _SUBJECT
+    predicate: Optional[str] = None
+    # Saved predicates for open '[' and '(' (kind, predicate)
+    stack: List[Tuple[str, Optional[str]]] = []
+
+    def resolve(kind: str, text: str) -> str:
+        if kind == 'iri':
+            iri = _unescape(text[1:-1])
+            return urljoin(base, iri) if base else iri
+        if kind == 'pname':
+            if '\\' in text:
+                text = _LOCAL_ESCAPE_RE.sub(r'\1', text)
+            return summary.expand(text)
+        return text
+
+    def read_literal(text: str) -> Tuple[str, Optional[str]]:
+        quote = 3 if text[:3] in ('"""', "'''") else 1
+        value = _unescape(text[quote:-quote])
+        kind, next_text = tokens.peek()
+        if kind == 'caret':
+            tokens.next()
+            datatype_kind, datatype_text = tokens.next()
+            return value, resolve(datatype_kind, datatype_text)
+        if kind == 'lang':
+            tokens.next()
+            return value, RDF_LANG_STRING
+        return value, None
+
+    while True:
+        kind, text = tokens.next()
+        if kind == 'eof':
+            break
+        if kind == 'error':
+            summary.errors += 1
+            continue
+
+        if state == _SUBJECT:
+            if kind == 'lang' and text in ('@prefix', '@base') or kind == 'word' and text.upper() in ('PREFIX', 'BASE'):
+                directive = text.lstrip('@').lower()
+                if directive == 'prefix':
+                    prefix_kind, prefix_text = tokens.next()
+                    iri_kind, iri_text = tokens.next()
+                    if prefix_kind == 'pname' and iri_kind == 'iri':
+                        summary.prefixes[prefix_text[:-1]] = resolve('iri', iri_text)
+                else:
+                    iri_kind, iri_text = tokens.next()
+                    if iri_kind == 'iri':
+                        base = resolve('iri', iri_text)
+                if text.startswith('@') and tokens.peek()[0] == 'punct' and tokens.peek()[1] == '.':
+                    tokens.next()
+            elif kind in ('iri', 'pname', 'bnode'):
+                summary.add_subject(resolve(kind, text))
+                state = _PREDICATE
+            elif kind == 'punct' and text == '[':
+                stack.append(('subject', None))
+                state = _PREDICATE
+            elif kind == 'punct' and text == '(':
+                stack.append(('subject-list', None))
+                predicate = None
+                state = _OBJECT
+            else:
+                summary.errors += 1
+
+        elif state == _PREDICATE:
+            if kind == 'word' and text == 'a':
+                predicate = RDF_TYPE
+                state = _OBJECT
+            elif kind in ('iri', 'pname'):
+                predicate = resolve(kind, text)
+                state = _OBJECT
+            elif kind == 'punct' and text == ']' and stack:
+                state, predicate = _close_blank_node(stack)
+            elif kind == 'punct' and text == '.' and not stack:
+                state = _SUBJECT
+            elif kind == 'punct' and text == ';':
+                continue
+            else:
+                summary.errors += 1
+
+        elif state == _OBJECT:
+            if kind == 'punct' and text == ')' and stack and stack[-1][0] in ('list', 'subject-list'):
+                frame_kind, predicate = stack.pop()
+                state = _AFTER_SUBJECT_NODE if frame_kind == 'subject-list' else _AFTER_OBJECT
+                continue
+            in_list = bool(stack) and stack[-1][0] in ('list', 'subject-list')
+            if kind == 'string':
+                value, datatype = read_literal(text)
+                if predicate:
+                    summary.add_triple(predicate, 'literal', value, datatype)
+            elif kind == 'number':
+                if predicate:
+                    summary.add_triple(predicate, 'literal', text, XSD + _number_datatype(text))
+            elif kind == 'word' and text in ('true', 'false'):
+                if predicate:
+                    summary.add_triple(predicate, 'literal', text, XSD + 'boolean')
+            elif kind in ('iri', 'pname', 'bnode'):
+                if predicate:
+                    summary.add_triple(predicate, 'iri', resolve(kind, text))
+            elif kind == 'punct' and text == '[':
+                if predicate:
+                    summary.add_triple(predicate, 'iri', '[]')
+                stack.append(('object', predicate))
+                state = _PREDICATE
+                continue
+            elif kind == 'punct' and text == '(':
+                if predicate and not in_list:
+                    summary.add_triple(predicate, 'iri', '()')
+                stack.append(('list', predicate))
+                continue
+            else:
+                summary.errors += 1
+                continue
+            if not in_list:
+                state = _AFTER_OBJECT
+
+        elif state in (_AFTER_OBJECT, _AFTER_SUBJECT_NODE):
+            if kind == 'punct' and text == ',' and state == _AFTER_OBJECT:
+                state = _OBJECT
+            elif kind == 'punct' and text == ';' and state == _AFTER_OBJECT:
+                state = _PREDICATE
+            elif kind == 'punct' and text == '.' and not stack:
+                state = _SUBJECT
+            elif kind == 'punct' and text == ']' and stack and stack[-1][0] in ('object', 'subject'):
+                state, predicate = _close_blank_node(stack)
+            elif state == _AFTER_SUBJECT_NODE and (kind in ('iri', 'pname') or kind == 'word' and text == 'a'):
+                predicate = RDF_TYPE if kind == 'word' else resolve(kind, text)
+                state = _OBJECT
+            else:
+                summary.errors += 1
+
+    return summary
+
+
+def _close_blank_node(stack: List[Tuple[str, Optional[str]]]) -> Tuple[int, Optional[str]]:
+    """Pop a '[' frame, returning the next state and the predicate that was open around it."""
+    frame_kind, predicate = stack.pop()
+    if frame_kind == 'subject':
+        # '[ ... ]' as a subject may be followed by its own predicate list or '.'
+        return _AFTER_SUBJECT_NODE, None
+    if stack and stack[-1][0] in ('list', 'subject-list'):
+        return _OBJECT, predicate
+    return _AFTER_OBJECT, predicate
+
+
+def _number_datatype(text: str) -> str:
+    if 'e' in text or 'E' in text:
+        return 'double'
+    if '.' in text:
+        return 'decimal'
+    return 'integer'
+
+
+def _unescape(text: str) -> str:
+    if '\\' not in text:
+        return text
+
+    def replace(match):
+        if match.group(1):
+            return chr(int(match.group(1), 16))
+        if match.group(2):
+            return chr(int(match.group(2), 16))
+        return _ECHARS.get(match.group(3), match.group(3))
+
+    return _ESCAPE_RE.sub(replace, text)
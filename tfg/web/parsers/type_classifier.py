@@ -0,0 +1,222 @@
+import re
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+TYPE_TEXT = 'text'
+TYPE_NUMERIC = 'numeric'
+TYPE_DATE = 'date'
+TYPE_COORDINATES = 'coordinates'
+TYPE_BOOLEAN = 'boolean'
+
+_BOOLEAN_VALUES = frozenset(['true', 'false', 'yes', 'no', '0', '1', 'si', 'sí'])
+_NUMERIC_BOOLEAN_VALUES = frozenset(['0', '1'])
+_GEOMETRY_KEYWORDS = ('POINT', 'POLYGON', 'LINESTRING')
+
+_NUMERIC_RE = re.compile(r'-?\d+\.?\d*([eE][-+]?\d+)?$')
+_LATLONG_RE = re.compile(r'-?\d+\.?\d*\s*,\s*-?\d+\.?\d*$')
+_DATE_PREFIX_RE = re.compile(r'\d{4}-\d{2}-\d{2}|\d{2}/\d{2}/\d{4}|\d{4}/\d{2}/\d{2}|\d{2}-\d{2}-\d{4}')
+_DIGIT_RE = re.compile(r'\d')
+
+_DATE_FORMATS = [
+    '%Y-%m-%d',
+    '%d/%m/%Y',
+    '%m/%d/%Y',
+    '%Y/%m/%d',
+    '%d-%m-%Y',
+    '%Y-%m-%dT%H:%M:%S',
+    '%Y-%m-%d %H:%M:%S',
+]
+
+# Every digit maps to '0', so '2024-01-31' and '1999-12-05' share the shape '0000-00-00'
+_SHAPE_TABLE = str.maketrans('123456789', '000000000')
+_SHAPE_MAX_LENGTH = 40
+_SHAPE_CACHE_MAX_ENTRIES = 8192
+# Only verdicts of the regular expressions are cached by shape; _PARSE_EACH marks shapes whose
+# values strptime must judge one by one, since '2/15/2024' is a date and '2/30/2024' is not
+_PARSE_EACH = ''
+_shape_cache: Dict[str, str] = {}
+
+
+def value_shape(value: str) -> str:
+    return value.translate(_SHAPE_TABLE)
+
+
+def classify_value(value: Any) -> str:
+    if value is None or value == '':
+        return TYPE_TEXT
+
+    # Check Python native types first (for JSON parsed values)
+    if isinstance(value, bool):
+        return TYPE_BOOLEAN
+
+    if isinstance(value, (int, float)):
+        return TYPE_NUMERIC
+
+    # For lists and dicts, detect based on structure
+    if isinstance(value, list):
+        if value and isinstance(value[0], (int, float)):
+            return TYPE_NUMERIC
+        return TYPE_TEXT
+
+    if isinstance(value, dict):
+        return TYPE_TEXT
+
+    return classify_string(str(value).strip())
+
+
+def classify_string(value: str) -> str:
+    if value.lower() in _BOOLEAN_VALUES:
+        return TYPE_BOOLEAN
+
+    # Numbers, lat/long pairs and dates all need digits; anything else is text or WKT
+    if not _DIGIT_RE.search(value):
+        return TYPE_COORDINATES if _has_geometry_keyword(value) else TYPE_TEXT
+
+    if len(value) > _SHAPE_MAX_LENGTH:
+        return _classify_by_rules(value)
+
+    shape = value_shape(value)
+    data_type = _shape_cache.get(shape)
+    if data_type is None:
+        if len(_shape_cache) >= _SHAPE_CACHE_MAX_ENTRIES:
+            _shape_cache.clear()
+        data_type = _classify_by_pattern(value)
+        _shape_cache[shape] = _PARSE_EACH if data_type is None else data_type
+    if not data_type:
+        return _classify_by_date_formats(value)
+    return data_type
+
+
+def classify_column(values: Iterable[Any]) -> List[str]:
+    """Classify a whole column, running the rules once per distinct value."""
+    distinct: Dict[Any, str] = {}
+    result = []
+    for value in values:
+        try:
+            data_type = distinct.get(value)
+        except TypeError:
+            # Unhashable JSON values (lists, dicts)
+            result.append(classify_value(value))
+            continue
+        if data_type is None:
+            data_type = classify_value(value)
+            distinct[value] = data_type
+        result.append(data_type)
+    return result
+
+
+def vote_column_type(values: Iterable[Any]) -> Tuple[str, float]:
+    """Vote a type over a column, returning it with the share of non-blank values that agree."""
+    multiplicity: Dict[Any, int] = {}
+    unhashable = []
+    for value in values:
+        if value is None or (isinstance(value, str) and not value.strip()):
+            continue
+        try:
+            multiplicity[value] = multiplicity.get(value, 0) + 1
+        except TypeError:
+            unhashable.append(value)
+
+    counts: Dict[str, int] = {}
+    numeric_booleans = 0
+    for value, count in multiplicity.items():
+        data_type = classify_value(value)
+        if data_type == TYPE_BOOLEAN and isinstance(value, str) and value.strip() in _NUMERIC_BOOLEAN_VALUES:
+            numeric_booleans += count
+        counts[data_type] = counts.get(data_type, 0) + count
+    for value in unhashable:
+        data_type = classify_value(value)
+        counts[data_type] = counts.get(data_type, 0) + 1
+
+    total = sum(counts.values())
+    if not total:
+        return TYPE_TEXT, 0.0
+
+    # Type lattice: 0/1 flags widen to numeric when the column also holds other numbers
+    if numeric_booleans and TYPE_NUMERIC in counts:
+        counts[TYPE_NUMERIC] += numeric_booleans
+        counts[TYPE_BOOLEAN] -= numeric_booleans
+
+    # Ties resolve towards text, the top of the lattice
+    best_type = max(counts, key=lambda t: (counts[t], t == TYPE_TEXT))
+    return best_type, counts[best_type] / total
+
+
+def parse_date(value: Any) -> Optional[date]:
+    """Calendar date of a value written in one of the recognized date formats, or None."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if not isinstance(value, str):
+        return None
+    value = value.strip()
+    # ISO timestamps with fractions or offsets: the date part is enough
+    if len(value) > 10 and value[4:5] == '-' and value[10] in 'T ':
+        value = value[:10]
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def type_from_datatype(datatype: str) -> str:
+    """Map an XSD datatype (prefixed name or full IRI) onto a property type."""
+    local_name = re.split(r'[#:/]', datatype.strip('<>'))[-1].lower()
+    if local_name in ('date', 'datetime', 'time', 'datetimestamp', 'gyear', 'gyearmonth'):
+        return TYPE_DATE
+    if local_name in ('integer', 'decimal', 'double', 'float', 'int', 'long', 'short',
+                      'nonnegativeinteger', 'positiveinteger', 'negativeinteger', 'nonpositiveinteger',
+                      'unsignedint', 'unsignedlong', 'unsignedshort', 'byte', 'unsignedbyte'):
+        return TYPE_NUMERIC
+    if local_name == 'boolean':
+        return TYPE_BOOLEAN
+    if local_name == 'wktliteral':
+        return TYPE_COORDINATES
+    return TYPE_TEXT
+
+
+def _classify_by_rules(value: str) -> str:
+    data_type = _classify_by_pattern(value)
+    return data_type if data_type is not None else _classify_by_date_formats(value)
+
+
+def _classify_by_pattern(value: str) -> Optional[str]:
+    # Same verdict for every value of one shape; None when only parsing the value can tell
+    if _NUMERIC_RE.match(value):
+        return TYPE_NUMERIC
+
+    if _LATLONG_RE.match(value):
+        return TYPE_COORDINATES
+
+    if _has_geometry_keyword(value):
+        return TYPE_COORDINATES
+
+    if _DATE_PREFIX_RE.match(value):
+        return TYPE_DATE
+
+    # Every date format has a separator, so without one strptime cannot match
+    if '-' not in value and '/' not in value:
+        return TYPE_TEXT
+    return None
+
+
+def _classify_by_date_formats(value: str) -> str:
+    for fmt in _DATE_FORMATS:
+        try:
+            datetime.strptime(value, fmt)
+            return TYPE_DATE
+        except ValueError:
+            continue
+
+    return TYPE_TEXT
+
+
+def _has_geometry_keyword(value: str) -> bool:
+    if 'point' in value.lower() and ('coordinates' in value.lower() or '[' in value):
+        return True
+    upper = value.upper()
+    return any(keyword in upper for keyword in _GEOMETRY_KEYWORDS)
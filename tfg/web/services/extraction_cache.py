@@ -0,0 +1,129 @@
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from django.core.cache import caches
+
+
+# Part of every key: bump it when extraction output changes so old entries stop matching
+EXTRACTION_VERSION = 3
+# Serialized results kept in this process before the least recently used are evicted
+LRU_MAX_BYTES = 32 * 1024 * 1024
+# Django cache shared by every server process (a database table, see settings.CACHES)
+SHARED_CACHE_ALIAS = 'extraction'
+SHARED_CACHE_TIMEOUT = 30 * 24 * 3600
+# After a shared cache error, seconds spent on the in-process LRU alone before trying it again
+SHARED_CACHE_RETRY_SECONDS = 60
+
+_SHA256_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+class SizedLRUCache:
+    """Thread-safe LRU of serialized values, bounded by their total size rather than their count."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: 'OrderedDict[str, str]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is not None:
+                self._entries.move_to_end(key)
+            return payload
+
+    def set(self, key: str, payload: str):
+        if len(payload) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self._entries[key] = payload
+            self.size += len(payload)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+_lru = SizedLRUCache(LRU_MAX_BYTES)
+# time.monotonic() before which the shared cache is not tried, set when it last failed
+_shared_cache_retry_at = 0.0
+
+
+def content_hash(data: Any) -> str:
+    """SHA-256 hex digest of bytes, or of the UTF-8 encoding of a str."""
+    if isinstance(data, str):
+        data = data.encode('utf-8', 'surrogatepass')
+    return hashlib.sha256(data).hexdigest()
+
+
+def is_sha256(value: Any) -> bool:
+    return isinstance(value, str) and bool(_SHA256_RE.match(value))
+
+
+def strategy_options(strategy: Any) -> str:
+    """Class and settings of a strategy, so changing either misses the cache instead of reading stale results."""
+    settings = {name: value for name, value in vars(strategy).items()
+                if isinstance(value, (str, int, float, bool, type(None)))}
+    return f"{type(strategy).__name__}{json.dumps(settings, sort_keys=True)}"
+
+
+def cache_key(sha256: str, strategy: str, options: str = '') -> str:
+    # Fixed length whatever the strategy and options (the database cache takes keys up to 255 chars)
+    variant = hashlib.sha1(f"{strategy}|{options}".encode('utf-8')).hexdigest()[:16]
+    return f"extract:v{EXTRACTION_VERSION}:{variant}:{sha256}"
+
+
+def get_cached(key: str) -> Optional[Any]:
+    """A fresh copy of the cached result, from this process's LRU or else from the shared cache."""
+    payload = _lru.get(key)
+    if payload is None:
+        payload = _shared_get(key)
+        if payload is None:
+            return None
+        _lru.set(key, payload)
+    return json.loads(payload)
+
+
+def set_cached(key: str, value: Any):
+    payload = json.dumps(value, separators=(',', ':'))
+    _lru.set(key, payload)
+    _shared_set(key, payload)
+
+
+def _shared_get(key: str) -> Optional[str]:
+    if time.monotonic() < _shared_cache_retry_at:
+        return None
+    try:
+        return caches[SHARED_CACHE_ALIAS].get(key)
+    except Exception as e:
+        # Missing table or backend down: keep going with the in-process LRU only for a while
+        _shared_cache_failed(e)
+        return None
+
+
+def _shared_set(key: str, payload: str):
+    if time.monotonic() < _shared_cache_retry_at:
+        return
+    try:
+        caches[SHARED_CACHE_ALIAS].set(key, payload, SHARED_CACHE_TIMEOUT)
+    except Exception as e:
+        _shared_cache_failed(e)
+
+
+def _shared_cache_failed(error: Exception):
+    global _shared_cache_retry_at
+    print(f"Shared extraction cache unavailable, retrying in {SHARED_CACHE_RETRY_SECONDS}s: {error}")
+    _shared_cache_retry_at = time.monotonic() + SHARED_CACHE_RETRY_SECONDS
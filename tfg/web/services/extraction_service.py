@@ -0,0 +1,274 @@
+import binascii
+import threading
+from concurrent.futures import FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from ..parsers.compression import iter_decompressed_files, peek_source
+from ..parsers.encoding import ENCODING_SAMPLE_BYTES, detect_encoding
+from ..parsers.parallel import get_process_pool, in_worker, reset_process_pool, worker_count
+from ..parsers.profiling import ColumnProfile, merge_profile_dicts
+from ..parsers.registry import detect_format, get_strategy, strategy_for, supported_formats
+from .extraction_cache import cache_key, content_hash, get_cached, is_sha256, set_cached, strategy_options
+
+
+# Files one request may have in the pool at once, so a big upload cannot starve the others
+MAX_FILES_IN_FLIGHT = 4
+# Requests whose files add up to less than this are extracted in the request thread
+INLINE_MAX_BYTES = 512 * 1024
+# Base64 characters decoded per slice; a multiple of 4 so no slice splits a quantum
+BASE64_SLICE_CHARS = 256 * 1024
+
+# Caps pool submissions across all requests in this process; twice the pool size keeps workers fed
+_pool_slots = threading.BoundedSemaphore(worker_count() * 2)
+# Settings of every registered strategy, part of the upload cache keys; built on first use
+_registry_options = None
+
+
+def decode_data_url(data_url: str) -> bytes:
+    if not data_url:
+        return b''
+    base64_index = data_url.find('base64,')
+    if base64_index == -1:
+        return b''
+    return decode_base64_text(data_url, base64_index + 7)
+
+
+def decode_base64_text(text: str, start: int = 0) -> bytes:
+    """Decode the base64 in text[start:] a slice at a time, b'' when it is not valid base64.
+
+    Decoding the whole tail at once would first copy it as a str and then
+    as ASCII bytes; slices keep those copies down to one slice.
+    """
+    try:
+        return b''.join(binascii.a2b_base64(text[offset:offset + BASE64_SLICE_CHARS])
+                        for offset in range(start, len(text), BASE64_SLICE_CHARS))
+    except (binascii.Error, ValueError):
+        return b''
+
+
+def extract_file_properties(file_info: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Decode one uploaded file (data URL) and extract its properties as dicts."""
+    content = decode_data_url(file_info.get('content', ''))
+    if not content:
+        return []
+    return extract_content_properties(content, file_info.get('name', ''), file_info.get('type', ''))
+
+
+def extract_content_properties(content: bytes, file_name: str, file_type: str = '') -> List[Dict[str, Any]]:
+    """Extract the properties of one uploaded file's bytes as dicts, profile sketches included.
+
+    Compressed uploads are read through a decompressing stream; every member
+    of a zip bundle counts as a file of its own, in archive order.
+    """
+    file_name = file_name.lower()
+    file_type = file_type.lower()
+
+    properties = []
+    try:
+        for member_name, source in iter_decompressed_files(content, file_name):
+            # The upload's MIME type describes the archive, not what is inside it
+            member_type = file_type if source is content else ''
+            head, source = peek_source(source, ENCODING_SAMPLE_BYTES)
+            strategy = strategy_for(head, member_name.lower(), member_type, default='JSON')
+            if strategy is None:
+                continue
+            encoding = detect_encoding(head) or 'utf-8'
+            properties.extend(prop.to_dict(with_state=True)
+                              for prop in strategy.extract_properties_from_stream(source, encoding))
+    except Exception as e:
+        print(f"Error reading {file_name}: {e}")
+    return properties
+
+
+def iter_uploaded_column_values(files: List[Dict[str, Any]], columns: List[str],
+                                on_member: Optional[Callable[[str, Any, str], bool]] = None
+                                ) -> Iterator[Tuple[str, Any]]:
+    """(column, value) pairs of the given columns over every uploaded file, in file order.
+
+    Files are read lazily, so a caller that only needs a sample can stop
+    early; unreadable files are logged and skipped. on_member, when given,
+    is called with (tipo_formato, source, encoding) as each file (or archive
+    member) starts, and returns True when it consumed the file itself.
+    """
+    for file_info in files:
+        content = decode_data_url(file_info.get('content', ''))
+        if not content:
+            continue
+        file_name = file_info.get('name', '').lower()
+        file_type = file_info.get('type', '').lower()
+        try:
+            for member_name, source in iter_decompressed_files(content, file_name):
+                member_type = file_type if source is content else ''
+                head, source = peek_source(source, ENCODING_SAMPLE_BYTES)
+                tipo_formato = detect_format(head, member_name.lower(), member_type) or 'JSON'
+                encoding = detect_encoding(head) or 'utf-8'
+                if on_member is not None and on_member(tipo_formato, source, encoding):
+                    continue
+                strategy = get_strategy(tipo_formato)
+                if strategy is None:
+                    continue
+                yield from strategy.iter_column_values(source, columns, encoding)
+        except Exception as e:
+            print(f"Error reading {file_name}: {e}")
+
+
+def extract_stored_properties(contenido: str, tipo_formato: str) -> List[Dict[str, Any]]:
+    """Properties of a file as stored in `fichero` (text, or base64 for binary formats), memoized on its hash.
+
+    Extraction errors propagate and are not cached.
+    """
+    strategy = get_strategy(tipo_formato)
+    if strategy is None:
+        return []
+    key = cache_key(content_hash(contenido), tipo_formato.upper(), strategy_options(strategy))
+    properties = get_cached(key)
+    if properties is None:
+        properties = [prop.to_dict() for prop in strategy.extract_properties(contenido)]
+        set_cached(key, properties)
+    return properties
+
+
+def upload_cache_key(sha256: str, file_info: Dict[str, Any]) -> str:
+    """Cache key of an upload's extraction: the format is detected from the content, its name and MIME type."""
+    global _registry_options
+    if _registry_options is None:
+        _registry_options = '|'.join(f"{name}={strategy_options(get_strategy(name))}" for name in supported_formats())
+    file_name = file_info.get('name', '').lower()
+    suffix = file_name.split('.', 1)[1] if '.' in file_name else ''
+    return cache_key(sha256, f"upload.{suffix}.{file_info.get('type', '').lower()}", _registry_options)
+
+
+def cached_file_properties(file_info: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+    """Memoized properties of an upload, or None on a miss.
+
+    With the SHA-256 the client sent in file_info['sha256'] the lookup reads
+    nothing of the file; otherwise the content is decoded and hashed here.
+    """
+    sha256 = file_info.get('sha256')
+    if not is_sha256(sha256):
+        content = decode_data_url(file_info.get('content', ''))
+        if not content:
+            return None
+        sha256 = content_hash(content)
+    return get_cached(upload_cache_key(sha256, file_info))
+
+
+def _extract_and_hash(file_info: Dict[str, Any]) -> Tuple[Optional[str], List[Dict[str, Any]]]:
+    # The hash is computed here, never taken from the client, so results are only stored under their real content
+    content = decode_data_url(file_info.get('content', ''))
+    if not content:
+        return None, []
+    return content_hash(content), extract_content_properties(content, file_info.get('name', ''), file_info.get('type', ''))
+
+
+def _store_file_properties(file_info: Dict[str, Any], result: Tuple[Optional[str], List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    sha256, properties = result
+    if sha256 is not None:
+        set_cached(upload_cache_key(sha256, file_info), without_profile_state(properties))
+    return properties
+
+
+def without_profile_state(properties: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """The properties as the API returns and the cache stores them: profile sketches stay on the server."""
+    return [{key: value for key, value in prop.items() if key != 'profile_state'} if 'profile_state' in prop else prop
+            for prop in properties]
+
+
+def iter_extracted_files(files: List[Dict[str, Any]],
+                         max_in_flight: int = MAX_FILES_IN_FLIGHT) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+    """Yield (file index, properties) as each file finishes, in completion order.
+
+    Files extracted before (same content, same strategies) come from the
+    cache first. Decoding and extraction of the rest run on the shared
+    process pool with at most max_in_flight files of this request submitted
+    at a time.
+    """
+    missing = []
+    for index, file_info in enumerate(files):
+        properties = cached_file_properties(file_info)
+        if properties is None:
+            missing.append(index)
+        else:
+            yield index, properties
+
+    total_size = sum(len(files[index].get('content', '')) for index in missing)
+    if in_worker() or total_size < INLINE_MAX_BYTES:
+        for index in missing:
+            yield index, _store_file_properties(files[index], _extract_and_hash(files[index]))
+        return
+
+    pending = {}
+    next_position = 0
+    done_indexes = set()
+    try:
+        pool = get_process_pool()
+        while next_position < len(missing) or pending:
+            while next_position < len(missing) and len(pending) < max_in_flight:
+                index = missing[next_position]
+                _pool_slots.acquire()
+                try:
+                    future = pool.submit(_extract_and_hash, files[index])
+                except Exception:
+                    _pool_slots.release()
+                    raise
+                future.add_done_callback(lambda _: _pool_slots.release())
+                pending[future] = index
+                next_position += 1
+
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                index = pending.pop(future)
+                try:
+                    properties = _store_file_properties(files[index], future.result())
+                except BrokenProcessPool:
+                    raise
+                except Exception as e:
+                    print(f"Error extracting properties from file {index}: {e}")
+                    properties = []
+                done_indexes.add(index)
+                yield index, properties
+    except (BrokenProcessPool, OSError, RuntimeError) as e:
+        print(f"Process pool unavailable, extracting in-process: {e}")
+        reset_process_pool()
+        for index in missing:
+            if index not in done_indexes:
+                yield index, _store_file_properties(files[index], _extract_and_hash(files[index]))
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+class PropertyMerger:
+    """Collects per-file results in any order and merges them as if read in file order."""
+
+    def __init__(self, file_count: int):
+        self._results: List[Optional[List[Dict[str, Any]]]] = [None] * file_count
+
+    def add(self, index: int, properties: List[Dict[str, Any]]):
+        self._results[index] = properties
+
+    def merged(self) -> Dict[str, Dict[str, Any]]:
+        # The first file (in upload order) that defines a property name wins;
+        # column profiles of the same name are combined across files
+        all_properties: Dict[str, Dict[str, Any]] = {}
+        # Merged sketches by property name, while every file so far brought its own
+        profiles: Dict[str, ColumnProfile] = {}
+        for properties in self._results:
+            for prop in properties or []:
+                name = prop['name']
+                kept = all_properties.get(name)
+                if kept is None:
+                    all_properties[name] = without_profile_state([prop])[0]
+                    if 'profile_state' in prop:
+                        profiles[name] = ColumnProfile.from_state(prop['profile_state'])
+                elif 'profile' in kept and 'profile' in prop:
+                    profile = profiles.get(name)
+                    if profile is not None and 'profile_state' in prop:
+                        profile.merge(ColumnProfile.from_state(prop['profile_state']))
+                        all_properties[name] = {**kept, 'profile': profile.to_dict(kept['type'])}
+                    else:
+                        # A file served from the cache has only its summary to offer
+                        profiles.pop(name, None)
+                        all_properties[name] = {**kept, 'profile': merge_profile_dicts(kept['profile'], prop['profile'])}
+        return all_properties
@@ -0,0 +1,214 @@
+import base64
+import lzma
+import zipfile
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from ..parsers.compression import (
+    MAX_MEMBER_BYTES,
+    DecompressionLimitExceeded,
+    inflated_size_limit,
+    iter_decompressed_files,
+    read_all,
+)
+from ..parsers.encoding import ENCODING_SAMPLE_BYTES, decode_bytes, detect_encoding
+from ..parsers.registry import detect_format, get_strategy, supported_formats
+from .extraction_cache import cache_key, content_hash, get_cached, set_cached, strategy_options
+from .extraction_service import decode_base64_text
+from .keyword_service import index_dataset_terms
+from .similarity_service import index_dataset
+
+
+# tipo_formato stored when neither the user nor the content settles one
+DEFAULT_FORMAT = 'CSV'
+# Encodings whose text is full of NUL bytes; for the rest a NUL means binary content
+_WIDE_ENCODINGS = ('utf-16', 'utf-32')
+
+
+class Upload:
+    """One uploaded file, decoded from its data URL."""
+
+    __slots__ = ('name', 'mime_type', 'data')
+
+    def __init__(self, name: str, mime_type: str, data: bytes):
+        self.name = name
+        self.mime_type = mime_type
+        self.data = data
+
+
+class IngestedFile:
+    """A file to store (an upload, or a member of a compressed upload) as it goes through the stages.
+
+    data holds its bytes until the last stage is done with them; what the
+    stages learn (format, encoding, hash, properties) stays afterwards.
+    """
+
+    __slots__ = ('name', 'mime_type', 'data', 'size', 'detected_format', 'tipo_formato', 'encoding',
+                 'sha256', 'properties')
+
+    def __init__(self, name: str, mime_type: str, data: bytes):
+        self.name = name
+        self.mime_type = mime_type
+        self.data = data
+        self.size = len(data)
+        self.detected_format = None
+        self.tipo_formato = None
+        self.encoding = None
+        self.sha256 = None
+        self.properties = []
+
+
+def decode_uploads(files: Iterable[Dict[str, Any]],
+                   on_upload: Optional[Callable[[Upload], None]] = None) -> Iterator[Upload]:
+    """Decode each upload (a data URL, or bare base64) once; undecodable ones are skipped.
+
+    on_upload sees every upload as it is decoded (e.g. to send it to CKAN);
+    its failures are logged and do not stop the pipeline.
+    """
+    for file_info in files:
+        content = file_info.get('content', '')
+        if not content:
+            continue
+        base64_index = content.find('base64,')
+        data = decode_base64_text(content, base64_index + 7 if base64_index != -1 else 0)
+        if not data:
+            continue
+        upload = Upload(file_info.get('name', ''), file_info.get('type', '').lower(), data)
+        if on_upload is not None:
+            try:
+                on_upload(upload)
+            except Exception as e:
+                print(f"Error publishing {upload.name}: {e}")
+        yield upload
+
+
+def expand_uploads(uploads: Iterable[Upload]) -> Iterator[IngestedFile]:
+    """One file per gzip/bz2/xz upload or zip member; anything else passes through without a copy.
+
+    A damaged archive is kept as it was uploaded, and so is one that
+    inflates past MAX_MEMBER_BYTES per member or inflated_size_limit() in
+    total; members are only handed on once the whole archive fits.
+    """
+    for upload in uploads:
+        members = []
+        remaining = inflated_size_limit(len(upload.data))
+        try:
+            for member_name, source in iter_decompressed_files(upload.data, upload.name):
+                if source is upload.data:
+                    # Not compressed (or a zip-based document): nothing to inflate
+                    members.append(IngestedFile(member_name, upload.mime_type, upload.data))
+                    continue
+                # The upload's MIME type describes the archive, not what is inside it
+                data = read_all(source, min(MAX_MEMBER_BYTES, remaining))
+                remaining -= len(data)
+                members.append(IngestedFile(member_name, '', data))
+        except DecompressionLimitExceeded as e:
+            print(f"Not decompressing {upload.name}: {e}")
+            members = [IngestedFile(upload.name, upload.mime_type, upload.data)]
+        except (OSError, EOFError, zipfile.BadZipFile, lzma.LZMAError) as e:
+            print(f"Error decompressing {upload.name}: {e}")
+            if not members:
+                members = [IngestedFile(upload.name, upload.mime_type, upload.data)]
+        yield from members
+
+
+def detect_formats(items: Iterable[IngestedFile], declared_format: Optional[str] = None) -> Iterator[IngestedFile]:
+    """Format and encoding from a sample; encoding stays None for binary content.
+
+    The format the user chose, when valid, is what gets stored as
+    tipo_formato; the detected one still drives extraction.
+    """
+    declared_format = (declared_format or '').strip().upper()
+    for item in items:
+        head = item.data[:ENCODING_SAMPLE_BYTES]
+        item.detected_format = detect_format(head, item.name.lower(), item.mime_type)
+        tipo_formato = declared_format or item.detected_format
+        item.tipo_formato = tipo_formato if tipo_formato in supported_formats() else DEFAULT_FORMAT
+        encoding = detect_encoding(head)
+        if encoding is not None and (encoding.startswith(_WIDE_ENCODINGS) or b'\x00' not in item.data):
+            item.encoding = encoding
+        yield item
+
+
+def hash_contents(items: Iterable[IngestedFile]) -> Iterator[IngestedFile]:
+    for item in items:
+        item.sha256 = content_hash(item.data)
+        yield item
+
+
+def store_files(items: Iterable[IngestedFile], cursor, id_dataset: int) -> Iterator[IngestedFile]:
+    """Insert each file in `fichero`: its text, or base64 when it is binary."""
+    for item in items:
+        if item.encoding is None:
+            contenido = base64.b64encode(item.data).decode('ascii')
+        else:
+            contenido = decode_bytes(item.data, item.encoding)
+        cursor.execute(
+            """
+            INSERT INTO fichero (
+                id_dataset, tipo_formato, url_datos, contenido, nombre_archivo
+            )
+            VALUES (%s, %s, %s, %s, %s)
+            """,
+            [id_dataset, item.tipo_formato, None, contenido, item.name]
+        )
+        del contenido
+        yield item
+
+
+def extract_properties(items: Iterable[IngestedFile]) -> Iterator[IngestedFile]:
+    for item in items:
+        # Undetected text is tried as JSON, like on the inference page; undetected binary is skipped
+        tipo_formato = item.detected_format or ('JSON' if item.encoding is not None else None)
+        strategy = get_strategy(tipo_formato)
+        if strategy is not None:
+            # The hash stage already paid for the key, so a file extracted before costs nothing more
+            key = cache_key(item.sha256, tipo_formato, strategy_options(strategy))
+            properties = get_cached(key)
+            if properties is None:
+                try:
+                    properties = [prop.to_dict() for prop in
+                                  strategy.extract_properties_from_stream(item.data, item.encoding or 'utf-8')]
+                    set_cached(key, properties)
+                except Exception as e:
+                    print(f"Error extracting properties from {item.name}: {e}")
+                    properties = []
+            item.properties = properties
+        yield item
+
+
+def ingest_files(files: Iterable[Dict[str, Any]], cursor=None, id_dataset: Optional[int] = None,
+                 id_usuario: Optional[int] = None, declared_format: Optional[str] = None,
+                 on_upload: Optional[Callable[[Upload], None]] = None, extract: bool = True) -> List[IngestedFile]:
+    """Run uploaded files (dicts with a data URL in 'content') through the ingestion stages.
+
+    decode -> detect format/encoding -> hash -> store -> extract properties.
+    The stages are chained generators, so each file goes through all of them
+    before the next one is decoded and only one file's bytes are alive at a
+    time; every stage reads the same decoded buffer instead of its own copy.
+    Files are stored when a cursor and id_dataset are given, and with
+    extraction on, the dataset's schema is indexed for similarity lookups
+    and its terms are counted in the user's keyword corpus.
+    """
+    items = hash_contents(detect_formats(expand_uploads(decode_uploads(files, on_upload)), declared_format))
+    store = cursor is not None and bool(id_dataset)
+    if store:
+        items = store_files(items, cursor, id_dataset)
+    if extract:
+        items = extract_properties(items)
+
+    ingested = []
+    for item in items:
+        item.data = None
+        ingested.append(item)
+
+    if store and extract and id_usuario is not None:
+        properties = [prop for item in ingested for prop in item.properties]
+        try:
+            index_dataset(cursor, id_dataset, id_usuario, properties)
+        except Exception as e:
+            print(f"Error indexing schema of dataset {id_dataset}: {e}")
+        try:
+            index_dataset_terms(cursor, id_dataset, id_usuario, properties)
+        except Exception as e:
+            print(f"Error indexing terms of dataset {id_dataset}: {e}")
+    return ingested
@@ -0,0 +1,146 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from django.db import connection
+
+from ..parsers.keywords import KeywordExtractor, document_terms, split_column_name
+from ..parsers.type_classifier import TYPE_TEXT
+from .extraction_service import iter_uploaded_column_values
+
+
+# Text sampled from the start of the files for the keyword candidates
+MAX_SAMPLE_CHARS = 20000
+KEYWORD_COUNT = 5
+
+# The repository has no migrations, so the corpus tables are created the first time they are needed.
+# corpus_termino holds, per user, how many of their datasets contain each term; dataset_terminos
+# remembers each dataset's terms so that re-indexing or deleting it can take them back out.
+_SCHEMA_SQL = """
+    CREATE TABLE IF NOT EXISTS dataset_terminos (
+        id_dataset INTEGER PRIMARY KEY REFERENCES dataset (id_dataset) ON DELETE CASCADE,
+        id_usuario INTEGER NOT NULL,
+        terminos TEXT[] NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS corpus_termino (
+        id_usuario INTEGER NOT NULL,
+        termino TEXT NOT NULL,
+        documentos INTEGER NOT NULL,
+        PRIMARY KEY (id_usuario, termino)
+    );
+    CREATE TABLE IF NOT EXISTS corpus_usuario (
+        id_usuario INTEGER PRIMARY KEY,
+        documentos INTEGER NOT NULL
+    );
+"""
+_schema_ready = False
+
+
+def ensure_schema(cursor) -> None:
+    global _schema_ready
+    if not _schema_ready:
+        cursor.execute(_SCHEMA_SQL)
+        _schema_ready = True
+
+
+def dataset_texts(properties: Iterable[Dict[str, Any]]) -> List[str]:
+    """What a dataset says about itself without reading it again: column names and frequent text values."""
+    texts = []
+    for prop in properties:
+        texts.append(split_column_name(prop.get('name', '')))
+        if prop.get('type') == TYPE_TEXT:
+            texts.extend(str(top['value']) for top in (prop.get('profile') or {}).get('top_values', []))
+    return texts
+
+
+def index_dataset_terms(cursor, id_dataset: int, id_usuario: int, properties: List[Dict[str, Any]]) -> bool:
+    """Count the dataset's terms in the user's corpus, replacing what an earlier indexing counted."""
+    terms = sorted(document_terms(dataset_texts(properties)))
+    if not terms:
+        return False
+    ensure_schema(cursor)
+    remove_dataset_terms(cursor, id_dataset)
+    cursor.execute(
+        "INSERT INTO dataset_terminos (id_dataset, id_usuario, terminos) VALUES (%s, %s, %s)",
+        [id_dataset, id_usuario, terms]
+    )
+    cursor.execute(
+        """
+        INSERT INTO corpus_termino (id_usuario, termino, documentos)
+        SELECT %s, termino, 1 FROM unnest(%s::TEXT[]) AS t (termino)
+        ON CONFLICT (id_usuario, termino) DO UPDATE SET documentos = corpus_termino.documentos + 1
+        """,
+        [id_usuario, terms]
+    )
+    cursor.execute(
+        """
+        INSERT INTO corpus_usuario (id_usuario, documentos) VALUES (%s, 1)
+        ON CONFLICT (id_usuario) DO UPDATE SET documentos = corpus_usuario.documentos + 1
+        """,
+        [id_usuario]
+    )
+    return True
+
+
+def remove_dataset_terms(cursor, id_dataset: int) -> None:
+    """Take a dataset's terms back out of its user's corpus (before deleting or re-indexing it)."""
+    ensure_schema(cursor)
+    cursor.execute("DELETE FROM dataset_terminos WHERE id_dataset = %s RETURNING id_usuario, terminos", [id_dataset])
+    row = cursor.fetchone()
+    if row is None:
+        return
+    id_usuario, terms = row
+    cursor.execute(
+        "UPDATE corpus_termino SET documentos = documentos - 1 WHERE id_usuario = %s AND termino = ANY(%s)",
+        [id_usuario, list(terms)]
+    )
+    cursor.execute("DELETE FROM corpus_termino WHERE id_usuario = %s AND documentos <= 0", [id_usuario])
+    cursor.execute("UPDATE corpus_usuario SET documentos = documentos - 1 WHERE id_usuario = %s", [id_usuario])
+
+
+def corpus_statistics(id_usuario: int, terms: Iterable[str]) -> Tuple[Dict[str, int], int]:
+    """(document frequency of each of the terms, number of documents) in the user's corpus."""
+    terms = sorted(set(terms))
+    with connection.cursor() as cursor:
+        ensure_schema(cursor)
+        cursor.execute("SELECT documentos FROM corpus_usuario WHERE id_usuario = %s", [id_usuario])
+        row = cursor.fetchone()
+        if row is None or not terms:
+            return {}, row[0] if row else 0
+        cursor.execute(
+            "SELECT termino, documentos FROM corpus_termino WHERE id_usuario = %s AND termino = ANY(%s)",
+            [id_usuario, terms]
+        )
+        return dict(cursor.fetchall()), row[0]
+
+
+def suggest_keywords(files: List[Dict[str, Any]], columns: List[str], id_usuario: Optional[int] = None,
+                     limit: int = KEYWORD_COUNT) -> List[str]:
+    """palabras_clave from the column names and a sample of the values of the given columns, offline.
+
+    Phrases are scored with RAKE and weighted by how rare their words are
+    among the user's datasets; without a user (or a corpus) only RAKE and
+    the phrase counts decide. [] when the columns give no candidates.
+    """
+    if not columns:
+        return []
+    texts = [split_column_name(name) for name in columns]
+    sampled = 0
+    values = iter_uploaded_column_values(files, columns)
+    try:
+        for _, value in values:
+            if not isinstance(value, str):
+                continue
+            texts.append(value)
+            sampled += len(value)
+            if sampled >= MAX_SAMPLE_CHARS:
+                break
+    finally:
+        values.close()
+
+    document_frequency, document_count = {}, 0
+    if id_usuario is not None:
+        try:
+            document_frequency, document_count = corpus_statistics(id_usuario, document_terms(texts))
+        except Exception as e:
+            print(f"Error reading keyword corpus of user {id_usuario}: {e}")
+    extractor = KeywordExtractor(document_frequency, document_count)
+    return [keyword for keyword, _ in extractor.extract(texts, limit)]
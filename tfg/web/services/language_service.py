@@ -0,0 +1,34 @@
+from typing import Any, Dict, List, Optional
+
+from ..parsers.language import get_language_detector
+from .extraction_service import iter_uploaded_column_values
+
+
+# Share of the sample that must agree before the language is suggested
+MIN_CONFIDENCE = 0.6
+CANDIDATES = 3
+
+
+def detect_language(files: List[Dict[str, Any]], columns: List[str]) -> Optional[Dict[str, Any]]:
+    """idioma (ISO 639-1 code) of the text in the given columns, detected offline.
+
+    Values are read from the start of the files only until the detector has
+    enough text. Returns {'language', 'confidence', 'candidates'}, with
+    language None when no language reaches MIN_CONFIDENCE, or None when the
+    columns hold too little text to tell.
+    """
+    if not columns:
+        return None
+    values = iter_uploaded_column_values(files, columns)
+    try:
+        ranked = get_language_detector().detect(value for _, value in values if isinstance(value, str))
+    finally:
+        values.close()
+    if not ranked:
+        return None
+    code, confidence = ranked[0]
+    return {
+        'language': code if confidence >= MIN_CONFIDENCE else None,
+        'confidence': confidence,
+        'candidates': [{'code': code, 'confidence': confidence} for code, confidence in ranked[:CANDIDATES]]
+    }
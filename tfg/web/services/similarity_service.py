@@ -0,0 +1,122 @@
+from typing import Any, Dict, Iterable, List, Optional
+
+from django.db import connection
+
+from ..parsers.fingerprint import MinHash, schema_tokens
+
+
+# Candidates fetched from the band index before the exact signature comparison
+MAX_CANDIDATES = 50
+# Metadata offered for reuse from a similar dataset
+SUGGESTED_FIELDS = (
+    'titulo', 'descripcion', 'tema', 'palabras_clave', 'idioma', 'extension_temporal', 'extension_espacial',
+)
+
+# The repository has no migrations, so the index tables are created the first time they are needed
+_SCHEMA_SQL = """
+    CREATE TABLE IF NOT EXISTS dataset_firma (
+        id_dataset INTEGER PRIMARY KEY REFERENCES dataset (id_dataset) ON DELETE CASCADE,
+        id_usuario INTEGER NOT NULL,
+        firma BYTEA NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS dataset_lsh (
+        id_usuario INTEGER NOT NULL,
+        banda SMALLINT NOT NULL,
+        clave BIGINT NOT NULL,
+        id_dataset INTEGER NOT NULL REFERENCES dataset (id_dataset) ON DELETE CASCADE,
+        PRIMARY KEY (id_usuario, banda, clave, id_dataset)
+    );
+    CREATE INDEX IF NOT EXISTS dataset_lsh_id_dataset ON dataset_lsh (id_dataset);
+"""
+_schema_ready = False
+
+
+def ensure_schema(cursor) -> None:
+    global _schema_ready
+    if not _schema_ready:
+        cursor.execute(_SCHEMA_SQL)
+        _schema_ready = True
+
+
+def schema_signature(properties: Iterable[Dict[str, Any]]) -> Optional[MinHash]:
+    """MinHash over the normalized 'name:type' of every extracted property; None without properties."""
+    return MinHash.from_tokens(schema_tokens((prop.get('name', ''), prop.get('type', '')) for prop in properties))
+
+
+def index_dataset(cursor, id_dataset: int, id_usuario: int, properties: List[Dict[str, Any]]) -> bool:
+    """Store the dataset's schema signature and its LSH band keys, replacing any previous ones."""
+    signature = schema_signature(properties)
+    if signature is None:
+        return False
+    ensure_schema(cursor)
+    cursor.execute(
+        """
+        INSERT INTO dataset_firma (id_dataset, id_usuario, firma) VALUES (%s, %s, %s)
+        ON CONFLICT (id_dataset) DO UPDATE SET id_usuario = EXCLUDED.id_usuario, firma = EXCLUDED.firma
+        """,
+        [id_dataset, id_usuario, signature.to_bytes()]
+    )
+    cursor.execute("DELETE FROM dataset_lsh WHERE id_dataset = %s", [id_dataset])
+    cursor.executemany(
+        "INSERT INTO dataset_lsh (id_usuario, banda, clave, id_dataset) VALUES (%s, %s, %s, %s)",
+        [(id_usuario, band, key, id_dataset) for band, key in signature.band_keys()]
+    )
+    return True
+
+
+def find_similar_datasets(id_usuario: int, properties: List[Dict[str, Any]], limit: int = 3,
+                          min_similarity: float = 0.5) -> List[Dict[str, Any]]:
+    """The user's datasets whose schema is most similar to the given properties, with their metadata.
+
+    Candidates come from the band index (one lookup per band on the primary
+    key); their stored signatures then give the estimated Jaccard similarity.
+    """
+    signature = schema_signature(properties)
+    if signature is None:
+        return []
+    band_keys = signature.band_keys()
+
+    with connection.cursor() as cursor:
+        ensure_schema(cursor)
+        values = ', '.join(['(%s, %s)'] * len(band_keys))
+        cursor.execute(
+            f"""
+            SELECT l.id_dataset, f.firma
+            FROM (VALUES {values}) AS b (banda, clave)
+            JOIN dataset_lsh l ON l.id_usuario = %s AND l.banda = b.banda::SMALLINT AND l.clave = b.clave::BIGINT
+            JOIN dataset_firma f ON f.id_dataset = l.id_dataset
+            GROUP BY l.id_dataset, f.firma
+            ORDER BY COUNT(*) DESC
+            LIMIT %s
+            """,
+            [item for pair in band_keys for item in pair] + [id_usuario, MAX_CANDIDATES]
+        )
+        scored = []
+        for id_dataset, firma in cursor.fetchall():
+            similarity = signature.similarity(MinHash.from_bytes(firma))
+            if similarity >= min_similarity:
+                scored.append((similarity, id_dataset))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        scored = scored[:limit]
+        if not scored:
+            return []
+
+        cursor.execute(
+            f"SELECT id_dataset, nombre, {', '.join(SUGGESTED_FIELDS)} FROM dataset WHERE id_dataset = ANY(%s)",
+            [[id_dataset for _, id_dataset in scored]]
+        )
+        rows = {row[0]: row for row in cursor.fetchall()}
+
+    similar = []
+    for similarity, id_dataset in scored:
+        row = rows.get(id_dataset)
+        if row is None:
+            continue
+        metadata = {field: str(value) for field, value in zip(SUGGESTED_FIELDS, row[2:]) if value}
+        similar.append({
+            'id_dataset': id_dataset,
+            'nombre': row[1],
+            'similitud': round(similarity, 3),
+            'metadatos': metadata,
+        })
+    return similar
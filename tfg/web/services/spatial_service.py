@@ -0,0 +1,73 @@
+from typing import Any, Dict, List, Optional
+
+from ..parsers.gazetteer import Place, get_gazetteer
+from ..parsers.geojson import GeoJSONSummary, scan_geojson
+from ..parsers.spatial import SpatialScanner, is_wgs84_bbox
+from .extraction_service import iter_uploaded_column_values
+
+
+def compute_spatial_extent(files: List[Dict[str, Any]], columns: List[str]) -> Optional[Dict[str, Any]]:
+    """extension_espacial from the uploaded data, resolved offline against the bundled gazetteer.
+
+    GeoJSON geometries, and the coordinates in the given columns (WKT,
+    'lat, lon' pairs, latitude/longitude columns), give a bounding box that
+    is named after the finest place holding it; without one, the place names
+    in the columns are reduced to the region they share. Returns a dict with
+    'value' (the field text), 'places', 'bbox' (trimmed of outlying column
+    positions), 'full_bbox' and the GeoJSON summary, or None when nothing
+    locates the data, so the caller can fall back to the LLM.
+    """
+    gazetteer = get_gazetteer()
+    geojson = GeoJSONSummary()
+    scanner = SpatialScanner(columns or [], gazetteer)
+
+    def scan_geometries(tipo_formato: str, source: Any, encoding: str) -> bool:
+        if tipo_formato == 'GEOJSON':
+            scan_geojson(source, encoding, geojson)
+            return True
+        # Without columns only GeoJSON geometries can locate the data
+        return not columns
+
+    for name, value in iter_uploaded_column_values(files, columns or [], scan_geometries):
+        scanner.add(name, value)
+
+    # Only a box in degrees can name places or be stated as WGS84, whatever the files declared
+    geojson_bbox = geojson.bbox if is_wgs84_bbox(geojson.bbox) else None
+    full_bbox = _union(geojson_bbox, scanner.bbox())
+    # Outliers are trimmed off the column positions, so one stray 0,0 does not stretch the box across the ocean
+    bbox = _union(geojson_bbox, scanner.bbox(trimmed=True))
+    places: List[Place] = []
+    if bbox:
+        place = gazetteer.smallest_containing(bbox)
+        places = [place] if place else gazetteer.overlapping(bbox)
+    if not places:
+        region = gazetteer.common_region(scanner.named_places())
+        if region:
+            places = [region]
+    if not bbox and not places:
+        return None
+
+    parts = []
+    if places:
+        parts.append('; '.join(gazetteer.label(place) for place in places))
+    if bbox:
+        parts.append(format_bbox(bbox))
+    return {
+        'value': '. '.join(parts),
+        'places': [{'id': place.id, 'name': place.name, 'level': place.level} for place in places],
+        'bbox': bbox,
+        'full_bbox': full_bbox,
+        'geojson': geojson.to_dict() if geojson.feature_count else None
+    }
+
+
+def format_bbox(bbox: List[float]) -> str:
+    """extension_espacial text for a [west, south, east, north] box in WGS84 degrees."""
+    west, south, east, north = bbox
+    return f"Caja envolvente (WGS84): oeste {west:.4f}, sur {south:.4f}, este {east:.4f}, norte {north:.4f}"
+
+
+def _union(first: Optional[List[float]], second: Optional[List[float]]) -> Optional[List[float]]:
+    if not first or not second:
+        return first or second
+    return [min(first[0], second[0]), min(first[1], second[1]), max(first[2], second[2]), max(first[3], second[3])]
@@ -0,0 +1,30 @@
+from typing import Any, Dict, List, Optional
+
+from ..parsers.temporal import DateRangeScanner, format_temporal_extent, merge_ranges
+from .extraction_service import iter_uploaded_column_values
+
+
+def compute_temporal_extent(files: List[Dict[str, Any]], columns: List[str]) -> Optional[str]:
+    """extension_temporal ('dd-mm-aaaa / dd-mm-aaaa') from the true min/max of the given date columns.
+
+    Every uploaded file is read once, in full; None when no column holds
+    dates in a recognizable layout, so the caller can fall back to the LLM.
+    """
+    if not columns:
+        return None
+    ranges = []
+    scanners: Dict[str, DateRangeScanner] = {}
+
+    def start_file(tipo_formato: str, source: Any, encoding: str) -> bool:
+        # Layouts are detected per file, since each file may write dates its own way
+        ranges.extend(scanner.date_range() for scanner in scanners.values())
+        scanners.clear()
+        scanners.update((name, DateRangeScanner()) for name in columns)
+        return False
+
+    for name, value in iter_uploaded_column_values(files, columns, start_file):
+        scanners[name].add(value)
+    ranges.extend(scanner.date_range() for scanner in scanners.values())
+
+    value_range = merge_ranges(ranges)
+    return format_temporal_extent(value_range) if value_range else None
@@ -32,6 +32,9 @@
     const inferirBtn = document.getElementById('inferir-btn');
     const resultadoPanel = document.getElementById('resultado-panel');
     const resultadoJson = document.getElementById('resultado-json');
+    const similaresSection = document.getElementById('similares-section');
+    const similaresContainer = document.getElementById('similares-container');
+    const idiomaDetectado = document.getElementById('idioma-detectado');
 
     function getCSRFToken() {
         const cookie = document.cookie.split('; ').find(row => row.startsWith('csrftoken='));
@@ -49,6 +52,13 @@
 
         try {
             const datasetFiles = JSON.parse(datasetRaw);
+            if (await addContentHashes(datasetFiles)) {
+                try {
+                    sessionStorage.setItem('datasetFiles', JSON.stringify(datasetFiles));
+                } catch (error) {
+                    console.error('Error saving file hashes:', error);
+                }
+            }
             await extractProperties(datasetFiles);
         } catch (error) {
             consoleError('Error parsing dataset files:', error);
@@ -57,22 +67,64 @@
         }
     }
 
+    // SHA-256 de cada fichero: con él el servidor reutiliza extracciones anteriores sin decodificarlo
+    async function addContentHashes(files) {
+        if (!window.crypto || !window.crypto.subtle) {
+            return false;
+        }
+
+        let added = false;
+        for (const file of files) {
+            if (file.sha256 || !file.content) {
+                continue;
+            }
+            try {
+                const buffer = await (await fetch(file.content)).arrayBuffer();
+                const digest = await window.crypto.subtle.digest('SHA-256', buffer);
+                file.sha256 = Array.from(new Uint8Array(digest), byte => byte.toString(16).padStart(2, '0')).join('');
+                added = true;
+            } catch (error) {
+                console.error('Error hashing file:', error);
+            }
+        }
+        return added;
+    }
+
     async function extractProperties(files) {
         try {
             const response = await fetch('/api/extract-properties/', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
+                    'Accept': 'application/x-ndjson',
                     'X-CSRFToken': getCSRFToken()
                 },
-                body: JSON.stringify({ files })
+                body: JSON.stringify({ files, stream: true })
             });
 
             if (!response.ok) {
                 throw new Error(`HTTP error! status: ${response.status}`);
             }
 
-            const data = await response.json();
+            // One JSON line per file as it finishes, then the merged result
+            const partialResults = [];
+            let data = null;
+            await readJsonLines(response, (message) => {
+                if (message.error) {
+                    throw new Error(message.error);
+                }
+                if (message.done) {
+                    data = message;
+                    return;
+                }
+                partialResults[message.file] = message.properties;
+                showProgress(message.completed, message.total);
+                renderPartialProperties(partialResults);
+            });
+
+            if (!data) {
+                throw new Error('Incomplete response');
+            }
 
             state.allProperties = data.properties;
             state.groupedProperties = data.grouped;
@@ -82,13 +134,67 @@
             }
 
             renderInterface();
+            loadSimilarDatasets(data.properties);
+            detectLanguage(files, data.grouped.text || []);
         } catch (error) {
             console.error('Error extracting properties:', error);
-            showAlert('No pudimos identificar propiedades en los datos cargados. Comprueba que el formato sea JSON, CSV, RDF-Turtle o RDF-XML.');
+            showAlert('No pudimos identificar propiedades en los datos cargados. Comprueba que el formato sea JSON, NDJSON, GeoJSON, CSV, Excel, ODS, Parquet, Arrow, RDF-Turtle, N-Triples o RDF-XML.');
             disableInterface();
         }
     }
 
+    async function readJsonLines(response, onMessage) {
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+
+        while (true) {
+            const { value, done } = await reader.read();
+            buffer += decoder.decode(value || new Uint8Array(), { stream: !done });
+
+            let newline = buffer.indexOf('\n');
+            while (newline !== -1) {
+                const line = buffer.slice(0, newline).trim();
+                buffer = buffer.slice(newline + 1);
+                if (line) {
+                    onMessage(JSON.parse(line));
+                }
+                newline = buffer.indexOf('\n');
+            }
+
+            if (done) {
+                break;
+            }
+        }
+
+        if (buffer.trim()) {
+            onMessage(JSON.parse(buffer));
+        }
+    }
+
+    function renderPartialProperties(partialResults) {
+        // Same rule as the server: the first file in upload order that defines a name wins
+        const seen = new Set();
+        const grouped = { text: [], numeric: [], date: [], coordinates: [], boolean: [] };
+        partialResults.forEach((properties) => {
+            (properties || []).forEach((prop) => {
+                if (seen.has(prop.name)) return;
+                seen.add(prop.name);
+                if (grouped[prop.type]) {
+                    grouped[prop.type].push(prop.name);
+                }
+            });
+        });
+        state.groupedProperties = grouped;
+        renderGroupedProperties();
+    }
+
+    function showProgress(completed, total) {
+        if (total > 1 && completed < total) {
+            showAlert(`Analizando ficheros… ${completed} de ${total}`);
+        }
+    }
+
     function renderInterface() {
         if (!state.allProperties.length) {
             showAlert('No se detectaron propiedades en los archivos cargados.');
@@ -102,6 +208,130 @@
         inferirBtn.disabled = false;
     }
 
+    // Conjuntos del usuario con columnas parecidas: sus metadatos se pueden reutilizar sin llamar a la IA
+    async function loadSimilarDatasets(properties) {
+        try {
+            const response = await fetch('/api/similar-datasets/', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                    'X-CSRFToken': getCSRFToken()
+                },
+                body: JSON.stringify({ properties })
+            });
+
+            if (!response.ok) {
+                return;
+            }
+
+            const data = await response.json();
+            renderSimilarDatasets(data.similar || []);
+        } catch (error) {
+            console.error('Error loading similar datasets:', error);
+        }
+    }
+
+    // Idioma de las columnas de texto, detectado en el servidor sin IA: rellena el campo Idioma
+    async function detectLanguage(files, columns) {
+        if (!columns.length) {
+            return;
+        }
+
+        try {
+            const response = await fetch('/api/detect-language/', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                    'X-CSRFToken': getCSRFToken()
+                },
+                body: JSON.stringify({ files, columns })
+            });
+
+            if (!response.ok) {
+                return;
+            }
+
+            const data = await response.json();
+            const detection = data.detection;
+            if (!detection || !detection.language) {
+                return;
+            }
+
+            sessionStorage.setItem(getStorageKey('idioma'), detection.language);
+            idiomaDetectado.textContent = `Idioma detectado en los datos: ${detection.language} (${Math.round(detection.confidence * 100)}% del texto). Se rellenará en el campo Idioma.`;
+            idiomaDetectado.hidden = false;
+        } catch (error) {
+            console.error('Error detecting language:', error);
+        }
+    }
+
+    function renderSimilarDatasets(similar) {
+        if (!similar.length) {
+            return;
+        }
+
+        const campos = JSON.parse(document.getElementById('campos-data').textContent || '[]');
+        const fieldLabels = { idioma: 'Idioma' };
+        campos.forEach(campo => {
+            fieldLabels[campo.id] = campo.nombre;
+        });
+
+        similaresContainer.innerHTML = '';
+
+        similar.forEach(dataset => {
+            const card = document.createElement('div');
+            card.className = 'similar-dataset';
+            card.innerHTML = `
+                <div class="similar-header">
+                    <h4></h4>
+                    <span class="similar-score">${Math.round(dataset.similitud * 100)}% parecido</span>
+                </div>
+                <dl class="similar-fields"></dl>
+                <button class="btn secundario reuse-btn" type="button">Usar estos metadatos</button>
+            `;
+            card.querySelector('h4').textContent = dataset.nombre;
+
+            const fields = card.querySelector('.similar-fields');
+            Object.entries(dataset.metadatos).forEach(([fieldId, value]) => {
+                const term = document.createElement('dt');
+                term.textContent = fieldLabels[fieldId] || fieldId;
+                const description = document.createElement('dd');
+                description.textContent = value;
+                fields.append(term, description);
+            });
+
+            card.querySelector('.reuse-btn').addEventListener('click', () => {
+                reuseMetadata(dataset.metadatos);
+            });
+
+            similaresContainer.appendChild(card);
+        });
+
+        similaresSection.hidden = false;
+    }
+
+    function reuseMetadata(metadata) {
+        Object.entries(metadata).forEach(([fieldId, value]) => {
+            sessionStorage.setItem(getStorageKey(fieldId), value);
+        });
+        window.location.href = getMetadatosUrl();
+    }
+
+    function getStorageKey(fieldId) {
+        // Capitalize first letter for sessionStorage key
+        return 'aiGenerated' + fieldId.charAt(0).toUpperCase() + fieldId.slice(1).replace(/_/g, '');
+    }
+
+    function getMetadatosUrl() {
+        // Obtener parámetros de URL para redirigir correctamente
+        const urlParams = new URLSearchParams(window.location.search);
+        const name = urlParams.get('name') || '';
+        const formato = urlParams.get('formato') || '';
+        const metadataUrl = urlParams.get('metadata_url') || '';
+
+        return `/metadatos/?name=${encodeURIComponent(name)}&formato=${encodeURIComponent(formato)}&metadata_url=${encodeURIComponent(metadataUrl)}`;
+    }
+
     function renderGroupedProperties() {
         const typeLabels = {
             text: { label: 'Texto', icon: '📝', color: '#0ea5e9' },
@@ -387,14 +617,8 @@ Contenido del archivo:
 
         sessionStorage.setItem('metadataInferenceSelection', JSON.stringify(result));
 
-        // Obtener parámetros de URL para redirigir correctamente
-        const urlParams = new URLSearchParams(window.location.search);
-        const name = urlParams.get('name') || '';
-        const formato = urlParams.get('formato') || '';
-        const metadataUrl = urlParams.get('metadata_url') || '';
-
         // Construir URL de metadatos
-        const metadatosUrl = `/metadatos/?name=${encodeURIComponent(name)}&formato=${encodeURIComponent(formato)}&metadata_url=${encodeURIComponent(metadataUrl)}`;
+        const metadatosUrl = getMetadatosUrl();
 
         // Obtener archivos de sessionStorage
         const datasetFiles = JSON.parse(sessionStorage.getItem('datasetFiles'));
@@ -414,6 +638,8 @@ Contenido del archivo:
 
         // Obtener el modelo seleccionado
         const selectedModel = document.getElementById('ai-model-select')?.value || 'gemini-2.5-flash-lite';
+        // Las palabras clave se calculan en local; la IA solo las refina si se marca la opción
+        const refineKeywords = document.getElementById('refine-keywords')?.checked || false;
 
         // Función para generar un metadato
         const generateMetadata = async (fieldId) => {
@@ -425,6 +651,10 @@ Contenido del archivo:
                     ai_model: selectedModel
                 };
 
+                if (fieldId === 'palabras_clave' && refineKeywords) {
+                    requestBody.refine_with_ai = true;
+                }
+
                 // Si hay un prompt personalizado para este campo, incluirlo
                 if (state.customPrompts[fieldId]) {
                     requestBody.custom_prompt = state.customPrompts[fieldId];
@@ -482,9 +712,7 @@ Contenido del archivo:
 
         // Guardar todos los metadatos generados en sessionStorage
         Object.entries(generatedMetadata).forEach(([fieldId, value]) => {
-            // Capitalize first letter for sessionStorage key
-            const keyName = 'aiGenerated' + fieldId.charAt(0).toUpperCase() + fieldId.slice(1).replace(/_/g, '');
-            sessionStorage.setItem(keyName, value);
+            sessionStorage.setItem(getStorageKey(fieldId), value);
         });
 
         // Mostrar resultado
@@ -1,3 +1,39 @@
-from django.test import TestCase
+import base64
+import json
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from .services.spatial_service import compute_spatial_extent
+
+
+def _geojson_upload(coordinates, crs=None):
+    document = {
+        'type': 'FeatureCollection',
+        'features': [
+            {'type': 'Feature', 'properties': {}, 'geometry': {'type': 'Point', 'coordinates': position}}
+            for position in coordinates
+        ],
+    }
+    if crs:
+        document['crs'] = {'type': 'name', 'properties': {'name': crs}}
+    content = base64.b64encode(json.dumps(document).encode('utf-8')).decode('ascii')
+    return {'name': 'puntos.geojson', 'type': 'application/geo+json',
+            'content': f'data:application/geo+json;base64,{content}'}
+
+
+class SpatialExtentTests(SimpleTestCase):
+
+    def test_projected_geojson_falls_back(self):
+        upload = _geojson_upload([[440000, 4474000], [441500, 4475200]], 'urn:ogc:def:crs:EPSG::25830')
+        self.assertIsNone(compute_spatial_extent([upload], []))
+
+    def test_projected_positions_without_crs_are_dropped(self):
+        upload = _geojson_upload([[440000, 4474000], [-3.7038, 40.4168]])
+        extent = compute_spatial_extent([upload], [])
+        self.assertEqual(extent['bbox'], [-3.7038, 40.4168, -3.7038, 40.4168])
+        self.assertEqual(extent['full_bbox'], extent['bbox'])
+
+    def test_wgs84_geojson_is_located(self):
+        upload = _geojson_upload([[-3.7038, 40.4168]], 'urn:ogc:def:crs:OGC:1.3:CRS84')
+        extent = compute_spatial_extent([upload], [])
+        self.assertIn('Madrid', extent['value'])
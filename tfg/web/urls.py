@@ -18,6 +18,8 @@ urlpatterns = [
     path('ckan/proxy/', views.ckan_proxies, name='ckan_proxies'),
     path('ckan/publish/', views.publish_to_ckan, name='publish_to_ckan'),
     path('api/extract-properties/', views.extract_properties_api, name='extract_properties_api'),
+    path('api/similar-datasets/', views.similar_datasets_api, name='similar_datasets_api'),
+    path('api/detect-language/', views.detect_language_api, name='detect_language_api'),
     path('api/generate-title/', views.generate_title_with_ai, name='generate_title_with_ai'),
     path('api/generate-metadata/', views.generate_metadata_with_ai, name='generate_metadata_with_ai'),
 ]
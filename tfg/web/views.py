@@ -1,16 +1,18 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.views.decorators.http import require_POST
 from django.db import connection, DatabaseError
-from django.http import HttpResponse, JsonResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.utils.text import slugify
 from django.contrib.auth.hashers import make_password, check_password
 from .models import Dataset, Usuario
-from .parsers.property_extraction_strategy import (
-    CSVExtractionStrategy,
-    JSONExtractionStrategy,
-    RDFXMLExtractionStrategy,
-    RDFTurtleExtractionStrategy
-)
+from .parsers.csv_scan import count_csv_records
+from .parsers.encoding import decode_bytes
+from .parsers.registry import detect_format, get_strategy, is_binary_format
+from .parsers.json_stream import preview_json
+from .parsers.ntriples import scan_ntriples
+from .parsers.spatial import spatial_column_role
+from .parsers.turtle_stream import scan_turtle
+import csv
 import json
 import base64
 import re
@@ -20,6 +22,14 @@ import io
 import requests
 from google import genai
 from .services.ckan_service import CkanClient
+from .services.extraction_service import (PropertyMerger, extract_stored_properties, iter_extracted_files,
+                                          without_profile_state)
+from .services.ingestion import ingest_files
+from .services.keyword_service import remove_dataset_terms, suggest_keywords
+from .services.language_service import detect_language
+from .services.similarity_service import find_similar_datasets
+from .services.spatial_service import compute_spatial_extent
+from .services.temporal_service import compute_temporal_extent
 
 INFERENCIA_CAMPOS = [
     {
@@ -379,6 +389,11 @@ def dataset_delete(request, pk):
                 print(f"Error borrando dataset {dataset.identificador} de CKAN: {e}")
     
     with connection.cursor() as cursor:
+        # Sus términos dejan de contar en el corpus de palabras clave del usuario
+        try:
+            remove_dataset_terms(cursor, dataset.pk)
+        except DatabaseError as e:
+            print(f"Error quitando los términos del dataset {dataset.pk}: {e}")
         cursor.execute("DELETE FROM fichero WHERE id_dataset = %s", [dataset.pk])
         cursor.execute("DELETE FROM dataset WHERE id_dataset = %s", [dataset.pk])
 
@@ -460,80 +475,13 @@ def crear_conjunto(request):
                     if dataset_files_data:
                         try:
                             files_data = json.loads(dataset_files_data)
-                            formato_seleccionado = formato or ''
-                            
-                            for file_info in files_data:
-                                # Extraer el contenido base64 (remover el prefijo data:...;base64,)
-                                content_original = file_info.get('content', '')
-                                if not content_original:
-                                    continue
-                                
-                                # Extraer solo la parte base64 (sin el prefijo data:...;base64,)
-                                match = re.search(r'base64,(.+)', content_original)
-                                if match:
-                                    content_base64 = match.group(1)
-                                else:
-                                    content_base64 = content_original
-                                
-                                # Decodificar base64 y manejar archivos binarios
-                                try:
-                                    # Decodificar base64 a bytes para verificar si es binario
-                                    file_bytes = base64.b64decode(content_base64)
-                                    
-                                    # Verificar si el archivo contiene caracteres NUL (es binario)
-                                    if b'\x00' in file_bytes:
-                                        # Es un archivo binario, mantenerlo en base64
-                                        file_content = content_base64
-                                    else:
-                                        # Intentar decodificar como texto
-                                        try:
-                                            file_content = file_bytes.decode('utf-8')
-                                        except UnicodeDecodeError:
-                                            # Si no es UTF-8, intentar con latin-1
-                                            file_content = file_bytes.decode('latin-1')
-                                except Exception:
-                                    continue
-                                
-                                # Determinar tipo_formato
-                                file_name = file_info.get('name', '').lower()
-                                file_type = file_info.get('type', '').lower()
-                                
-                                tipo_formato = None
-                                if formato_seleccionado:
-                                    tipo_formato = formato_seleccionado.upper()
-                                elif file_name.endswith('.csv') or 'csv' in file_type:
-                                    tipo_formato = 'CSV'
-                                elif file_name.endswith('.json') or 'json' in file_type:
-                                    tipo_formato = 'JSON'
-                                elif file_name.endswith('.ttl') or 'turtle' in file_type:
-                                    tipo_formato = 'RDF-TURTLE'
-                                elif file_name.endswith('.xml') or file_name.endswith('.rdf') or 'xml' in file_type or 'rdf' in file_type:
-                                    tipo_formato = 'RDF-XML'
-                                
-                                # Si no se pudo determinar, usar el formato seleccionado o CSV por defecto
-                                if not tipo_formato:
-                                    tipo_formato = formato_seleccionado.upper() if formato_seleccionado else 'CSV'
-                                
-                                # Validar que el tipo_formato sea válido
-                                if tipo_formato not in ['CSV', 'RDF-XML', 'RDF-TURTLE', 'JSON']:
-                                    tipo_formato = 'CSV'
-                                
-                                # Insertar en la tabla FICHERO
-                                cursor.execute(
-                                    """
-                                    INSERT INTO fichero (
-                                        id_dataset, tipo_formato, url_datos, contenido, nombre_archivo
-                                    )
-                                    VALUES (%s, %s, %s, %s, %s)
-                                    """,
-                                    [
-                                        id_dataset,
-                                        tipo_formato,
-                                        None,
-                                        file_content,
-                                        file_info.get('name', '')
-                                    ]
-                                )
+                            # Cada fichero se decodifica una vez y pasa por todas las etapas:
+                            # formato, hash, inserción en FICHERO y huella del esquema
+                            ingest_files(
+                                files_data, cursor, id_dataset,
+                                id_usuario=request.session.get('user_id', 1),
+                                declared_format=formato,
+                            )
                         except (json.JSONDecodeError, Exception):
                             pass
         except DatabaseError as e:
@@ -620,29 +568,26 @@ def visualizar(request, pk):
         tipo_formato = fichero_actual['tipo_formato']
         nombre_archivo = fichero_actual['nombre_archivo'] or ''
         
-        # Detect actual format from filename extension (more reliable than tipo_formato)
-        actual_format = tipo_formato  # Default to DB value
-        nombre_lower = nombre_archivo.lower()
-        if nombre_lower.endswith('.csv'):
-            actual_format = 'CSV'
-        elif nombre_lower.endswith('.json'):
-            actual_format = 'JSON'
-        elif nombre_lower.endswith('.ttl'):
-            actual_format = 'RDF-TURTLE'
-        elif nombre_lower.endswith('.xml') or nombre_lower.endswith('.rdf'):
-            actual_format = 'RDF-XML'
+        # Detect actual format from the content and filename (more reliable than tipo_formato)
+        actual_format = detect_format(contenido, nombre_archivo, declared=tipo_formato) or tipo_formato
         
         if contenido:
             if _es_base64(contenido):
                 propiedades_lista = ['Archivo binario codificado en base64']
+                if is_binary_format(actual_format):
+                    # Formatos binarios (columnares, hojas de cálculo): se leen directamente del base64
+                    properties = extract_stored_properties(contenido, actual_format)
+                    if properties:
+                        propiedades_lista = [prop['name'] for prop in properties]
                 extracto = "Este archivo está codificado en base64. No se puede mostrar como texto."
             else:
-                strategy = _get_extraction_strategy_by_format(actual_format)
+                strategy = get_strategy(actual_format)
                 
                 if strategy:
                     try:
-                        properties = strategy.extract_properties(contenido)
-                        propiedades_lista = [prop.name for prop in properties]
+                        # Memoizado por hash del contenido: volver a ver el fichero no lo re-extrae
+                        properties = extract_stored_properties(contenido, actual_format)
+                        propiedades_lista = [prop['name'] for prop in properties]
                     except Exception as e:
                         print(f"Error extracting properties: {e}")
                         propiedades_lista = [f'Error al extraer propiedades: {str(e)}']
@@ -695,14 +640,12 @@ def visualizar(request, pk):
                     csv_data = None
                 
                 # Format JSON for better readability
-                if actual_format and actual_format.upper() == 'JSON':
+                if actual_format and actual_format.upper() in ('JSON', 'GEOJSON'):
                     try:
-                        # Try to parse and pretty-print the JSON
-                        json_obj = json.loads(contenido)
-                        extracto = json.dumps(json_obj, indent=2, ensure_ascii=False)
-                        # Limit to first 2000 chars after formatting
-                        if len(extracto) > 2000:
-                            extracto = extracto[:2000] + '\n... (contenido truncado)'
+                        # Pretty-print only the first 2000 chars, parsing no further than needed
+                        extracto, truncado = preview_json(contenido, max_chars=2000)
+                        if truncado:
+                            extracto += '\n... (contenido truncado)'
                     except (json.JSONDecodeError, Exception):
                         extracto = contenido[:2000] + ('...' if len(contenido) > 2000 else '')
                 else:
@@ -732,19 +675,6 @@ def visualizar(request, pk):
     return render(request, 'visualizar.html', context)
 
 
-def _get_extraction_strategy_by_format(tipo_formato: str):
-    """Get appropriate extraction strategy based on format type."""
-    if tipo_formato == 'CSV':
-        return CSVExtractionStrategy()
-    elif tipo_formato == 'JSON':
-        return JSONExtractionStrategy()
-    elif tipo_formato == 'RDF-XML':
-        return RDFXMLExtractionStrategy()
-    elif tipo_formato == 'RDF-TURTLE':
-        return RDFTurtleExtractionStrategy()
-    return None
-
-
 def _es_base64(s):
     """Verifica si una cadena es base64 válido."""
     try:
@@ -763,22 +693,28 @@ def _es_base64(s):
 
 def _procesar_csv(contenido):
     """Procesa un archivo CSV y extrae propiedades y extracto."""
-    lineas = contenido.split('\n')
-    if not lineas:
+    # Solo se separan las líneas del extracto; el resto del fichero no se copia
+    lineas = contenido.split('\n', 10)
+    if not contenido.strip():
         return 'No hay datos CSV', 'Archivo CSV vacío'
     
-    # Primera línea como encabezados
-    headers = [h.strip().strip('"') for h in lineas[0].split(',')]
+    # Primer registro como encabezados (respetando comillas y el delimitador detectado)
+    try:
+        delimitador = csv.Sniffer().sniff(contenido[:1024], delimiters=',;\t|').delimiter
+    except csv.Error:
+        delimitador = ','
+    headers = [h.strip() for h in next(csv.reader(lineas, delimiter=delimitador), [])]
     
-    # Propiedades: número de columnas, número de filas
-    num_filas = len([l for l in lineas if l.strip()])
+    # Propiedades: número de columnas, número de filas (en paralelo por bloques en ficheros grandes)
+    num_filas = count_csv_records(contenido, delimiter=delimitador)
     propiedades = f"Columnas: {len(headers)}\nFilas: {num_filas - 1}\n\nColumnas:\n"
     propiedades += '\n'.join([f"  - {h}" for h in headers])
     
     # Extracto: primeras 10 líneas
     extracto = '\n'.join(lineas[:10])
     if len(lineas) > 10:
-        extracto += f"\n\n... ({len(lineas) - 10} líneas más)"
+        lineas_restantes = contenido.count('\n') - 9
+        extracto += f"\n\n... ({lineas_restantes} líneas más)"
     
     return propiedades, extracto
 
@@ -819,17 +755,16 @@ def _procesar_json(contenido):
 
 def _procesar_rdf(contenido, tipo_formato):
     """Procesa un archivo RDF y extrae propiedades y extracto."""
-    import re
-    
-    if tipo_formato == 'RDF-TURTLE':
+    if tipo_formato in ('RDF-TURTLE', 'RDF-NTRIPLES'):
         lineas = contenido.split('\n')
         propiedades_list = [f"Tipo: {tipo_formato}", f"Líneas totales: {len(lineas)}"]
         
-        # Extraer prefijos
-        prefixes = {}
-        prefix_pattern = r'@prefix\s+(\w+):\s+<([^>]+)>'
-        for match in re.finditer(prefix_pattern, contenido):
-            prefixes[match.group(1)] = match.group(2)
+        # Una sola pasada del tokenizador: prefijos, sujetos y predicados
+        if tipo_formato == 'RDF-NTRIPLES':
+            resumen = scan_ntriples(contenido)
+        else:
+            resumen = scan_turtle(contenido)
+        prefixes = resumen.prefixes
         
         if prefixes:
             propiedades_list.append(f"\nPrefijos ({len(prefixes)}):")
@@ -838,65 +773,42 @@ def _procesar_rdf(contenido, tipo_formato):
             if len(prefixes) > 10:
                 propiedades_list.append(f"  ... ({len(prefixes) - 10} prefijos más)")
         
-        # Extraer recursos (sujetos) - mejorado
-        # En Turtle, los sujetos aparecen al inicio de las líneas o después de punto
-        sujetos = set()
-        # Patrón para sujetos al inicio de línea o después de punto
-        sujeto_pattern = r'(?:^|\.\s*)(<[^>]+>|[\w]+:[\w-]+|_:[\w]+)'
-        for match in re.finditer(sujeto_pattern, contenido, re.MULTILINE):
-            sujeto = match.group(1)
-            if not sujeto.startswith('@') and 'base64' not in sujeto.lower():
-                sujetos.add(sujeto)
-        
-        if sujetos:
-            propiedades_list.append(f"\nRecursos únicos encontrados: {len(sujetos)}")
-            for sujeto in list(sujetos)[:10]:
+        num_sujetos = resumen.subject_count
+        if num_sujetos:
+            # Pasado el límite de sujetos distintos el recuento es solo una cota inferior
+            al_menos = 'al menos ' if resumen.subjects_truncated else ''
+            propiedades_list.append(f"\nRecursos únicos encontrados: {al_menos}{num_sujetos}")
+            for sujeto in resumen.subjects_sample:
                 propiedades_list.append(f"  - {sujeto}")
-            if len(sujetos) > 10:
-                propiedades_list.append(f"  ... ({len(sujetos) - 10} recursos más)")
+            if num_sujetos > len(resumen.subjects_sample):
+                propiedades_list.append(f"  ... ({al_menos}{num_sujetos - len(resumen.subjects_sample)} recursos más)")
         
-        # Extraer propiedades comunes (predicados)
-        propiedades_comunes = {
-            'dct:title': [],
-            'dct:description': [],
-            'dct:identifier': [],
-            'dct:type': [],
-            'dct:language': [],
-            'dcat:theme': [],
-            'dct:issued': [],
-            'dct:modified': [],
-            'dct:publisher': [],
-            'dct:format': [],
-            'dct:license': [],
-            'dcat:downloadURL': [],
-            'dcat:accessURL': [],
+        # Extraer propiedades comunes (predicados), resueltas con los espacios de nombres conocidos
+        espacios_conocidos = {
+            'dct': 'http://purl.org/dc/terms/',
+            'dcat': 'http://www.w3.org/ns/dcat#',
         }
+        propiedades_comunes = [
+            'dct:title', 'dct:description', 'dct:identifier', 'dct:type', 'dct:language',
+            'dcat:theme', 'dct:issued', 'dct:modified', 'dct:publisher', 'dct:format',
+            'dct:license', 'dcat:downloadURL', 'dcat:accessURL',
+        ]
         
-        for prop in propiedades_comunes.keys():
-            # Buscar triples con este predicado en Turtle
-            # Formato: predicado "valor" o predicado 'valor'
-            patterns = [
-                rf'{re.escape(prop)}\s+["\']([^"\']+)["\']',  # Literales con comillas
-                rf'{re.escape(prop)}\s+<([^>]+)>',  # URIs
-                rf'{re.escape(prop)}\s+([\w]+:[\w-]+)',  # Prefijos
-            ]
-            matches = []
-            for pattern in patterns:
-                matches.extend(re.findall(pattern, contenido))
-            if matches:
-                propiedades_comunes[prop] = matches[:3]  # Primeros 3 valores
+        propiedades_encontradas = {}
+        for prop in propiedades_comunes:
+            prefijo, _, nombre = prop.partition(':')
+            stats = resumen.predicates.get(espacios_conocidos[prefijo] + nombre)
+            if stats and stats.samples:
+                propiedades_encontradas[prop] = stats.samples
         
-        propiedades_encontradas = {k: v for k, v in propiedades_comunes.items() if v}
         if propiedades_encontradas:
             propiedades_list.append(f"\nPropiedades principales encontradas ({len(propiedades_encontradas)}):")
             for prop, valores in list(propiedades_encontradas.items())[:15]:
                 valores_str = ', '.join(valores) if len(valores) == 1 else f"{valores[0]} (+{len(valores)-1} más)"
                 propiedades_list.append(f"  {prop}: {valores_str}")
         
-        # Contar triples aproximados (líneas con predicado)
-        triples_count = len(re.findall(r'\s+\w+:\w+\s+', contenido))
-        if triples_count > 0:
-            propiedades_list.append(f"\nTriples aproximados: {triples_count}")
+        if resumen.triple_count > 0:
+            propiedades_list.append(f"\nTriples: {resumen.triple_count}")
         
         propiedades = '\n'.join(propiedades_list)
         extracto = contenido[:2000]
@@ -1275,60 +1187,109 @@ def extract_properties_api(request):
         if not files:
             return JsonResponse({'error': 'No files provided'}, status=400)
         
-        all_properties = {}
+        merger = PropertyMerger(len(files))
         
-        for file_info in files:
-            content = file_info.get('content', '')
-            file_type = file_info.get('type', '').lower()
-            file_name = file_info.get('name', '').lower()
-            
-            try:
-                content_text = _decode_file_content(content)
-            except Exception as e:
-                continue
-            
-            strategy = _get_extraction_strategy(file_type, file_name)
-            
-            if strategy:
-                properties = strategy.extract_properties(content_text)
-                
-                for prop in properties:
-                    prop_dict = prop.to_dict()
-                    if prop_dict['name'] not in all_properties:
-                        all_properties[prop_dict['name']] = prop_dict
-        
-        grouped = {
-            'text': [],
-            'numeric': [],
-            'date': [],
-            'coordinates': [],
-            'boolean': []
-        }
+        # Con stream=true se envía una línea NDJSON por fichero según termina y el resumen al final
+        if data.get('stream') or 'application/x-ndjson' in request.headers.get('Accept', ''):
+            return StreamingHttpResponse(
+                _stream_extraccion(files, merger),
+                content_type='application/x-ndjson'
+            )
         
-        for prop_name, prop_data in all_properties.items():
-            prop_type = prop_data['type']
-            if prop_type in grouped:
-                grouped[prop_type].append(prop_name)
-        
-        auto_assignments = {
-            'titulo': grouped['text'][:3],
-            'descripcion': grouped['text'][:3],
-            'tema': grouped['text'][:3],
-            'palabras_clave': grouped['text'][:5],
-            'extension_temporal': grouped['date'],
-            'extension_espacial': grouped['coordinates']
-        }
+        for index, properties in iter_extracted_files(files):
+            merger.add(index, properties)
         
-        return JsonResponse({
-            'properties': list(all_properties.values()),
-            'grouped': grouped,
-            'auto_assignments': auto_assignments
-        })
+        return JsonResponse(_resumen_propiedades(merger.merged()))
         
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
 
 
+def _stream_extraccion(files, merger):
+    """Genera una línea JSON por fichero extraído y una última con el resultado combinado."""
+    try:
+        completados = 0
+        for index, properties in iter_extracted_files(files):
+            merger.add(index, properties)
+            completados += 1
+            yield json.dumps({
+                'file': index,
+                'name': files[index].get('name', ''),
+                'properties': without_profile_state(properties),
+                'completed': completados,
+                'total': len(files),
+            }) + '\n'
+        yield json.dumps({'done': True, **_resumen_propiedades(merger.merged())}) + '\n'
+    except Exception as e:
+        yield json.dumps({'error': str(e)}) + '\n'
+
+
+def _resumen_propiedades(all_properties):
+    """Agrupa las propiedades por tipo y propone asignaciones automáticas."""
+    grouped = {
+        'text': [],
+        'numeric': [],
+        'date': [],
+        'coordinates': [],
+        'boolean': []
+    }
+    
+    columnas_espaciales = []
+    for prop_name, prop_data in all_properties.items():
+        prop_type = prop_data['type']
+        if prop_type in grouped:
+            grouped[prop_type].append(prop_name)
+        # Coordenadas, latitud/longitud y columnas con nombres de lugar (municipio, provincia...)
+        if spatial_column_role(prop_name, prop_type):
+            columnas_espaciales.append(prop_name)
+    
+    auto_assignments = {
+        'titulo': grouped['text'][:3],
+        'descripcion': grouped['text'][:3],
+        'tema': grouped['text'][:3],
+        'palabras_clave': grouped['text'][:5],
+        'extension_temporal': grouped['date'],
+        'extension_espacial': columnas_espaciales
+    }
+    
+    return {
+        'properties': list(all_properties.values()),
+        'grouped': grouped,
+        'auto_assignments': auto_assignments
+    }
+
+
+def detect_language_api(request):
+    """Idioma de las columnas de texto de los ficheros, detectado en local (sin llamadas externas)."""
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Only POST requests allowed'}, status=405)
+    
+    try:
+        data = json.loads(request.body)
+        files = data.get('files', [])
+        columns = data.get('columns', [])
+        return JsonResponse({'detection': detect_language(files, columns)})
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+
+def similar_datasets_api(request):
+    """Conjuntos del usuario con un esquema parecido a las propiedades extraídas, con sus metadatos."""
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Only POST requests allowed'}, status=405)
+    
+    user_id = request.session.get('user_id')
+    if not user_id:
+        return JsonResponse({'similar': []})
+    
+    try:
+        data = json.loads(request.body)
+        properties = data.get('properties', [])
+        return JsonResponse({'similar': find_similar_datasets(user_id, properties)})
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+
 def _decode_file_content(data_url: str) -> str:
     if not data_url:
         return ''
@@ -1340,27 +1301,11 @@ def _decode_file_content(data_url: str) -> str:
     base64_str = data_url[base64_index + 7:]
     try:
         binary = base64.b64decode(base64_str)
-        return binary.decode('utf-8', errors='ignore')
+        return decode_bytes(binary)
     except Exception:
         return ''
 
 
-def _get_extraction_strategy(file_type: str, file_name: str):
-    if 'turtle' in file_type or file_name.endswith('.ttl') or file_name.endswith('.turtle'):
-        return RDFTurtleExtractionStrategy()
-    
-    elif 'json' in file_type or file_name.endswith('.json'):
-        return JSONExtractionStrategy()
-    
-    elif 'xml' in file_type or 'rdf' in file_type or file_name.endswith('.xml') or file_name.endswith('.rdf'):
-        return RDFXMLExtractionStrategy()
-    
-    elif 'csv' in file_type or file_name.endswith('.csv'):
-        return CSVExtractionStrategy()
-    
-    return JSONExtractionStrategy()
-
-
 def generate_title_with_ai(request):
     if request.method != 'POST':
         return JsonResponse({'error': 'Only POST requests allowed'}, status=405)
@@ -1448,6 +1393,48 @@ def generate_metadata_with_ai(request):
         if not field_id:
             return JsonResponse({'error': 'No se proporcionÃ³ field_id'}, status=400)
         
+        # Extensión temporal: se calcula con el mínimo y el máximo reales de las columnas
+        # de fecha asignadas; la IA solo se usa si no se encuentran fechas
+        if field_id == 'extension_temporal' and not (custom_prompt and custom_prompt.strip()):
+            columnas_fecha = (data.get('selectedProperties') or {}).get('extension_temporal', [])
+            extension = compute_temporal_extent(files, columnas_fecha)
+            if extension:
+                return JsonResponse({
+                    'value': extension,
+                    'field_id': field_id,
+                    'success': True,
+                    'source': 'local'
+                })
+        
+        # Extensión espacial: caja envolvente de las geometrías y coordenadas, con el nombre del
+        # lugar que la contiene según el nomenclátor local (sin llamadas de red)
+        if field_id == 'extension_espacial' and not (custom_prompt and custom_prompt.strip()):
+            columnas_espaciales = (data.get('selectedProperties') or {}).get('extension_espacial', [])
+            extension = compute_spatial_extent(files, columnas_espaciales)
+            if extension:
+                return JsonResponse({
+                    'value': extension['value'],
+                    'field_id': field_id,
+                    'success': True,
+                    'source': 'local',
+                    'spatial': extension
+                })
+        
+        # Palabras clave: frases puntuadas con RAKE y TF-IDF frente a los demás conjuntos del
+        # usuario, en local; la IA solo se llama para refinarlas si se pide (refine_with_ai)
+        palabras_clave_locales = []
+        if field_id == 'palabras_clave' and not (custom_prompt and custom_prompt.strip()):
+            columnas_texto = (data.get('selectedProperties') or {}).get('palabras_clave', [])
+            palabras_clave_locales = suggest_keywords(files, columnas_texto, request.session.get('user_id'))
+            if palabras_clave_locales and not data.get('refine_with_ai'):
+                return JsonResponse({
+                    'value': ', '.join(palabras_clave_locales),
+                    'field_id': field_id,
+                    'success': True,
+                    'source': 'local',
+                    'keywords': palabras_clave_locales
+                })
+        
         file_content = _decode_file_content(files[0].get('content', ''))
         if not file_content:
             return JsonResponse({'error': 'No se pudo decodificar el contenido del archivo'}, status=400)
@@ -1525,6 +1512,9 @@ Contenido del archivo:
         else:
             default_prompt = DEFAULT_PROMPTS.get(field_id, DEFAULT_PROMPTS['titulo'])
             prompt = default_prompt.replace('{file_content}', file_content_truncated)
+            if palabras_clave_locales:
+                prompt += ('\n\nPalabras clave candidatas extraídas de los datos (mejóralas, '
+                           'no las repitas sin más): ' + ', '.join(palabras_clave_locales))
         
         api_key = os.getenv('API_KEY')
         if not api_key:
@@ -1677,25 +1667,6 @@ def publish_to_ckan(request):
             
         ckan_dataset_id = ckan_resp['result']['id']
         
-        for file_info in files_list:
-            content_original = file_info.get('content', '')
-            if not content_original: continue
-            
-            if 'base64,' in content_original:
-                _, b64_data = content_original.split('base64,')
-            else:
-                b64_data = content_original
-            
-            try:
-                file_bytes = base64.b64decode(b64_data)
-                file_obj = io.BytesIO(file_bytes)
-                filename = file_info.get('name', 'resource')
-                file_fmt = file_info.get('type', '')
-                
-                ckan.resource_create(ckan_dataset_id, file_obj, filename, file_fmt)
-            except Exception:
-                continue
-        
         with connection.cursor() as cursor:
             def nz(val): return (val or '').strip() or None
             
@@ -1744,67 +1715,18 @@ def publish_to_ckan(request):
                 row = cursor.fetchone()
                 local_id = row[0] if row else None
                 
-        if local_id and files_list:
-            for file_info in files_list:
-                content_original = file_info.get('content', '')
-                if not content_original:
-                    continue
-                
-                if 'base64,' in content_original:
-                        _, content_base64 = content_original.split('base64,')
-                else:
-                        content_base64 = content_original
-                
-                try:
-                    file_bytes = base64.b64decode(content_base64)
-                    if b'\x00' in file_bytes:
-                        file_content = content_base64
-                    else:
-                        try:
-                            file_content = file_bytes.decode('utf-8')
-                        except UnicodeDecodeError:
-                            file_content = file_bytes.decode('latin-1')
-                except Exception:
-                    continue
-
-                file_name = file_info.get('name', '').lower()
-                file_type = file_info.get('type', '').lower()
-                formato_seleccionado = request.POST.get('formato', '')
-                
-                tipo_formato = None
-                if formato_seleccionado:
-                    tipo_formato = formato_seleccionado.upper()
-                elif file_name.endswith('.csv') or 'csv' in file_type:
-                    tipo_formato = 'CSV'
-                elif file_name.endswith('.json') or 'json' in file_type:
-                    tipo_formato = 'JSON'
-                elif file_name.endswith('.ttl') or 'turtle' in file_type:
-                    tipo_formato = 'RDF-TURTLE'
-                elif file_name.endswith('.xml') or file_name.endswith('.rdf') or 'xml' in file_type or 'rdf' in file_type:
-                    tipo_formato = 'RDF-XML'
-                
-                if not tipo_formato:
-                    tipo_formato = formato_seleccionado.upper() if formato_seleccionado else 'CSV'
-                
-                if tipo_formato not in ['CSV', 'RDF-XML', 'RDF-TURTLE', 'JSON']:
-                    tipo_formato = 'CSV'
+        def publicar_recurso(upload):
+            ckan.resource_create(ckan_dataset_id, io.BytesIO(upload.data), upload.name or 'resource', upload.mime_type)
 
-                with connection.cursor() as cursor:
-                    cursor.execute(
-                        """
-                        INSERT INTO fichero (
-                            id_dataset, tipo_formato, url_datos, contenido, nombre_archivo
-                        )
-                        VALUES (%s, %s, %s, %s, %s)
-                        """,
-                        [
-                            local_id,
-                            tipo_formato,
-                            None,
-                            file_content,
-                            file_info.get('name', '')
-                        ]
-                    )
+        # Un solo paso por fichero: se sube a CKAN, se guarda en FICHERO y se indexa su esquema
+        if files_list:
+            with connection.cursor() as cursor:
+                ingest_files(
+                    files_list, cursor, local_id,
+                    id_usuario=user_id,
+                    declared_format=request.POST.get('formato', ''),
+                    on_upload=publicar_recurso,
+                )
 
         return JsonResponse({'success': True, 'dataset_id': local_id, 'ckan_id': ckan_dataset_id})
         